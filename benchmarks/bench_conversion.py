@@ -0,0 +1,395 @@
+"""
+Benchmark of the conversion of OpenAPI documents to MCP tools, stage by stage, at scale.
+
+Documents:
+- synthetic ones with 10 to 10,000 operations (`ops-N`), whose schemas are built from a pool of components that
+  are heavily shared between operations and reference each other a few levels deep
+- a synthetic one with deeply nested components (`deep-N`)
+- the bundled `swagger_simple.yaml` (needs PyYAML). It has no operation IDs, so they are derived from the method
+  and path of its operations, as the conversion skips operations without one
+
+Stages:
+- `resolve`: `resolve_schema_references()` of the whole document
+- `clean`: `clean_schema_for_display()` of every resolved request body and response schema
+- `example`: `generate_example_from_schema()` of every cleaned response schema
+- `convert`: `convert_openapi_to_mcp_tools()`, end to end, with the default options
+- `convert_full`: the same, describing all the responses and their full schemas
+
+Each stage is measured for its time (over at least `--repeat` runs, and as many as fit in `--min-time` seconds for
+the fast stages: the median, the fastest run, and the spread of the runs, how much slower than the fastest the upper
+quartile is), its peak memory (traced by `tracemalloc`, in a separate run) and the size of its output, in bytes of
+JSON.
+
+Results are written to a JSON file with `--output`. Keep one as a baseline, and compare a later run to it with
+`--compare`: the command exits with status 1 if any stage got slower or used more memory than the tolerance. Times
+are compared by their fastest run, which other processes can only slow down, and a stage is only slower if it's
+slower by more than the tolerance plus the spread of the baseline's own runs: a noisy stage has to slow down by more
+than its noise. Changes smaller than `--min-slowdown` seconds, or 64 KiB of memory, are never regressions either.
+Comparing needs at least 5 runs per stage, on both sides, to tell the spread.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_conversion.py [--operations 10 100 1000 10000] [--depth 6]
+        [--repeat 5] [--min-time 0.5] [--output results.json] [--compare baseline.json] [--tolerance 0.1]
+        [--min-slowdown 0.001]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi_mcp.openapi.convert import convert_openapi_to_mcp_tools, iter_operations
+from fastapi_mcp.openapi.utils import (
+    clean_schema_for_display,
+    generate_example_from_schema,
+    resolve_schema_references,
+)
+
+
+SWAGGER_SIMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "swagger_simple.yaml")
+
+# The fields of a result that are regressions when they grow past the tolerance, and by more than the noise
+COMPARED_FIELDS = ["min_seconds", "peak_bytes"]
+MIN_PEAK_GROWTH = 64 * 1024
+
+# Runs of a stage at least, for `--compare` to tell its spread
+MIN_COMPARED_RUNS = 5
+
+# Runs of a stage at most, however fast it is
+MAX_RUNS = 1000
+
+
+def component_name(level: int, index: int) -> str:
+    return f"Level{level}Model{index}"
+
+
+def ref(name: str) -> Dict[str, str]:
+    return {"$ref": f"#/components/schemas/{name}"}
+
+
+def make_components(depth: int, width: int) -> Dict[str, Any]:
+    """
+    `width` components per level, `depth` levels. A component references two components of the next level, as a
+    property and as the items of an array, so every component is shared by many others. The last level only has
+    scalar properties. There are no cycles: the conversion inlines references, and doesn't support them.
+    """
+    schemas: Dict[str, Any] = {}
+    for level in range(depth):
+        for index in range(width):
+            properties: Dict[str, Any] = {
+                "id": {"type": "integer", "title": "Id"},
+                "name": {"type": "string", "title": "Name", "maxLength": 100},
+                "created_at": {"type": "string", "format": "date-time", "readOnly": True},
+                "status": {"type": "string", "enum": ["active", "archived", "deleted"]},
+                "note": {"anyOf": [{"type": "string"}, {"type": "null"}], "title": "Note"},
+            }
+            if level + 1 < depth:
+                properties["child"] = ref(component_name(level + 1, index))
+                properties["children"] = {
+                    "type": "array",
+                    "items": ref(component_name(level + 1, (index + 1) % width)),
+                }
+            schemas[component_name(level, index)] = {
+                "type": "object",
+                "title": component_name(level, index),
+                "properties": properties,
+                "required": ["id", "name"],
+            }
+
+    schemas["ValidationError"] = {
+        "type": "object",
+        "title": "ValidationError",
+        "properties": {
+            "loc": {"type": "array", "items": {"anyOf": [{"type": "string"}, {"type": "integer"}]}},
+            "msg": {"type": "string"},
+            "type": {"type": "string"},
+        },
+        "required": ["loc", "msg", "type"],
+    }
+    schemas["HTTPValidationError"] = {
+        "type": "object",
+        "title": "HTTPValidationError",
+        "properties": {"detail": {"type": "array", "items": ref("ValidationError")}},
+    }
+    return schemas
+
+
+def make_document(num_operations: int, depth: int = 3, width: Optional[int] = None) -> Dict[str, Any]:
+    """A FastAPI-like document, with a GET, PUT, POST and DELETE per resource, until `num_operations`."""
+    width = width or max(5, num_operations // 20)
+    paths: Dict[str, Any] = {}
+    methods = ["get", "put", "post", "delete"]
+
+    for i in range(num_operations):
+        resource, method = divmod(i, len(methods))
+        method = methods[method]
+        model = component_name(0, resource % width)
+        path = f"/resources{resource}/items/{{item_id}}" if method != "post" else f"/resources{resource}/items"
+
+        operation: Dict[str, Any] = {
+            "operationId": f"{method}_item_{resource}",
+            "summary": f"{method.capitalize()} an item of resource {resource}",
+            "description": f"{method.capitalize()} an item of resource {resource}, with its nested children.",
+            "tags": [f"group{resource % 20}"],
+            "parameters": [
+                {"name": "q", "in": "query", "required": False, "schema": {"type": "string", "title": "Q"}},
+                {"name": "limit", "in": "query", "required": False, "schema": {"type": "integer", "default": 10}},
+            ],
+            "responses": {
+                "200": {
+                    "description": "Successful Response",
+                    "content": {"application/json": {"schema": ref(model)}},
+                },
+                "422": {
+                    "description": "Validation Error",
+                    "content": {"application/json": {"schema": ref("HTTPValidationError")}},
+                },
+            },
+        }
+        if method != "post":
+            operation["parameters"].insert(
+                0, {"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}
+            )
+        if method in ("put", "post"):
+            operation["requestBody"] = {
+                "required": True,
+                "content": {"application/json": {"schema": ref(model)}},
+            }
+        paths.setdefault(path, {})[method] = operation
+
+    return {
+        "openapi": "3.1.0",
+        "info": {"title": f"Synthetic API ({num_operations} operations)", "version": "1.0.0"},
+        "paths": paths,
+        "components": {"schemas": make_components(depth, width)},
+    }
+
+
+def load_swagger_simple() -> Optional[Dict[str, Any]]:
+    try:
+        import yaml
+    except ImportError:
+        print("PyYAML isn't installed: skipping swagger_simple.yaml", file=sys.stderr)
+        return None
+
+    with open(SWAGGER_SIMPLE) as f:
+        document = yaml.safe_load(f)
+
+    for path, path_item in document.get("paths", {}).items():
+        for method, operation in path_item.items():
+            if isinstance(operation, dict) and "operationId" not in operation:
+                operation["operationId"] = f"{method}_{re.sub(r'[^a-zA-Z0-9]+', '_', path).strip('_')}"
+    return document
+
+
+def iter_schemas(resolved_document: Dict[str, Any], responses_only: bool = False) -> Iterator[Dict[str, Any]]:
+    """The request body and response schemas of the operations of a resolved document."""
+    for _, _, _, operation in iter_operations(resolved_document, log_skipped=False):
+        bodies = [] if responses_only else [operation.get("requestBody", {})]
+        bodies.extend(operation.get("responses", {}).values())
+        for body in bodies:
+            schema = body.get("content", {}).get("application/json", {}).get("schema")
+            if isinstance(schema, dict):
+                yield schema
+
+
+def make_stages(document: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    """The stages of the conversion, each working on the output of the previous ones, computed beforehand."""
+    resolved = resolve_schema_references(document, document)
+    schemas = list(iter_schemas(resolved))
+    response_schemas = [clean_schema_for_display(schema) for schema in iter_schemas(resolved, responses_only=True)]
+
+    return {
+        "resolve": lambda: resolve_schema_references(document, document),
+        "clean": lambda: [clean_schema_for_display(schema) for schema in schemas],
+        "example": lambda: [generate_example_from_schema(schema) for schema in response_schemas],
+        "convert": lambda: convert_openapi_to_mcp_tools(document),
+        "convert_full": lambda: convert_openapi_to_mcp_tools(
+            document, describe_all_responses=True, describe_full_response_schema=True
+        ),
+    }
+
+
+def output_size(output: Any) -> int:
+    if isinstance(output, tuple):
+        tools, operation_map = output
+        return len(json.dumps([tool.model_dump(mode="json") for tool in tools])) + len(json.dumps(operation_map))
+    return len(json.dumps(output, default=str))
+
+
+def measure(stage: Callable[[], Any], repeat: int, min_time: float) -> Tuple[List[float], int, int]:
+    """
+    The times of at least `repeat` runs, and of as many as fit in `min_time`, the peak memory of one run and the size
+    of the output.
+    """
+    durations: List[float] = []
+    output = None
+    deadline = time.perf_counter() + min_time
+    while len(durations) < repeat or (time.perf_counter() < deadline and len(durations) < MAX_RUNS):
+        gc.collect()
+        start = time.perf_counter()
+        output = stage()
+        durations.append(time.perf_counter() - start)
+        del output
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        output = stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return durations, peak, output_size(output)
+
+
+def spread(durations: List[float]) -> float:
+    """How much slower than the fastest run the upper quartile of the runs is, relative to the fastest."""
+    if len(durations) < 2:
+        return 0.0
+    fastest = min(durations)
+    return (statistics.quantiles(durations, n=4)[2] - fastest) / fastest if fastest else 0.0
+
+
+def run(documents: List[Tuple[str, Dict[str, Any]]], repeat: int, min_time: float) -> List[Dict[str, Any]]:
+    results = []
+    print(f"{'document':>16} {'stage':>13} {'time (ms)':>11} {'peak (MB)':>10} {'output (KB)':>12}")
+    for name, document in documents:
+        operations = sum(1 for _ in iter_operations(document, log_skipped=False))
+        for stage, fn in make_stages(document).items():
+            durations, peak_bytes, output_bytes = measure(fn, repeat, min_time)
+            seconds = statistics.median(durations)
+            results.append(
+                {
+                    "document": name,
+                    "operations": operations,
+                    "stage": stage,
+                    "seconds": seconds,
+                    "min_seconds": min(durations),
+                    "spread": spread(durations),
+                    "runs": len(durations),
+                    "peak_bytes": peak_bytes,
+                    "output_bytes": output_bytes,
+                }
+            )
+            print(
+                f"{name:>16} {stage:>13} {seconds * 1e3:>11.2f} {peak_bytes / 1e6:>10.2f} {output_bytes / 1e3:>12.1f}"
+            )
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float, min_slowdown: float) -> bool:
+    """Print the ratios of the results to the baseline. Returns whether there are regressions."""
+    noise = {"min_seconds": min_slowdown, "peak_bytes": MIN_PEAK_GROWTH}
+    baseline_results = {(result["document"], result["stage"]): result for result in baseline["results"]}
+    regressions = []
+
+    print(f"\nCompared to the baseline of {baseline['meta']['timestamp']} (tolerance {tolerance:.0%}):")
+    print(f"{'document':>16} {'stage':>13} {'time':>8} {'peak':>8} {'output':>8} {'spread':>8}")
+    for result in results:
+        base = baseline_results.get((result["document"], result["stage"]))
+        if base is None:
+            print(f"{result['document']:>16} {result['stage']:>13} {'(not in the baseline)':>26}")
+            continue
+
+        ratios = {
+            field: result[field] / base[field] if base[field] else 1.0 for field in COMPARED_FIELDS + ["output_bytes"]
+        }
+        # Times have to grow past the run-to-run spread of the baseline too
+        tolerances = {"min_seconds": tolerance + base["spread"], "peak_bytes": tolerance}
+        flags = [
+            field
+            for field in COMPARED_FIELDS
+            if ratios[field] > 1.0 + tolerances[field] and result[field] - base[field] > noise[field]
+        ]
+        if flags:
+            regressions.append((result["document"], result["stage"], flags))
+        print(
+            f"{result['document']:>16} {result['stage']:>13} {ratios['min_seconds']:>7.2f}x "
+            f"{ratios['peak_bytes']:>7.2f}x {ratios['output_bytes']:>7.2f}x {base['spread']:>8.0%}"
+            f"{'  REGRESSION: ' + ', '.join(flags) if flags else ''}"
+        )
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s)")
+    return bool(regressions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--operations",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 10000],
+        help="Numbers of operations of the synthetic documents",
+    )
+    parser.add_argument("--depth", type=int, default=6, help="Nesting depth of the components of the deep document")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage at least")
+    parser.add_argument(
+        "--min-time", type=float, default=0.5, help="Seconds to keep running the fast stages for, at most"
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare the results to a baseline written by --output")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Slowdown tolerated by --compare")
+    parser.add_argument(
+        "--min-slowdown", type=float, default=0.001, help="Slowdown in seconds below which --compare ignores a stage"
+    )
+    args = parser.parse_args()
+    if args.compare and args.repeat < MIN_COMPARED_RUNS:
+        parser.error(f"--compare needs --repeat {MIN_COMPARED_RUNS} at least, to tell noise from regressions")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["repeat"] < MIN_COMPARED_RUNS or any("spread" not in r for r in baseline["results"]):
+            parser.error(
+                f"{args.compare} wasn't measured over {MIN_COMPARED_RUNS} runs per stage at least: write it again"
+            )
+
+    # The conversion warns about every operation it skips
+    logging.getLogger("fastapi_mcp").setLevel(logging.ERROR)
+
+    documents = [(f"ops-{n}", make_document(n)) for n in args.operations]
+    documents.append((f"deep-{args.depth}", make_document(100, depth=args.depth, width=5)))
+    swagger_simple = load_swagger_simple()
+    if swagger_simple is not None:
+        documents.append(("swagger_simple", swagger_simple))
+
+    results = run(documents, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "repeat": args.repeat,
+                        "min_time": args.min_time,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        if compare(results, baseline, args.tolerance, args.min_slowdown):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark of tool call latency with `dispatch="http"` (httpx + ASGITransport) versus `dispatch="direct"`.
+
+Each route shape is called through `FastApiMCP._execute_api_tool()`, so the numbers include argument routing and
+response formatting, but not the MCP transport.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_direct_dispatch.py [--calls 2000]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Depends, FastAPI, Header, HTTPException
+from pydantic import BaseModel
+
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.types import HTTPRequestInfo
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    price: float
+    tags: List[str] = []
+
+
+class ItemSummary(BaseModel):
+    id: int
+    name: str
+
+
+def require_user(authorization: Optional[str] = Header(None)) -> str:
+    if authorization != "Bearer benchmark":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return "benchmark-user"
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping", operation_id="ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/items/{item_id}", operation_id="path_param")
+    async def path_param(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/search", operation_id="query_params")
+    async def query_params(q: str, limit: int = 10, offset: int = 0, sort: Optional[str] = None):
+        return {"q": q, "limit": limit, "offset": offset, "sort": sort}
+
+    @app.post("/items", operation_id="json_body", response_model=ItemSummary)
+    async def json_body(item: Item):
+        return item
+
+    @app.get("/me/items", operation_id="dependency_auth")
+    async def dependency_auth(user: str = Depends(require_user)):
+        return {"user": user, "items": list(range(20))}
+
+    return app
+
+
+ROUTE_SHAPES: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("no parameters", "ping", {}),
+    ("path parameter", "path_param", {"item_id": 42}),
+    ("query parameters", "query_params", {"q": "shoes", "limit": 50, "offset": 100, "sort": "price"}),
+    ("JSON body + response_model", "json_body", {"id": 1, "name": "Shoe", "price": 9.5, "tags": ["a", "b"]}),
+    ("dependency + Authorization", "dependency_auth", {}),
+]
+
+REQUEST_INFO = HTTPRequestInfo(
+    method="POST",
+    path="/mcp/messages/",
+    headers={"authorization": "Bearer benchmark"},
+    cookies={},
+    query_params={},
+    body=None,
+)
+
+
+async def measure(mcp: FastApiMCP, tool_name: str, arguments: Dict[str, Any], calls: int) -> float:
+    for _ in range(min(calls, 100)):
+        await mcp._execute_api_tool(mcp._http_client, tool_name, arguments, mcp.operation_map, REQUEST_INFO)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await mcp._execute_api_tool(mcp._http_client, tool_name, arguments, mcp.operation_map, REQUEST_INFO)
+    return (time.perf_counter() - start) / calls
+
+
+async def run(calls: int) -> None:
+    app = make_app()
+    http_mcp = FastApiMCP(app, dispatch="http")
+    direct_mcp = FastApiMCP(app, dispatch="direct")
+
+    print(f"{'route shape':<30} {'http (us)':>12} {'direct (us)':>12} {'speedup':>9}")
+    for label, tool_name, arguments in ROUTE_SHAPES:
+        http_latency = await measure(http_mcp, tool_name, arguments, calls)
+        direct_latency = await measure(direct_mcp, tool_name, arguments, calls)
+        print(
+            f"{label:<30} {http_latency * 1e6:>12.1f} {direct_latency * 1e6:>12.1f} "
+            f"{http_latency / direct_latency:>8.2f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000, help="Number of calls per route shape and mode")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark of `tools/list` latency and allocations at 100, 1k and 10k tools.
+
+Compares:
+- the previous handler, that dumps every `Tool` model on every call (`mcp.server.lowlevel.Server.list_tools()`)
+- the pre-serialized catalog, in a single page (`tools_page_size=None`, the default)
+- the pre-serialized catalog, paginated (`tools_page_size=100`, first page)
+
+Each call is measured up to the JSON-RPC message the transport writes, i.e. the handler, the session's
+`model_dump()` of the result and the `model_dump_json()` of the message.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_list_tools.py [--tools 100 1000 10000] [--calls 20]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, List, Tuple
+
+import mcp.types as types
+from fastapi import FastAPI
+
+from fastapi_mcp import FastApiMCP
+
+
+DESCRIPTION = (
+    "Update an item of the catalog.\n\n"
+    + "Items are the products of a store, with a name, a price, a list of tags and an optional description. " * 10
+    + "\n\n### Responses:\n\n**200**: Successful Response (Success Response)\nContent-Type: application/json"
+)
+
+
+def make_tools(num_tools: int) -> List[types.Tool]:
+    return [
+        types.Tool(
+            name=f"update_item_{i}",
+            description=DESCRIPTION,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "item_id": {"type": "integer", "title": "item_id"},
+                    "name": {"type": "string", "title": "name"},
+                    "price": {"type": "number", "title": "price"},
+                    "tags": {"type": "array", "items": {"type": "string"}, "title": "tags", "default": []},
+                    "description": {"type": "string", "title": "description"},
+                    "q": {"type": "string", "title": "q"},
+                },
+                "required": ["item_id", "name", "price"],
+                "title": f"update_item_{i}Arguments",
+            },
+        )
+        for i in range(num_tools)
+    ]
+
+
+def send(result: Any) -> str:
+    """What the session and the transport do with a result."""
+    response = types.JSONRPCResponse(
+        jsonrpc="2.0", id=1, result=result.model_dump(by_alias=True, mode="json", exclude_none=True)
+    )
+    return types.JSONRPCMessage(response).model_dump_json(by_alias=True, exclude_none=True)
+
+
+async def measure(handler: Callable[[], Awaitable[Any]], calls: int) -> Tuple[float, float, int]:
+    """Returns the mean latency in seconds, the peak allocated MiB and the size of the message."""
+    message = send(await handler())  # warm up (e.g. build the cached pages)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        send(await handler())
+    latency = (time.perf_counter() - start) / calls
+
+    tracemalloc.start()
+    send(await handler())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return latency, peak / (1024 * 1024), len(message)
+
+
+async def run(tool_counts: List[int], calls: int) -> None:
+    request = types.ListToolsRequest(method="tools/list", params=None)
+
+    print(f"{'tools':>6} {'variant':<26} {'latency (ms)':>13} {'peak alloc (MiB)':>17} {'message (KiB)':>14}")
+    for num_tools in tool_counts:
+        tools = make_tools(num_tools)
+
+        async def previous_handler() -> Any:
+            return types.ServerResult(types.ListToolsResult(tools=tools))
+
+        variants: List[Tuple[str, Callable[[], Awaitable[Any]]]] = [("previous (dump per call)", previous_handler)]
+        for label, page_size in (("pre-serialized", None), ("paginated, 100/page", 100)):
+            mcp = FastApiMCP(FastAPI(), tools_page_size=page_size)
+            mcp.tools = tools
+            handler = mcp.server.request_handlers[types.ListToolsRequest]
+            variants.append((label, lambda handler=handler: handler(request)))
+
+        for label, variant in variants:
+            latency, peak, size = await measure(variant, calls)
+            print(f"{num_tools:>6} {label:<26} {latency * 1e3:>13.2f} {peak:>17.2f} {size / 1024:>14.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", type=int, nargs="+", default=[100, 1000, 10000], help="Numbers of tools to test")
+    parser.add_argument("--calls", type=int, default=20, help="Number of calls per variant")
+    args = parser.parse_args()
+    asyncio.run(run(args.tools, args.calls))
+
+
+if __name__ == "__main__":
+    main()
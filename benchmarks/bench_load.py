@@ -0,0 +1,502 @@
+"""
+Load generator for MCP servers mounted with `FastApiMCP.mount()`, to size them.
+
+Simulates `--clients` concurrent MCP clients. Each one opens the SSE stream and initializes its session; once all
+of them are connected, they run a mix of `tools/list` and `tools/call` requests for `--duration` seconds, each
+waiting for the response to a request before sending the next one.
+
+Modes:
+- `inprocess`: the clients call the app through ASGI, in the same process and event loop. `httpx.ASGITransport`
+  buffers whole responses, which doesn't work for SSE streams, so a streaming ASGI transport is used instead
+- `socket`: the app is served by uvicorn in a subprocess, on a local socket
+
+The report has the throughput, the latency percentiles and the error rate of each kind of request, and the memory
+growth of the server per session: its RSS once the sessions are open, after the traffic, and once they're closed,
+compared to its RSS before they connected. In `inprocess` mode, that's the RSS of the whole process, clients
+included. RSS is read from `/proc`, so it's only reported on Linux.
+
+By default, the load goes to a demo app with a few operations (see `create_app()`). Pass your own app with
+`--app module:attribute` (the MCP server must be mounted on it, at `--mount-path`), along with the tools to call
+with `--call`.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_load.py [--mode inprocess|socket] [--clients 50] [--duration 10]
+        [--list-ratio 0.1] [--latency 0] [--app module:attribute] [--mount-path /mcp]
+        [--call 'tool={"argument": 1}' ...] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import anyio
+import httpx
+from fastapi import FastAPI
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from pydantic import BaseModel
+
+from fastapi_mcp import FastApiMCP
+
+
+# Tools of the demo app, and their arguments
+DEFAULT_CALLS = [
+    ("get_item", {"item_id": 1}),
+    ("search_items", {"q": "item", "limit": 20}),
+    ("create_item", {"id": 1, "name": "item", "price": 9.99, "tags": ["a", "b"]}),
+]
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    price: float
+    tags: List[str] = []
+
+
+def create_app(latency: Optional[float] = None) -> FastAPI:
+    """The demo app. Its endpoints wait for `latency` seconds (or `$BENCH_LOAD_LATENCY`) to simulate a backend."""
+    if latency is None:
+        latency = float(os.environ.get("BENCH_LOAD_LATENCY", "0"))
+
+    app = FastAPI()
+
+    async def backend() -> None:
+        if latency:
+            await asyncio.sleep(latency)
+
+    @app.get("/items/{item_id}", operation_id="get_item", response_model=Item)
+    async def get_item(item_id: int):
+        await backend()
+        return Item(id=item_id, name=f"item {item_id}", price=9.99, tags=["a", "b"])
+
+    @app.get("/items", operation_id="search_items", response_model=List[Item])
+    async def search_items(q: str = "", limit: int = 10):
+        await backend()
+        return [Item(id=i, name=f"{q} {i}", price=float(i)) for i in range(limit)]
+
+    @app.post("/items", operation_id="create_item", response_model=Item)
+    async def create_item(item: Item):
+        await backend()
+        return item
+
+    FastApiMCP(app).mount()
+    return app
+
+
+def load_app(spec: str) -> FastAPI:
+    module_name, _, attribute = spec.partition(":")
+    app = getattr(importlib.import_module(module_name), attribute or "app")
+    return app() if callable(app) and not isinstance(app, FastAPI) else app
+
+
+class _StreamingResponseBody(httpx.AsyncByteStream):
+    def __init__(self, chunks: Any, disconnect: anyio.Event, app_task: "asyncio.Task[None]"):
+        self._chunks = chunks
+        self._disconnect = disconnect
+        self._app_task = app_task
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            yield chunk
+
+    async def aclose(self) -> None:
+        # Tell the app the client went away, as a server would, and give it a moment to wind down
+        self._disconnect.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._app_task), timeout=1.0)
+        except Exception:
+            self._app_task.cancel()
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    An httpx transport that calls an ASGI app in-process, and streams its responses as they're sent, unlike
+    `httpx.ASGITransport`, which waits for the whole response. The app runs in a task of its own, until the
+    response is closed, when it receives an `http.disconnect`.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        body_sent = False
+        disconnect = anyio.Event()
+        started = anyio.Event()
+        status_code = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        send_chunks, receive_chunks = anyio.create_memory_object_stream[bytes](math.inf)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": unquote(request.url.path),
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "server": (request.url.host, request.url.port or 80),
+            "client": ("127.0.0.1", 0),
+        }
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = message.get("headers", [])
+                started.set()
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    await send_chunks.send(message["body"])
+                if not message.get("more_body", False):
+                    send_chunks.close()
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                send_chunks.close()
+                started.set()
+
+        app_task = asyncio.create_task(run_app())
+        await started.wait()
+        return httpx.Response(
+            status_code,
+            headers=response_headers,
+            stream=_StreamingResponseBody(receive_chunks, disconnect, app_task),
+            request=request,
+        )
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+def rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """The resident set size of a process (this one by default), or `None` where `/proc` isn't available."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, kind: str, latency: float, error: bool) -> None:
+        self.latencies.setdefault(kind, []).append(latency)
+        if error:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+        else:
+            self.errors.setdefault(kind, 0)
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for kind, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            summary[kind] = {
+                "requests": len(latencies),
+                "errors": self.errors.get(kind, 0),
+                "error_rate": self.errors.get(kind, 0) / len(latencies),
+                "throughput": len(latencies) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(latencies, 0.50) * 1e3,
+                "p95_ms": percentile(latencies, 0.95) * 1e3,
+                "p99_ms": percentile(latencies, 0.99) * 1e3,
+            }
+        return summary
+
+
+class LoadTest:
+    def __init__(
+        self,
+        url: str,
+        clients: int,
+        duration: float,
+        list_ratio: float,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        app: Optional[Any] = None,
+        server_pid: Optional[int] = None,
+    ):
+        self.url = url
+        self.clients = clients
+        self.duration = duration
+        self.list_ratio = list_ratio
+        self.calls = calls
+        self.app = app
+        self.server_pid = server_pid
+        self.stats = Stats()
+        self.memory: Dict[str, Optional[int]] = {}
+        self._connected = 0
+        self._all_connected = asyncio.Event()
+        self._start = asyncio.Event()
+        self._traffic_done = asyncio.Event()
+        self._finished = 0
+        self._all_finished = asyncio.Event()
+        self._deadline = 0.0
+
+    def _http_client_factory(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        auth: Optional[httpx.Auth] = None,
+    ) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=StreamingASGITransport(self.app),
+            headers=headers,
+            timeout=timeout or httpx.Timeout(30.0),
+            auth=auth,
+            follow_redirects=True,
+        )
+
+    async def _client(self, index: int) -> None:
+        rng = random.Random(index)
+        kwargs: Dict[str, Any] = {"sse_read_timeout": self.duration + 60}
+        if self.app is not None:
+            kwargs["httpx_client_factory"] = self._http_client_factory
+
+        connected = False
+        try:
+            start = time.perf_counter()
+            async with sse_client(self.url, **kwargs) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    self.stats.record("connect", time.perf_counter() - start, False)
+                    connected = True
+                    self._mark_connected()
+                    await self._start.wait()
+                    await self._run_traffic(session, rng)
+                    self._mark_finished()
+                    # Keep the session open until every client is done, to measure the memory of all of them
+                    await self._traffic_done.wait()
+        except Exception as e:
+            if not connected:
+                self.stats.record("connect", time.perf_counter() - start, True)
+                self._mark_connected()
+            else:
+                print(f"Client {index} failed: {e!r}", file=sys.stderr)
+            self._mark_finished()
+
+    async def _run_traffic(self, session: ClientSession, rng: random.Random) -> None:
+        while time.perf_counter() < self._deadline:
+            start = time.perf_counter()
+            if rng.random() < self.list_ratio:
+                kind = "tools/list"
+                try:
+                    await session.list_tools()
+                    error = False
+                except Exception:
+                    error = True
+            else:
+                tool_name, arguments = rng.choice(self.calls)
+                kind = f"tools/call {tool_name}"
+                try:
+                    error = (await session.call_tool(tool_name, arguments)).isError
+                except Exception:
+                    error = True
+            self.stats.record(kind, time.perf_counter() - start, error)
+
+    def _mark_connected(self) -> None:
+        self._connected += 1
+        if self._connected == self.clients:
+            self._all_connected.set()
+
+    def _mark_finished(self) -> None:
+        self._finished += 1
+        if self._finished == self.clients:
+            self._all_finished.set()
+
+    async def run(self) -> Dict[str, Any]:
+        self.memory["before"] = rss_bytes(self.server_pid)
+        tasks = [asyncio.create_task(self._client(i)) for i in range(self.clients)]
+
+        await self._all_connected.wait()
+        self.memory["sessions_open"] = rss_bytes(self.server_pid)
+
+        start = time.perf_counter()
+        self._deadline = start + self.duration
+        self._start.set()
+        await self._all_finished.wait()
+        elapsed = time.perf_counter() - start
+        self.memory["after_traffic"] = rss_bytes(self.server_pid)
+
+        self._traffic_done.set()
+        await asyncio.gather(*tasks)
+        # Let the server notice the disconnections and release the sessions
+        await asyncio.sleep(0.5)
+        self.memory["sessions_closed"] = rss_bytes(self.server_pid)
+
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        summary = self.stats.summary(elapsed)
+        # Clients connect before the traffic starts
+        summary.get("connect", {}).pop("throughput", None)
+        traffic = [kind for kind in summary if kind != "connect"]
+        requests = sum(summary[kind]["requests"] for kind in traffic)
+        errors = sum(summary[kind]["errors"] for kind in traffic)
+
+        memory: Dict[str, Optional[float]] = {f"{stage}_bytes": value for stage, value in self.memory.items()}
+        before = self.memory.get("before")
+        for stage in ("sessions_open", "after_traffic", "sessions_closed"):
+            value = self.memory.get(stage)
+            growth = (value - before) / self.clients if value is not None and before is not None else None
+            memory[f"{stage}_growth_per_session_bytes"] = growth
+
+        return {
+            "clients": self.clients,
+            "duration": elapsed,
+            "throughput": requests / elapsed if elapsed else 0.0,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "by_kind": summary,
+            "memory": memory,
+        }
+
+
+def print_report(report: Dict[str, Any], mode: str) -> None:
+    print(
+        f"\n{report['clients']} clients, {report['duration']:.1f}s: {report['requests']} requests, "
+        f"{report['throughput']:.0f} req/s, {report['error_rate']:.2%} errors"
+    )
+    print(f"\n{'request':>28} {'count':>8} {'req/s':>8} {'errors':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for kind, stats in report["by_kind"].items():
+        throughput = f"{stats['throughput']:.0f}" if "throughput" in stats else "-"
+        print(
+            f"{kind:>28} {stats['requests']:>8} {throughput:>8} {stats['error_rate']:>8.2%} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+
+    memory = report["memory"]
+    if memory.get("before_bytes") is None:
+        print("\nMemory: not available on this platform")
+        return
+    scope = "process, clients included" if mode == "inprocess" else "server process"
+    print(f"\nMemory ({scope}): RSS {memory['before_bytes'] / 1e6:.1f} MB before the sessions")
+    for stage, label in (
+        ("sessions_open", "with the sessions open"),
+        ("after_traffic", "after the traffic"),
+        ("sessions_closed", "with the sessions closed"),
+    ):
+        print(
+            f"  {label:>26}: {memory[f'{stage}_bytes'] / 1e6:8.1f} MB, "
+            f"{memory[f'{stage}_growth_per_session_bytes'] / 1e3:+8.1f} KB per session"
+        )
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_server(app_spec: Optional[str], latency: float) -> AsyncIterator[Tuple[str, int]]:
+    """Serve the app with uvicorn in a subprocess. Yields its base URL and PID."""
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "--port", str(port), "--log-level", "warning"]
+    if app_spec is None:
+        command += ["--app-dir", os.path.dirname(os.path.abspath(__file__)), "--factory", "bench_load:create_app"]
+    else:
+        command.append(app_spec)
+
+    env = dict(os.environ, BENCH_LOAD_LATENCY=str(latency))
+    process = subprocess.Popen(command, env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"The server exited with status {process.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("The server didn't start in time")
+                await asyncio.sleep(0.1)
+        yield f"http://127.0.0.1:{port}", process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    calls = [(name, json.loads(arguments or "{}")) for name, _, arguments in (c.partition("=") for c in args.call)]
+    if not calls:
+        if args.app is not None:
+            raise SystemExit("Pass the tools to call with --call when using --app")
+        calls = DEFAULT_CALLS
+
+    options = dict(clients=args.clients, duration=args.duration, list_ratio=args.list_ratio, calls=calls)
+
+    if args.mode == "socket":
+        async with uvicorn_server(args.app, args.latency) as (base_url, pid):
+            load_test = LoadTest(f"{base_url}{args.mount_path}", server_pid=pid, **options)  # type: ignore[arg-type]
+            return await load_test.run()
+
+    app = create_app(args.latency) if args.app is None else load_app(args.app)
+    async with app.router.lifespan_context(app):
+        load_test = LoadTest(f"http://testserver{args.mount_path}", app=app, **options)  # type: ignore[arg-type]
+        return await load_test.run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "socket"], default="inprocess")
+    parser.add_argument("--clients", type=int, default=50, help="Number of concurrent MCP clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of traffic, once all are connected")
+    parser.add_argument("--list-ratio", type=float, default=0.1, help="Fraction of the requests that are tools/list")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each endpoint of the demo app waits")
+    parser.add_argument("--app", help="The app to load, as module:attribute (a FastAPI app or a factory)")
+    parser.add_argument("--mount-path", default="/mcp", help="Where the MCP server is mounted on the app")
+    parser.add_argument(
+        "--call",
+        action="append",
+        default=[],
+        help="A tool to call, as name=JSON arguments. Repeat it for a mix of calls",
+    )
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report, args.mode)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(report, mode=args.mode), f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
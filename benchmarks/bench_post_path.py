@@ -0,0 +1,225 @@
+"""
+Benchmark of the POST path of the SSE transport: the messages per second a session gets through, from the POST of
+a message to its response, and the time spent in the POST handler itself. The requests have the headers and cookies
+of a browser-like client.
+
+Kinds of messages:
+- `tools/call`: a call of a tool of the app, dispatched in-process (`dispatch="direct"`), so that the MCP side
+  isn't drowned out by HTTP
+- `resources/list`: a request that's not a tool call, handled right away by the server
+
+The POST handler of the transport is called directly, with requests built from ASGI scopes, and hands the messages
+to a server session running on memory streams: the numbers leave out the HTTP server and the SSE stream, to show the
+cost of the handling of each message by the transport and the MCP server. `--capture full` captures the whole HTTP
+request for handlers (headers, cookies, query params and body), instead of only what tool calls need.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_post_path.py [--messages 5000] [--concurrency 16] [--capture default|full]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+import anyio
+from fastapi import FastAPI, Request
+
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.transport.sse import FastApiSseTransport
+
+
+HEADERS = {
+    "host": "mcp.example.com",
+    "authorization": "Bearer " + "eyJhbGciOiJSUzI1NiJ9." + "a" * 700 + ".signature",
+    "cookie": "; ".join(f"cookie_{i}={'v' * 120}" for i in range(12)),
+    "user-agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "accept": "application/json, text/event-stream",
+    "accept-language": "en-US,en;q=0.9",
+    "accept-encoding": "gzip, deflate, br",
+    "content-type": "application/json",
+    "x-forwarded-for": "203.0.113.7, 198.51.100.2",
+    "x-forwarded-proto": "https",
+    "x-request-id": "5f0c6a9e-2b7d-4c1e-9a8f-0d3e2c1b4a59",
+    "x-client-version": "1.42.0",
+    "origin": "https://app.example.com",
+    "referer": "https://app.example.com/workspace/assistant",
+}
+
+MESSAGES: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "tools/call": lambda i: {
+        "jsonrpc": "2.0",
+        "id": i,
+        "method": "tools/call",
+        "params": {"name": "get_item", "arguments": {"item_id": i}},
+    },
+    "resources/list": lambda i: {"jsonrpc": "2.0", "id": i, "method": "resources/list", "params": {}},
+}
+
+
+def create_mcp(capture: str) -> Tuple[FastApiMCP, Dict[str, Any]]:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: int):
+        return {"id": item_id, "name": f"item {item_id}"}
+
+    transport_options: Dict[str, Any] = {}
+    if capture == "full":
+        from fastapi_mcp import RequestCaptureConfig
+
+        transport_options["request_capture"] = RequestCaptureConfig(
+            headers=None, cookies=True, query_params=True, body=True
+        )
+    return FastApiMCP(app, dispatch="direct"), transport_options
+
+
+def build_request(session_id: str, body: bytes) -> Request:
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "server": ("mcp.example.com", 443),
+        "client": ("203.0.113.7", 52000),
+        "root_path": "",
+        "path": "/mcp/messages/",
+        "raw_path": b"/mcp/messages/",
+        "query_string": f"session_id={session_id}".encode(),
+        "headers": [(name.encode(), value.encode()) for name, value in HEADERS.items()],
+    }
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(scope, receive)
+
+
+class Session:
+    """A session of the transport, with the MCP server running on memory streams instead of an SSE stream."""
+
+    def __init__(self, mcp: FastApiMCP, transport: FastApiSseTransport):
+        self.mcp = mcp
+        self.transport = transport
+        self.session_id = uuid4()
+        self.pending: Dict[Any, "asyncio.Future[Dict[str, Any]]"] = {}
+
+    async def run(self) -> None:
+        read_stream_writer, read_stream = anyio.create_memory_object_stream[Any](0)
+        write_stream, write_stream_reader = anyio.create_memory_object_stream[Any](0)
+        self.transport._read_stream_writers[self.session_id] = read_stream_writer
+
+        async def read_responses() -> None:
+            async for session_message in write_stream_reader:
+                message = session_message.message.model_dump(by_alias=True, exclude_none=True)
+                future = self.pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(read_responses)
+            await self.mcp.server.run(
+                read_stream,
+                write_stream,
+                self.mcp.server.create_initialization_options(notification_options=None, experimental_capabilities={}),
+            )
+
+    async def request(self, message: Dict[str, Any], post_durations: List[float]) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        if "id" in message:
+            self.pending[message["id"]] = future
+
+        request = build_request(self.session_id.hex, json.dumps(message).encode())
+        start = time.perf_counter()
+        response = await self.transport.handle_fastapi_post_message(request)
+        post_durations.append(time.perf_counter() - start)
+        if response.status_code != 202:
+            raise RuntimeError(f"The POST failed with status {response.status_code}")
+        # Sends the message to the session, as after the response
+        if response.background is not None:
+            await response.background()
+
+        if "id" not in message:
+            return {}
+        return await future
+
+    async def initialize(self) -> None:
+        initialize = {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "bench", "version": "1.0"},
+            },
+        }
+        await self.request(initialize, [])
+        await self.request({"jsonrpc": "2.0", "method": "notifications/initialized"}, [])
+
+
+async def measure(session: Session, kind: str, messages: int, concurrency: int, first_id: int) -> Dict[str, float]:
+    post_durations: List[float] = []
+    ids = iter(range(first_id, first_id + messages))
+
+    async def sender() -> None:
+        for request_id in ids:
+            response = await session.request(MESSAGES[kind](request_id), post_durations)
+            if "error" in response or response.get("result", {}).get("isError"):
+                raise RuntimeError(f"{kind} failed: {response}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "messages_per_second": messages / elapsed,
+        "post_mean_us": statistics.mean(post_durations) * 1e6,
+        "post_p50_us": statistics.median(post_durations) * 1e6,
+    }
+
+
+async def run(messages: int, concurrency: int, capture: str) -> None:
+    mcp, transport_options = create_mcp(capture)
+    transport = FastApiSseTransport("/mcp/messages/", **transport_options)
+    session = Session(mcp, transport)
+
+    server = asyncio.create_task(session.run())
+    await asyncio.sleep(0)
+    await session.initialize()
+
+    request_id = 1
+    for kind in MESSAGES:
+        # Warm up
+        await measure(session, kind, min(messages, 500), concurrency, request_id)
+        request_id += messages
+        result = await measure(session, kind, messages, concurrency, request_id)
+        request_id += messages
+        print(
+            f"{kind:>15}: {result['messages_per_second']:7.0f} messages/s   "
+            f"POST handler mean {result['post_mean_us']:6.1f} us   p50 {result['post_p50_us']:6.1f} us"
+        )
+
+    server.cancel()
+    await asyncio.gather(server, return_exceptions=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000, help="Messages sent per kind")
+    parser.add_argument("--concurrency", type=int, default=16, help="Messages in flight at once")
+    parser.add_argument(
+        "--capture",
+        choices=("default", "full"),
+        default="default",
+        help="What of the HTTP requests is captured for handlers",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.concurrency, args.capture))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Micro-benchmark for building upstream requests from tool arguments.
+
+Compares the previous per-call approach (three passes over the operation's parameters, `str.replace` per path
+parameter and a method lookup per call) against the precompiled `RequestPlan` used by `FastApiMCP` now.
+
+The client is a no-op stub, so only the argument routing and dispatch overhead is measured.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_request_plan.py [--params 32] [--calls 200000]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from fastapi_mcp.execution.plan import compile_request_plan
+
+
+class StubResponse:
+    status_code = 200
+
+
+class StubClient:
+    async def _send(self, path, params=None, headers=None, json=None):
+        return StubResponse()
+
+    get = post = put = delete = patch = _send
+
+
+def make_operation(num_params: int) -> Dict[str, Any]:
+    parameters: List[Dict[str, Any]] = [
+        {"name": "tenant_id", "in": "path", "required": True, "schema": {"type": "string"}},
+        {"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+    ]
+    for i in range(num_params - 4):
+        parameters.append({"name": f"filter_{i}", "in": "query", "schema": {"type": "string"}})
+    parameters.append({"name": "x-request-source", "in": "header", "schema": {"type": "string"}})
+    parameters.append({"name": "x-client-version", "in": "header", "schema": {"type": "string"}})
+    return {
+        "path": "/tenants/{tenant_id}/items/{item_id}",
+        "method": "post",
+        "parameters": parameters,
+        "request_body": {},
+    }
+
+
+def make_arguments(operation: Dict[str, Any]) -> Dict[str, Any]:
+    arguments: Dict[str, Any] = {param["name"]: f"value-{i}" for i, param in enumerate(operation["parameters"])}
+    arguments["item_id"] = 42
+    arguments["name"] = "body field"
+    arguments["count"] = 3
+    return arguments
+
+
+async def legacy_call(client: StubClient, operation: Dict[str, Any], arguments: Dict[str, Any]) -> Any:
+    """The argument routing and dispatch of `_execute_api_tool()` before request plans were introduced."""
+    path: str = operation["path"]
+    method: str = operation["method"]
+    parameters: List[Dict[str, Any]] = operation.get("parameters", [])
+    arguments = arguments.copy() if arguments else {}
+
+    for param in parameters:
+        if param.get("in") == "path" and param.get("name") in arguments:
+            param_name = param.get("name", None)
+            path = path.replace(f"{{{param_name}}}", str(arguments.pop(param_name)))
+
+    query = {}
+    for param in parameters:
+        if param.get("in") == "query" and param.get("name") in arguments:
+            param_name = param.get("name", None)
+            query[param_name] = arguments.pop(param_name)
+
+    headers = {}
+    for param in parameters:
+        if param.get("in") == "header" and param.get("name") in arguments:
+            param_name = param.get("name", None)
+            headers[param_name] = arguments.pop(param_name)
+
+    body = arguments if arguments else None
+
+    if method.lower() == "get":
+        return await client.get(path, params=query, headers=headers)
+    elif method.lower() == "post":
+        return await client.post(path, params=query, headers=headers, json=body)
+    elif method.lower() == "put":
+        return await client.put(path, params=query, headers=headers, json=body)
+    elif method.lower() == "delete":
+        return await client.delete(path, params=query, headers=headers)
+    elif method.lower() == "patch":
+        return await client.patch(path, params=query, headers=headers, json=body)
+    raise ValueError(f"Unsupported HTTP method: {method}")
+
+
+async def planned_call(plan, arguments: Dict[str, Any]) -> Any:
+    """The argument routing and dispatch of `_execute_api_tool()` with a precompiled `RequestPlan`."""
+    path_values, query, headers, body = plan.route_arguments(arguments)
+    path = plan.render_path(path_values)
+    if plan.sends_body:
+        return await plan.client_method(path, params=query, headers=headers, json=body)
+    return await plan.client_method(path, params=query, headers=headers)
+
+
+async def run(num_params: int, calls: int) -> None:
+    client = StubClient()
+    operation = make_operation(num_params)
+    arguments = make_arguments(operation)
+    plan = compile_request_plan("update_item", operation, client)  # type: ignore[arg-type]
+
+    # Warm up both paths
+    for _ in range(1000):
+        await legacy_call(client, operation, arguments)
+        await planned_call(plan, arguments)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await legacy_call(client, operation, arguments)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await planned_call(plan, arguments)
+    planned_elapsed = time.perf_counter() - start
+
+    print(f"parameters per operation: {len(operation['parameters'])}, calls: {calls}")
+    print(f"  before (per-call parameter scans): {calls / legacy_elapsed:>12,.0f} calls/s")
+    print(f"  after  (precompiled request plan): {calls / planned_elapsed:>12,.0f} calls/s")
+    print(f"  speedup: {legacy_elapsed / planned_elapsed:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--params", type=int, default=32, help="Number of parameters per operation")
+    parser.add_argument("--calls", type=int, default=200_000, help="Number of calls per variant")
+    args = parser.parse_args()
+    asyncio.run(run(args.params, args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark of `FastApiMCP` startup time against the number of operations of the app, with eager conversion of
+all operations to tools (the default) versus `lazy_tools=True`.
+
+For the lazy mode, the time of the first call of one tool and of `warm()` (converting everything) are also
+reported. Every measurement uses a freshly built app, so no conversion work is shared between them.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_startup.py [--operations 100 500 1000 2000]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel, create_model
+
+from fastapi_mcp import FastApiMCP
+
+
+def make_app(num_operations: int) -> FastAPI:
+    app = FastAPI()
+
+    for i in range(num_operations):
+        item_model = create_model(
+            f"Item{i}",
+            name=(str, ...),
+            price=(float, ...),
+            tags=(List[str], []),
+            description=(Optional[str], None),
+        )
+        summary_model = create_model(f"ItemSummary{i}", __base__=BaseModel, id=(int, ...), name=(str, ...))
+
+        def endpoint(
+            item_id: int,
+            item: item_model,  # type: ignore[valid-type]
+            q: Optional[str] = None,
+            limit: int = 10,
+        ):
+            return {"id": item_id, "name": "item"}
+
+        app.put(
+            f"/resources{i}/items/{{item_id}}",
+            operation_id=f"update_item_{i}",
+            response_model=summary_model,
+            tags=[f"group{i % 20}"],
+            summary=f"Update an item of resource {i}",
+        )(endpoint)
+
+    return app
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(operation_counts: List[int]) -> None:
+    print(
+        f"{'operations':>10} {'eager (s)':>10} {'lazy (s)':>10} {'speedup':>8} {'1st call (ms)':>14} {'warm() (s)':>11}"
+    )
+    for num_operations in operation_counts:
+        eager_startup = timed(lambda: FastApiMCP(make_app(num_operations)))
+
+        app = make_app(num_operations)
+        mcp: Optional[FastApiMCP] = None
+
+        def create_lazy() -> None:
+            nonlocal mcp
+            mcp = FastApiMCP(app, lazy_tools=True)
+
+        lazy_startup = timed(create_lazy)
+        assert mcp is not None
+        lazy_mcp = mcp
+
+        arguments = {"item_id": 1, "name": "item", "price": 1.0}
+        first_call = timed(
+            lambda: asyncio.run(
+                lazy_mcp._execute_api_tool(lazy_mcp._http_client, "update_item_0", arguments, lazy_mcp.operation_map)
+            )
+        )
+        warm = timed(lazy_mcp.warm)
+
+        print(
+            f"{num_operations:>10} {eager_startup:>10.3f} {lazy_startup:>10.3f} {eager_startup / lazy_startup:>7.0f}x "
+            f"{first_call * 1e3:>14.1f} {warm:>11.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--operations", type=int, nargs="+", default=[100, 500, 1000, 2000], help="Numbers of operations to test"
+    )
+    args = parser.parse_args()
+    run(args.operations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark of MCP round-trip latency over the SSE transport (`mount(transport="sse")`) versus the streamable HTTP
+transport (`mount(transport="http")`).
+
+The app is served by uvicorn in a subprocess, with both transports mounted on the same `FastApiMCP`. For each
+transport, the official MCP clients (`sse_client` and `streamablehttp_client`) measure:
+- the time to open a session and initialize it
+- the round trip of `tools/call` and `tools/list`, one request at a time
+- the throughput of `--clients` sessions sending requests concurrently
+
+With SSE, a response travels back over the stream of the session, while the POST that carried the request is only
+answered with a 202. With streamable HTTP, it's in the body of the POST.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_transports.py [--requests 500] [--sessions 20] [--clients 20]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from fastapi import FastAPI
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from fastapi_mcp import FastApiMCP
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: int):
+        return {"id": item_id, "name": f"item {item_id}", "price": 9.99, "tags": ["a", "b"]}
+
+    @app.get("/items", operation_id="search_items")
+    async def search_items(q: str = "", limit: int = 10):
+        return [{"id": i, "name": f"{q} {i}"} for i in range(limit)]
+
+    mcp = FastApiMCP(app)
+    mcp.mount(mount_path="/sse", transport="sse")
+    mcp.mount(mount_path="/http", transport="http")
+    return app
+
+
+@asynccontextmanager
+async def open_session(base_url: str, transport: str) -> AsyncIterator[ClientSession]:
+    if transport == "sse":
+        async with sse_client(f"{base_url}/sse") as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+    else:
+        async with streamablehttp_client(f"{base_url}/http") as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+
+
+def summarize(latencies: List[float]) -> str:
+    latencies = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1e3
+
+    return (
+        f"mean {statistics.mean(latencies) * 1e3:7.2f}  p50 {percentile(0.50):7.2f}  "
+        f"p95 {percentile(0.95):7.2f}  p99 {percentile(0.99):7.2f} ms"
+    )
+
+
+async def measure_sessions(base_url: str, transport: str, sessions: int) -> List[float]:
+    latencies = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        async with open_session(base_url, transport):
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def measure_round_trips(
+    session: ClientSession, request: Callable[[ClientSession], Any], requests: int
+) -> List[float]:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await request(session)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def measure_throughput(base_url: str, transport: str, clients: int, requests: int) -> float:
+    async def client() -> None:
+        async with open_session(base_url, transport) as session:
+            await ready.wait()
+            for _ in range(requests // clients):
+                await session.call_tool("get_item", {"item_id": 1})
+            # Keep the session open until all the clients are done
+            done.append(None)
+            while len(done) < clients:
+                await asyncio.sleep(0.01)
+
+    ready = asyncio.Event()
+    done: List[None] = []
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    # Let every client connect before starting
+    await asyncio.sleep(0.5 + clients * 0.02)
+    start = time.perf_counter()
+    ready.set()
+    while len(done) < clients:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    return (requests // clients) * clients / elapsed
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def serve() -> AsyncIterator[str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--app-dir",
+            os.path.dirname(os.path.abspath(__file__)),
+            "--factory",
+            "bench_transports:create_app",
+        ]
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"The server exited with status {process.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    break
+            except OSError:
+                await asyncio.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def run(requests: int, sessions: int, clients: int) -> None:
+    requests_by_name: Dict[str, Callable[[ClientSession], Any]] = {
+        "tools/call": lambda session: session.call_tool("get_item", {"item_id": 1}),
+        "tools/list": lambda session: session.list_tools(),
+    }
+
+    async with serve() as base_url:
+        for transport in ("sse", "http"):
+            print(f"\n{transport}:")
+            # Warm up the server and the client
+            await measure_sessions(base_url, transport, 3)
+
+            print(f"  {'open + initialize':>18}: {summarize(await measure_sessions(base_url, transport, sessions))}")
+            async with open_session(base_url, transport) as session:
+                for name, request in requests_by_name.items():
+                    await measure_round_trips(session, request, 20)
+                    latencies = await measure_round_trips(session, request, requests)
+                    print(f"  {name:>18}: {summarize(latencies)}")
+
+            throughput = await measure_throughput(base_url, transport, clients, requests)
+            print(f"  {f'{clients} clients':>18}: {throughput:7.0f} tools/call per second")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per measurement")
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions opened to measure initialization")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients of the throughput measurement")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.sessions, args.clients))
+
+
+if __name__ == "__main__":
+    main()
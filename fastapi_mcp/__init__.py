@@ -12,12 +12,35 @@ except Exception:  # pragma: no cover
     # Fallback for local development
     __version__ = "0.0.0.dev0"  # pragma: no cover
 
+from .profiling import SlowCallProfiler
 from .server import FastApiMCP
-from .types import AuthConfig, OAuthMetadata
+from .sessions import FileSessionStore, InMemorySessionStore, SessionStore
+from .tracing import InMemorySpanExporter, SpanExporter, Tracer
+from .types import (
+    AuthConfig,
+    CacheConfig,
+    ConcurrencyConfig,
+    OAuthMetadata,
+    RequestCaptureConfig,
+    ToolVisibility,
+    UpstreamConfig,
+)
 
 
 __all__ = [
     "FastApiMCP",
     "AuthConfig",
+    "CacheConfig",
+    "ConcurrencyConfig",
+    "RequestCaptureConfig",
     "OAuthMetadata",
+    "ToolVisibility",
+    "UpstreamConfig",
+    "Tracer",
+    "SpanExporter",
+    "InMemorySpanExporter",
+    "SlowCallProfiler",
+    "SessionStore",
+    "InMemorySessionStore",
+    "FileSessionStore",
 ]
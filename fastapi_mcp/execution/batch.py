@@ -0,0 +1,119 @@
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+import anyio
+import mcp.types as types
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_TOOL_NAME = "batch_call"
+
+ToolContent = Union[types.TextContent, types.ImageContent, types.EmbeddedResource]
+
+
+def make_batch_tool(max_items: int) -> types.Tool:
+    """The definition of the built-in batch tool."""
+    return types.Tool(
+        name=BATCH_TOOL_NAME,
+        description=(
+            "Call several of the other tools of this server at once, concurrently, in a single request.\n\n"
+            "Use it for independent calls, e.g. looking up several items. The result is a JSON list with one entry "
+            'per call, in the order of `calls`: `{"tool": ..., "isError": false, "content": [...]}` on '
+            'success, or `{"tool": ..., "isError": true, "error": "..."}` on failure. A failed call does '
+            "not affect the other ones."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "calls": {
+                    "type": "array",
+                    "description": "The tool calls to make",
+                    "minItems": 1,
+                    "maxItems": max_items,
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool": {"type": "string", "description": "The name of the tool to call"},
+                            "arguments": {"type": "object", "description": "The arguments of the tool"},
+                        },
+                        "required": ["tool"],
+                    },
+                }
+            },
+            "required": ["calls"],
+        },
+    )
+
+
+def parse_batch_calls(arguments: Dict[str, Any], max_items: int) -> List[Dict[str, Any]]:
+    """
+    Validate the arguments of a batch tool call.
+
+    Returns:
+        The calls, each with a `tool` name and an `arguments` dict
+    """
+    calls = arguments.get("calls")
+    if not isinstance(calls, list) or not calls:
+        raise ValueError("'calls' must be a non-empty list of {tool, arguments} items")
+    if len(calls) > max_items:
+        raise ValueError(f"Too many calls in one batch: {len(calls)} (the maximum is {max_items})")
+
+    parsed: List[Dict[str, Any]] = []
+    for index, call in enumerate(calls):
+        if not isinstance(call, dict) or not isinstance(call.get("tool"), str):
+            raise ValueError(f"Invalid call at index {index}: expected an object with a 'tool' name")
+
+        call_arguments = call.get("arguments")
+        if call_arguments is None:
+            call_arguments = {}
+        elif not isinstance(call_arguments, dict):
+            raise ValueError(f"Invalid call at index {index}: 'arguments' must be an object")
+
+        if call["tool"] == BATCH_TOOL_NAME:
+            raise ValueError(f"Invalid call at index {index}: batches can't be nested")
+
+        parsed.append({"tool": call["tool"], "arguments": call_arguments})
+    return parsed
+
+
+async def run_batch(
+    calls: Sequence[Dict[str, Any]],
+    execute: Callable[[str, Dict[str, Any]], Awaitable[List[ToolContent]]],
+    max_parallelism: int,
+) -> List[Dict[str, Any]]:
+    """
+    Run the calls of a batch concurrently, with at most `max_parallelism` of them in flight at once.
+
+    Every call gets an entry in the returned list, in the same order as `calls`: errors are captured per call
+    instead of failing the whole batch.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+    semaphore = anyio.Semaphore(max_parallelism)
+
+    async def run_call(index: int, call: Dict[str, Any]) -> None:
+        async with semaphore:
+            try:
+                content = await execute(call["tool"], call["arguments"])
+                results[index] = {
+                    "tool": call["tool"],
+                    "isError": False,
+                    "content": [part.model_dump(mode="json", exclude_none=True) for part in content],
+                }
+            except Exception as e:
+                results[index] = {"tool": call["tool"], "isError": True, "error": str(e)}
+
+    async with anyio.create_task_group() as task_group:
+        for index, call in enumerate(calls):
+            task_group.start_soon(run_call, index, call)
+
+    return [result for result in results if result is not None]
+
+
+def format_batch_results(results: List[Dict[str, Any]], compact: bool) -> str:
+    if compact:
+        return json.dumps(results, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(results, indent=2, ensure_ascii=False)
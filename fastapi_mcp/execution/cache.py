@@ -0,0 +1,237 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+CallKey = Tuple[str, str, str]
+
+# Only successful, complete responses are cached
+CACHEABLE_STATUS_CODES = frozenset({200, 203})
+
+
+def credential_hash(credential: Optional[str]) -> str:
+    """A short, non-reversible fingerprint of the credential a call was made with."""
+    if not credential:
+        return ""
+    return hashlib.sha256(credential.encode("utf-8")).hexdigest()[:32]
+
+
+def call_key(operation_id: str, arguments: Dict[str, Any], credential: Optional[str]) -> CallKey:
+    """
+    The identity of a tool call: operation, normalized arguments and the hash of the forwarded credential.
+
+    Arguments are normalized by key order, so `{"a": 1, "b": 2}` and `{"b": 2, "a": 1}` are the same call.
+    """
+    normalized_arguments = json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+    return operation_id, normalized_arguments, credential_hash(credential)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse a `Cache-Control` header value into a directive -> argument mapping."""
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+
+    for directive in value.split(","):
+        directive = directive.strip()
+        if not directive:
+            continue
+        name, _, argument = directive.partition("=")
+        directives[name.strip().lower()] = argument.strip().strip('"') if argument else None
+    return directives
+
+
+@dataclass
+class CacheEntry:
+    path: str
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    content: bytes
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for revalidating this entry with the app."""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self) -> httpx.Response:
+        return httpx.Response(status_code=self.status_code, headers=self.headers, content=self.content)
+
+
+class ResponseCache:
+    """
+    An LRU cache of upstream responses for GET tool calls, that follows the app's HTTP caching headers.
+
+    - `Cache-Control: no-store` and `private` responses are not cached: like a shared cache, the one cache serves
+      every session.
+    - `Cache-Control: max-age` / `s-maxage` set the freshness lifetime; without them, `ttl` is used.
+    - `Cache-Control: no-cache` responses (and entries past their lifetime) are revalidated with the app using
+      `If-None-Match` / `If-Modified-Since` when the response had an `ETag` / `Last-Modified`, and reused on 304.
+    - Mutating calls invalidate the entries whose path is under, or is an ancestor of, the mutated resource.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0, respect_cache_control: bool = True):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.respect_cache_control = respect_cache_control
+        self._entries: "OrderedDict[CallKey, CacheEntry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counters for tuning the cache. A revalidated (304) entry counts as a hit, too."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def lookup(self, key: CallKey) -> Optional[CacheEntry]:
+        """Get the entry for a call, fresh or not. Use `CacheEntry.is_fresh()` to tell whether it can be served."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def record_hit(self) -> None:
+        self.hits += 1
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def revalidated(self, key: CallKey, entry: CacheEntry, response: httpx.Response) -> CacheEntry:
+        """Refresh an entry after the app confirmed it is still valid with a 304 response."""
+        self.revalidations += 1
+        self.hits += 1
+
+        lifetime = self._lifetime(response.headers.get("cache-control"))
+        if lifetime is None:
+            # The 304 says "no-store": forget the entry, but the stored response is still valid for this call
+            self._entries.pop(key, None)
+            return entry
+
+        entry.expires_at = time.monotonic() + lifetime
+        entry.etag = response.headers.get("etag", entry.etag)
+        entry.last_modified = response.headers.get("last-modified", entry.last_modified)
+        return entry
+
+    def store(self, key: CallKey, path: str, response: httpx.Response) -> None:
+        """Store a response, if it is cacheable."""
+        if response.status_code not in CACHEABLE_STATUS_CODES:
+            return
+
+        lifetime = self._lifetime(response.headers.get("cache-control"))
+        if lifetime is None:
+            return
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if lifetime <= 0 and not (etag or last_modified):
+            # Must always be revalidated, but there's nothing to revalidate with
+            return
+
+        self._entries[key] = CacheEntry(
+            path=path,
+            status_code=response.status_code,
+            headers=list(response.headers.raw),
+            content=response.content,
+            expires_at=time.monotonic() + lifetime,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        self._entries.move_to_end(key)
+        self.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_path(self, path: str) -> int:
+        """
+        Invalidate the entries affected by a change to the resource at `path`: the ones under it (e.g.
+        `/items/1` for `/items`) and the ones for its ancestors (e.g. `/items` for `/items/1/tags`).
+
+        Returns:
+            The number of entries removed
+        """
+        path = path.rstrip("/") or "/"
+        ancestors = _ancestor_paths(path)
+        prefix = path if path.endswith("/") else path + "/"
+
+        stale_keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.path == path or entry.path.startswith(prefix) or entry.path.rstrip("/") in ancestors
+        ]
+        for key in stale_keys:
+            del self._entries[key]
+
+        self.invalidations += len(stale_keys)
+        return len(stale_keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _lifetime(self, cache_control: Optional[str]) -> Optional[float]:
+        """Freshness lifetime in seconds for a response, or `None` if it must not be stored."""
+        if not self.respect_cache_control:
+            return self.ttl
+
+        directives = parse_cache_control(cache_control)
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0.0
+
+        for directive in ("s-maxage", "max-age"):
+            argument = directives.get(directive)
+            if argument is not None:
+                try:
+                    return max(float(argument), 0.0)
+                except ValueError:
+                    logger.debug(f"Ignoring invalid Cache-Control {directive}: {argument}")
+
+        return self.ttl
+
+
+def _ancestor_paths(path: str) -> set:
+    ancestors = {""}
+    segments = path.strip("/").split("/")
+    for index in range(1, len(segments)):
+        ancestors.add("/" + "/".join(segments[:index]))
+    return ancestors
@@ -0,0 +1,70 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import anyio
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = anyio.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.completed = False
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for a key is running, other calls for the same key wait for
+    it and all receive its result (or its exception), instead of each running their own.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """`leaders` calls actually ran, `collapsed` calls reused the result of a leader instead."""
+        return {
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._flights),
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        while flight is not None:
+            await flight.done.wait()
+            if flight.completed:
+                self.collapsed += 1
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+            # The leader was cancelled before finishing, so there's nothing to share: the first of its followers
+            # to get here runs the call, and the others follow it instead
+            flight = self._flights.get(key)
+
+        flight = _Flight()
+        self._flights[key] = flight
+        self.leaders += 1
+        try:
+            flight.result = await fn()
+            flight.completed = True
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            flight.completed = True
+            raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.done.set()
@@ -0,0 +1,368 @@
+import asyncio
+import json
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import anyio
+import httpx
+from anyio.streams.memory import MemoryObjectReceiveStream
+from fastapi import FastAPI, params
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute, run_endpoint_function, serialize_response
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Message
+
+from fastapi_mcp.execution.plan import RequestPlan
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DirectRoute:
+    """The FastAPI route resolved for an operation, plus everything needed to invoke it without routing."""
+
+    route: APIRoute
+    is_coroutine: bool
+    response_class: type
+
+
+class DirectDispatcher:
+    """
+    Invokes FastAPI routes in-process, without going through `httpx.ASGITransport` and the app's router.
+
+    The matching `APIRoute` of every operation is resolved once, and tool calls then run the route's dependant
+    with the already-parsed tool arguments: the JSON body is never serialized and re-parsed, but dependency
+    injection, request validation, exception handlers and `response_model` serialization all still run, the
+    same way `fastapi.routing.get_request_handler()` runs them.
+
+    Note that the app's middleware is *not* run in this mode, since no ASGI request goes through the app.
+    """
+
+    def __init__(self, app: FastAPI, base_url: str):
+        self.app = app
+        self._base_url = httpx.URL(base_url)
+        self._routes: Dict[str, DirectRoute] = {}
+        self._routes_by_key: Optional[Dict[Tuple[str, str], APIRoute]] = None
+
+    def compile(self, plans: Dict[str, RequestPlan]) -> None:
+        """Resolve the route of every request plan. Operations that can't be dispatched directly are skipped."""
+        self._routes_by_key = self._index_routes()
+        self._routes = {}
+        for plan in plans.values():
+            self.add(plan)
+
+    def add(self, plan: RequestPlan) -> bool:
+        """
+        Resolve the route of a single request plan, e.g. one compiled on first use.
+
+        Returns:
+            Whether the operation can be dispatched directly
+        """
+        if self._routes_by_key is None:
+            self._routes_by_key = self._index_routes()
+
+        operation_id = plan.operation_id
+        route = self._routes_by_key.get((plan.path, plan.method))
+        if route is None:
+            logger.debug(f"No route found for {operation_id}, it will be dispatched over HTTP")
+            return False
+
+        if route.body_field is not None and isinstance(route.body_field.field_info, params.Form):
+            logger.debug(f"{operation_id} takes form data, it will be dispatched over HTTP")
+            return False
+
+        response_class = route.response_class
+        if hasattr(response_class, "value"):  # `DefaultPlaceholder`
+            response_class = response_class.value
+
+        self._routes[operation_id] = DirectRoute(
+            route=route,
+            is_coroutine=asyncio.iscoroutinefunction(route.dependant.call),
+            response_class=response_class,
+        )
+        return True
+
+    def _index_routes(self) -> Dict[Tuple[str, str], APIRoute]:
+        routes_by_key: Dict[Tuple[str, str], APIRoute] = {}
+        for route in self.app.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            for method in route.methods:
+                # Like the OpenAPI generation, the first route registered for a path and method wins
+                routes_by_key.setdefault((route.path_format, method.lower()), route)
+        return routes_by_key
+
+    def can_dispatch(self, operation_id: str) -> bool:
+        return operation_id in self._routes
+
+    async def dispatch(
+        self,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Optional[httpx.Response]:
+        """
+        Invoke the route of the given plan in-process.
+
+        Returns:
+            The response, as an `httpx.Response` so that it can be handled exactly like the ones coming from the
+            HTTP client, or `None` if the call can't be dispatched directly and should go over HTTP instead.
+        """
+        prepared = self._build_request(plan, path, path_values, query, headers, body)
+        if prepared is None:
+            return None
+
+        direct_route, request, body = prepared
+        response = await self._get_response(direct_route, request, body)
+        return await self._to_httpx_response(response, request)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> AsyncIterator[Optional[httpx.Response]]:
+        """
+        Like `dispatch()`, but the body of the yielded response is read incrementally while the route's response
+        (e.g. a `StreamingResponse`) is rendering, instead of being buffered whole.
+        """
+        prepared = self._build_request(plan, path, path_values, query, headers, body)
+        if prepared is None:
+            yield None
+            return
+
+        direct_route, request, body = prepared
+        response = await self._get_response(direct_route, request, body)
+
+        # A buffer of a single message keeps at most one body chunk in flight
+        send_stream, receive_stream = anyio.create_memory_object_stream(1)
+
+        async def render() -> None:
+            async with send_stream:
+                try:
+                    await response(request.scope, request.receive, send_stream.send)
+                except anyio.BrokenResourceError:
+                    # The caller closed the response before reading all of it
+                    pass
+
+        # Errors raised by the caller are re-raised outside of the task group, so they don't get wrapped in an
+        # exception group
+        caller_error: Optional[Exception] = None
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(render)
+
+            start = await receive_stream.receive()
+            byte_stream = _ResponseByteStream(receive_stream)
+            try:
+                yield httpx.Response(status_code=start["status"], headers=start.get("headers", []), stream=byte_stream)
+            except Exception as e:
+                caller_error = e
+
+            if not byte_stream.complete:
+                # The caller stopped reading early, there's no one left to consume the rest of the body
+                task_group.cancel_scope.cancel()
+
+        if caller_error is not None:
+            raise caller_error
+
+    def _build_request(
+        self,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Optional[Tuple[DirectRoute, Request, Optional[Any]]]:
+        direct_route = self._routes.get(plan.operation_id)
+        if direct_route is None:
+            return None
+
+        route = direct_route.route
+        try:
+            path_params = {
+                name: convertor.convert(str(path_values[name])) for name, convertor in route.param_convertors.items()
+            }
+        except (KeyError, ValueError):
+            # A missing or non-matching path parameter would not route over HTTP either, so let the app answer
+            return None
+
+        if not plan.sends_body:
+            body = None
+
+        query_string = str(httpx.QueryParams(query)).encode("ascii") if query else b""
+        raw_headers: List[Tuple[bytes, bytes]] = [(b"host", (self._base_url.netloc or b"apiserver"))]
+        for name, value in headers.items():
+            raw_headers.append((name.lower().encode("latin-1"), str(value).encode("latin-1")))
+        if body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+
+        scope: Dict[str, Any] = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.4"},
+            "http_version": "1.1",
+            "method": plan.method.upper(),
+            "scheme": self._base_url.scheme or "http",
+            "server": (self._base_url.host or "apiserver", self._base_url.port or 80),
+            "client": ("127.0.0.1", 123),
+            "root_path": self.app.root_path,
+            "path": unquote(path),
+            "raw_path": path.encode("ascii", errors="ignore"),
+            "query_string": query_string,
+            "headers": raw_headers,
+            "app": self.app,
+            "router": self.app.router,
+            "route": route,
+            "endpoint": route.endpoint,
+            "path_params": path_params,
+            "state": {},
+        }
+
+        # Only serialize the body if something actually reads the raw request (e.g. a `Request` dependency)
+        body_sent = False
+
+        async def receive() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                # The "client" never disconnects, same as with a regular in-process request
+                await anyio.sleep_forever()
+            body_sent = True
+            raw_body = (
+                json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if body is not None else b""
+            )
+            return {"type": "http.request", "body": raw_body, "more_body": False}
+
+        return direct_route, Request(scope, receive), body
+
+    async def _get_response(self, direct_route: DirectRoute, request: Request, body: Optional[Any]) -> Response:
+        try:
+            return await self._run_route(direct_route, request, body)
+        except Exception as exc:
+            return await self._handle_exception(request, exc)
+
+    async def _run_route(self, direct_route: DirectRoute, request: Request, body: Optional[Any]) -> Response:
+        """A trimmed-down `fastapi.routing.get_request_handler()` that takes the body already parsed."""
+        route = direct_route.route
+        async with AsyncExitStack() as async_exit_stack:
+            solved_result = await solve_dependencies(
+                request=request,
+                dependant=route.dependant,
+                body=body,
+                dependency_overrides_provider=route.dependency_overrides_provider,
+                async_exit_stack=async_exit_stack,
+                embed_body_fields=getattr(route, "_embed_body_fields", False),
+            )
+            if solved_result.errors:
+                raise RequestValidationError(solved_result.errors, body=body)
+
+            raw_response = await run_endpoint_function(
+                dependant=route.dependant,
+                values=solved_result.values,
+                is_coroutine=direct_route.is_coroutine,
+            )
+            if isinstance(raw_response, Response):
+                if raw_response.background is None:
+                    raw_response.background = solved_result.background_tasks
+                return raw_response
+
+            response_args: Dict[str, Any] = {"background": solved_result.background_tasks}
+            status_code = solved_result.response.status_code or route.status_code
+            if status_code is not None:
+                response_args["status_code"] = status_code
+
+            content = await serialize_response(
+                field=route.secure_cloned_response_field,
+                response_content=raw_response,
+                include=route.response_model_include,
+                exclude=route.response_model_exclude,
+                by_alias=route.response_model_by_alias,
+                exclude_unset=route.response_model_exclude_unset,
+                exclude_defaults=route.response_model_exclude_defaults,
+                exclude_none=route.response_model_exclude_none,
+                is_coroutine=direct_route.is_coroutine,
+            )
+            response = direct_route.response_class(content, **response_args)
+            if not is_body_allowed_for_status_code(response.status_code):
+                response.body = b""
+            response.headers.raw.extend(solved_result.response.headers.raw)
+            return response
+
+    async def _handle_exception(self, request: Request, exc: Exception) -> Response:
+        """Turn an exception into a response with the app's exception handlers, like Starlette's middleware."""
+        exception_handlers = self.app.exception_handlers
+
+        handler = None
+        if isinstance(exc, StarletteHTTPException):
+            handler = exception_handlers.get(exc.status_code)
+        if handler is None:
+            for cls in type(exc).__mro__:
+                if cls in exception_handlers:
+                    handler = exception_handlers[cls]
+                    break
+
+        if handler is None:
+            logger.exception("Exception in directly dispatched route", exc_info=exc)
+            return PlainTextResponse("Internal Server Error", status_code=500)
+
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(request, exc)
+        return await run_in_threadpool(handler, request, exc)
+
+    async def _to_httpx_response(self, response: Response, request: Request) -> httpx.Response:
+        # Let the response render itself (this also runs its background tasks), same as it would over ASGI
+        start: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+
+        async def send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await response(request.scope, request.receive, send)
+
+        return httpx.Response(
+            status_code=start.get("status", response.status_code),
+            headers=start.get("headers", response.raw_headers),
+            content=b"".join(chunks),
+        )
+
+
+class _ResponseByteStream(httpx.AsyncByteStream):
+    """Exposes the body messages of a rendering ASGI response as an httpx response stream."""
+
+    def __init__(self, receive_stream: MemoryObjectReceiveStream):
+        self._receive_stream = receive_stream
+        self.complete = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for message in self._receive_stream:
+            if message["type"] != "http.response.body":
+                continue
+            chunk = message.get("body", b"")
+            if chunk:
+                yield chunk
+            if not message.get("more_body", False):
+                break
+        self.complete = True
+
+    async def aclose(self) -> None:
+        await self._receive_stream.aclose()
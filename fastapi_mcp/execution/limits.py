@@ -0,0 +1,157 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+import anyio
+from mcp.shared.exceptions import McpError
+from mcp.types import ErrorData
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# JSON-RPC "server error" code returned when a tool call is rejected by a concurrency limit
+CONCURRENCY_LIMIT_EXCEEDED = -32029
+
+
+class ConcurrencyLimitExceeded(McpError):
+    """Raised when a tool call can't get a concurrency slot and the wait queue is full (or the wait timed out)."""
+
+    def __init__(self, limit_name: str, reason: str):
+        self.limit_name = limit_name
+        super().__init__(
+            ErrorData(
+                code=CONCURRENCY_LIMIT_EXCEEDED,
+                message=f"Too many concurrent tool calls ({limit_name}): {reason}",
+                data={"limit": limit_name},
+            )
+        )
+
+
+class Limit:
+    """A concurrency limit with a bounded FIFO wait queue."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue_size: int, queue_timeout: Optional[float]):
+        if max_concurrent <= 0:
+            raise ValueError(f"Concurrency limit for {name} must be positive")
+
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self._semaphore = anyio.Semaphore(max_concurrent)
+
+        self.waiting = 0
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self.max_concurrent - self._semaphore.value
+
+    async def acquire(self) -> None:
+        try:
+            self._semaphore.acquire_nowait()
+            return
+        except anyio.WouldBlock:
+            pass
+
+        if self.waiting >= self.max_queue_size:
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(self.name, "wait queue is full")
+
+        self.waiting += 1
+        try:
+            with anyio.fail_after(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(self.name, f"no slot freed up within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Global, per-operation and per-tag concurrency limits for tool calls.
+
+    A call has to get a slot from every limit that applies to it. Limits are always acquired in the same order
+    (operation, tags, then global), so that calls can't deadlock each other. The most specific limits come first:
+    a call waiting for a slot of its operation or tag doesn't hold a global slot meanwhile, so a saturated
+    operation can't take up the global budget of the other ones.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_calls: Optional[int] = None,
+        per_operation: Optional[Dict[str, int]] = None,
+        per_tag: Optional[Dict[str, int]] = None,
+        max_queue_size: int = 100,
+        queue_timeout: Optional[float] = None,
+    ):
+        if max_queue_size < 0:
+            raise ValueError("max_queue_size can't be negative")
+
+        def make_limit(name: str, max_concurrent: int) -> Limit:
+            return Limit(name, max_concurrent, max_queue_size, queue_timeout)
+
+        self._global = make_limit("global", max_concurrent_calls) if max_concurrent_calls else None
+        self._operation_limits = {
+            operation_id: make_limit(f"operation:{operation_id}", limit)
+            for operation_id, limit in (per_operation or {}).items()
+        }
+        self._tag_limits = {tag: make_limit(f"tag:{tag}", limit) for tag, limit in (per_tag or {}).items()}
+        self._limits_by_operation: Dict[str, List[Limit]] = {}
+
+    def limits_for(self, operation_id: str, tags: Iterable[str] = ()) -> List[Limit]:
+        """The limits that apply to an operation, in acquisition order. Cached per operation."""
+        limits = self._limits_by_operation.get(operation_id)
+        if limits is None:
+            limits = []
+            if operation_id in self._operation_limits:
+                limits.append(self._operation_limits[operation_id])
+            for tag in sorted(set(tags)):
+                if tag in self._tag_limits:
+                    limits.append(self._tag_limits[tag])
+            if self._global is not None:
+                limits.append(self._global)
+            self._limits_by_operation[operation_id] = limits
+        return limits
+
+    @asynccontextmanager
+    async def limit(self, operation_id: str, tags: Iterable[str] = ()) -> AsyncIterator[None]:
+        """Hold a slot in every limit that applies to the operation for the duration of the block."""
+        acquired: List[Limit] = []
+        try:
+            for limit in self.limits_for(operation_id, tags):
+                await limit.acquire()
+                acquired.append(limit)
+            yield
+        finally:
+            for limit in reversed(acquired):
+                limit.release()
+
+    def clear_cache(self) -> None:
+        """Forget the per-operation limit lookups, e.g. after the operations' tags changed."""
+        self._limits_by_operation.clear()
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        limits: List[Limit] = []
+        if self._global is not None:
+            limits.append(self._global)
+        limits.extend(self._operation_limits.values())
+        limits.extend(self._tag_limits.values())
+        return {limit.name: limit.stats for limit in limits}
@@ -0,0 +1,223 @@
+import re
+import string
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+from starlette.convertors import Convertor, PathConvertor
+from starlette.routing import BaseRoute, Route
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+PATH = "path"
+QUERY = "query"
+HEADER = "header"
+
+# Methods whose httpx client method accepts a `json=` body
+METHODS_WITH_BODY = frozenset({"post", "put", "patch"})
+SUPPORTED_METHODS = frozenset({"get", "post", "put", "delete", "patch"})
+
+# Characters left as-is when substituting path parameters. "/" is kept so that FastAPI `{param:path}` routes
+# keep working; anything else that would change the meaning of the URL (e.g. "?", "#", "%", spaces) is escaped.
+# When the route of an operation is known, "/" is only kept in its `{param:path}` parameters
+PATH_PARAM_SAFE_CHARS = "/"
+
+PathConvertors = Mapping[Tuple[str, str], Mapping[str, Convertor]]
+
+_PATH_TEMPLATE_RE = re.compile(r"\{([^{}]+)\}")
+_LOCATION_PRECEDENCE = {PATH: 0, QUERY: 1, HEADER: 2}
+_UNRESERVED_CHARS = string.ascii_letters + string.digits + "-._~"
+
+
+@dataclass
+class RequestPlan:
+    """
+    A precompiled description of how to turn tool arguments into an HTTP request for a single operation.
+
+    Built once per operation in `FastApiMCP.setup_server()`, so that the per-call work is a single pass
+    over the arguments.
+    """
+
+    operation_id: str
+    path: str
+    method: str
+    path_segments: Tuple[str, ...]
+    """The path template split on its parameters. Odd indices are parameter names, even indices are literals."""
+    locations: Dict[str, str]
+    """Parameter name -> location ("path", "query" or "header"). Anything not in here goes to the body."""
+    path_param_safe_chars: Dict[str, str] = field(default_factory=dict)
+    """Parameter name -> characters that are not percent-encoded when substituted into the path."""
+    sends_body: bool = False
+    tags: Tuple[str, ...] = ()
+    client_method: Optional[Callable[..., Any]] = None
+    """The bound method of the client used for this operation (e.g. `client.get`), if a client was given."""
+
+    def render_path(self, path_values: Dict[str, Any]) -> str:
+        """
+        Substitute path parameter values into the path template.
+
+        Parameters with no value are left in their `{name}` form, as they were before plans existed.
+        """
+        if len(self.path_segments) == 1:
+            return self.path_segments[0]
+
+        parts: List[str] = []
+        for index, segment in enumerate(self.path_segments):
+            if index % 2 == 0:
+                parts.append(segment)
+            elif segment in path_values:
+                value = str(path_values[segment])
+                # Most path values are plain IDs made of unreserved characters, which don't need `quote()`
+                if value.strip(_UNRESERVED_CHARS):
+                    value = quote(value, safe=self.path_param_safe_chars.get(segment, PATH_PARAM_SAFE_CHARS))
+                parts.append(value)
+            else:
+                parts.append(f"{{{segment}}}")
+        return "".join(parts)
+
+    def route_arguments(
+        self, arguments: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, str], Optional[Dict[str, Any]]]:
+        """
+        Route the tool arguments to their request locations in a single pass.
+
+        Returns:
+            A tuple of (path values, query params, headers, body). The body is `None` if no argument
+            ended up in it.
+        """
+        locations = self.locations
+        path_values: Dict[str, Any] = {}
+        query: Dict[str, Any] = {}
+        headers: Dict[str, str] = {}
+        body: Dict[str, Any] = {}
+
+        for name, value in arguments.items():
+            location = locations.get(name)
+            if location is None:
+                body[name] = value
+            elif location == QUERY:
+                query[name] = value
+            elif location == PATH:
+                path_values[name] = value
+            else:
+                headers[name] = value
+
+        return path_values, query, headers, (body or None)
+
+    def bind(self, client: httpx.AsyncClient) -> Callable[..., Any]:
+        """Bind (and remember) the client method this operation is executed with."""
+        self.client_method = getattr(client, self.method)
+        return self.client_method
+
+
+def split_path_template(path: str) -> Tuple[str, ...]:
+    """
+    Split an OpenAPI path template into literal and parameter segments.
+
+    `/items/{item_id}/tags/{tag}` becomes `("/items/", "item_id", "/tags/", "tag", "")`.
+    """
+    return tuple(_PATH_TEMPLATE_RE.split(path))
+
+
+def parameter_locations(operation: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Parameter name -> location ("path", "query" or "header") of the parameters of an `operation_map` entry. The
+    other arguments of its tool go to the body.
+    """
+    locations: Dict[str, str] = {}
+    for param in operation.get("parameters", []):
+        param_in = param.get("in")
+        if param_in not in (PATH, QUERY, HEADER):
+            continue
+
+        param_name = param.get("name", None)
+        if param_name is None:
+            raise ValueError(f"Parameter name is None for parameter: {param}")
+
+        # If a name appears in several locations, path wins over query, and query over header
+        current = locations.get(param_name)
+        if current is None or _LOCATION_PRECEDENCE[param_in] < _LOCATION_PRECEDENCE[current]:
+            locations[param_name] = param_in
+    return locations
+
+
+def index_path_convertors(routes: List[BaseRoute]) -> Dict[Tuple[str, str], Dict[str, Convertor]]:
+    """
+    The convertors of the path parameters of an app's routes, by (path template, lowercase method). Like the
+    OpenAPI generation, the first route registered for a path and method wins.
+    """
+    convertors: Dict[Tuple[str, str], Dict[str, Convertor]] = {}
+    for route in routes:
+        if not isinstance(route, Route):
+            continue
+        for method in route.methods or ():
+            convertors.setdefault((route.path_format, method.lower()), route.param_convertors)
+    return convertors
+
+
+def compile_request_plan(
+    operation_id: str,
+    operation: Dict[str, Any],
+    client: Optional[httpx.AsyncClient] = None,
+    path_convertors: Optional[PathConvertors] = None,
+) -> RequestPlan:
+    """
+    Compile an `operation_map` entry into a `RequestPlan`.
+
+    Args:
+        operation_id: The operation ID (tool name) of the operation
+        operation: The operation details, as produced by `convert_openapi_to_mcp_tools()`
+        client: Optional client to bind the HTTP method to
+        path_convertors: The convertors of the path parameters of the app's routes, from `index_path_convertors()`,
+            to only keep "/" as-is in `{param:path}` parameters
+
+    Returns:
+        The compiled request plan
+    """
+    method = operation["method"].lower()
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"Unsupported HTTP method: {method}")
+
+    locations = parameter_locations(operation)
+
+    path_param_safe_chars: Dict[str, str] = {}
+    convertors = path_convertors.get((operation["path"], method)) if path_convertors is not None else None
+    if convertors is not None:
+        path_param_safe_chars = {
+            name: PATH_PARAM_SAFE_CHARS if isinstance(convertor, PathConvertor) else ""
+            for name, convertor in convertors.items()
+        }
+
+    plan = RequestPlan(
+        operation_id=operation_id,
+        path=operation["path"],
+        method=method,
+        path_segments=split_path_template(operation["path"]),
+        locations=locations,
+        path_param_safe_chars=path_param_safe_chars,
+        sends_body=method in METHODS_WITH_BODY,
+        tags=tuple(operation.get("tags", [])),
+    )
+    if client is not None:
+        plan.bind(client)
+    return plan
+
+
+def compile_request_plans(
+    operation_map: Mapping[str, Dict[str, Any]],
+    client: Optional[httpx.AsyncClient] = None,
+    path_convertors: Optional[PathConvertors] = None,
+) -> Dict[str, RequestPlan]:
+    """Compile every entry of an `operation_map` into a `RequestPlan`."""
+    plans: Dict[str, RequestPlan] = {}
+    for operation_id, operation in operation_map.items():
+        try:
+            plans[operation_id] = compile_request_plan(operation_id, operation, client, path_convertors)
+        except ValueError as e:
+            logger.warning(f"Could not compile request plan for {operation_id}: {e}")
+    return plans
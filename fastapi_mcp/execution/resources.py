@@ -0,0 +1,94 @@
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+RESULT_URI_PREFIX = "fastapi-mcp://results/"
+
+
+def result_uri(tool_name: str) -> str:
+    """A unique URI for a tool result kept in a `ResultStore`."""
+    return f"{RESULT_URI_PREFIX}{tool_name}/{uuid.uuid4().hex}"
+
+
+def inline_uri(tool_name: str) -> str:
+    """
+    A unique URI for a tool result inlined in the response. It's a URN, not a `fastapi-mcp://` URL, as there is no
+    resource to read behind it.
+    """
+    return f"urn:fastapi-mcp:inline:{tool_name}:{uuid.uuid4().hex}"
+
+
+@dataclass
+class StoredResult:
+    uri: str
+    tool_name: str
+    mime_type: str
+    data: bytes
+    # Whom the result is for: only they can list and read it
+    owner: str
+
+
+class ResultStore:
+    """
+    Keeps the tool results that are too large to be inlined in a tool call response, so that clients can read them
+    as MCP resources instead.
+
+    Results can hold data fetched with the credential of a client, so each belongs to an owner: a hash of the
+    forwarded credential, or the session of the client for calls without one. Other owners can neither list nor read
+    it, even with its URI.
+
+    The store is bounded by the total size of its results: the least recently stored or read ones are evicted first.
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._results: "OrderedDict[str, StoredResult]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def put(self, tool_name: str, data: bytes, mime_type: str, owner: str) -> str:
+        """
+        Store a result.
+
+        Returns:
+            The URI of the result
+        """
+        if len(data) > self.max_bytes:
+            raise ValueError(f"Result too large to store: {len(data)} bytes (the maximum is {self.max_bytes})")
+
+        uri = result_uri(tool_name)
+        self._results[uri] = StoredResult(uri=uri, tool_name=tool_name, mime_type=mime_type, data=data, owner=owner)
+        self.size += len(data)
+
+        while self.size > self.max_bytes:
+            _, evicted = self._results.popitem(last=False)
+            self.size -= len(evicted.data)
+            logger.debug(f"Evicted stored result {evicted.uri}")
+
+        return uri
+
+    def get(self, uri: str, owner: str) -> Optional[StoredResult]:
+        result = self._results.get(uri)
+        if result is None or result.owner != owner:
+            return None
+        self._results.move_to_end(uri)
+        return result
+
+    def list(self, owner: str) -> List[StoredResult]:
+        return [result for result in self._results.values() if result.owner == owner]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"results": len(self._results), "bytes": self.size}
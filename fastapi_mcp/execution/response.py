@@ -0,0 +1,214 @@
+import base64
+import codecs
+import json
+from typing import Any, Awaitable, Callable, List, Literal, Optional, Union
+
+import httpx
+import mcp.types as types
+from pydantic import AnyUrl
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+ResponseMode = Literal["pretty", "compact", "raw"]
+RESPONSE_MODES = ("pretty", "compact", "raw")
+
+# Bytes received between two progress notifications of a streamed response
+PROGRESS_INTERVAL = 64 * 1024
+
+
+def is_json_content_type(content_type: str) -> bool:
+    """Whether a `Content-Type` header value denotes JSON (`application/json` or any `+json` type)."""
+    media_type = media_type_of(content_type)
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def media_type_of(content_type: Optional[str]) -> str:
+    """The media type of a `Content-Type` header value, without its parameters."""
+    if not content_type:
+        return ""
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+_TEXT_MEDIA_TYPES = frozenset(
+    {
+        "application/xml",
+        "application/javascript",
+        "application/ecmascript",
+        "application/x-www-form-urlencoded",
+        "application/yaml",
+        "application/x-yaml",
+        "application/graphql",
+        "application/x-ndjson",
+        "application/sql",
+    }
+)
+
+
+def is_text_content_type(content_type: Optional[str]) -> bool:
+    """
+    Whether a `Content-Type` header value denotes text that can be returned as a text tool result.
+
+    Responses without a content type, or with a `charset`, are assumed to be text.
+    """
+    if not content_type or "charset=" in content_type.lower():
+        return True
+
+    media_type = media_type_of(content_type)
+    return (
+        media_type.startswith("text/")
+        or media_type in _TEXT_MEDIA_TYPES
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+        or is_json_content_type(media_type)
+    )
+
+
+def binary_content(data: bytes, media_type: str, uri: str) -> Union[types.ImageContent, types.EmbeddedResource]:
+    """
+    Map a binary response body to a tool result, base64-encoded straight from the bytes: images become
+    `ImageContent`, anything else an embedded blob resource.
+    """
+    encoded = base64.b64encode(data).decode("ascii")
+    if media_type.startswith("image/"):
+        return types.ImageContent(type="image", data=encoded, mimeType=media_type)
+
+    return types.EmbeddedResource(
+        type="resource",
+        resource=types.BlobResourceContents(
+            uri=AnyUrl(uri),
+            mimeType=media_type or "application/octet-stream",
+            blob=encoded,
+        ),
+    )
+
+
+async def read_body(response: httpx.Response, max_size: Optional[int]) -> bytes:
+    """Read a streamed response body whole, failing once it grows past `max_size` bytes."""
+    chunks: List[bytes] = []
+    received = 0
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+        if max_size is not None and received > max_size:
+            raise ValueError(f"Response too large: more than {max_size} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def response_text(response: Any) -> str:
+    """The response body decoded to text, for clients that may not implement `.text`."""
+    if hasattr(response, "text"):
+        return response.text
+    return response.content
+
+
+def format_response_text(response: Any, mode: ResponseMode = "pretty") -> str:
+    """
+    Format a successful upstream response as the text of a tool result.
+
+    Args:
+        response: The upstream response
+        mode: How to format JSON bodies:
+            - `"pretty"`: parse and re-encode with 2-space indentation
+            - `"compact"`: parse and re-encode without any whitespace
+            - `"raw"`: forward the body as-is, decoded once to text, without parsing it
+
+    Returns:
+        The text of the tool result
+    """
+    if mode == "raw":
+        return response_text(response)
+
+    # Only pay for a JSON parse when the body can actually be JSON
+    content_type = response.headers.get("content-type") if hasattr(response, "headers") else None
+    if content_type and not is_json_content_type(content_type):
+        return response_text(response)
+
+    try:
+        result = response.json()
+    except json.JSONDecodeError:
+        return response_text(response)
+
+    if mode == "compact":
+        return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+
+async def collect_streamed_response(
+    response: httpx.Response,
+    chunk_size: int,
+    max_size: Optional[int],
+    on_progress: Optional[Callable[[int, Optional[int]], Awaitable[None]]] = None,
+    progress_interval: int = PROGRESS_INTERVAL,
+) -> List[types.TextContent]:
+    """
+    Read a streamed upstream response incrementally and split it into bounded-size text content parts.
+
+    Memory use is bounded by `max_size`: once that many bytes have been kept, the rest of the body is still
+    read (so the upstream request completes normally) but discarded, and a final part notes the truncation.
+    The kept bytes end on a character boundary: a character cut by the limit is dropped whole.
+
+    Args:
+        response: The upstream response, opened in streaming mode
+        chunk_size: The maximum number of characters in each content part
+        max_size: The maximum number of body bytes to keep, or `None` for no limit
+        on_progress: Called with (bytes received so far, total bytes if known) every time `progress_interval`
+            more bytes have arrived, and once at the end
+        progress_interval: The number of bytes received between two calls of `on_progress`
+
+    Returns:
+        The content parts of the tool result
+    """
+    encoding = response.encoding or "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    content_length = response.headers.get("content-length")
+    total = int(content_length) if content_length and content_length.isdigit() else None
+
+    parts: List[types.TextContent] = []
+    pending = ""
+    received = 0
+    kept = 0
+    reported = 0
+
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+
+        if max_size is None or kept < max_size:
+            if max_size is not None and kept + len(chunk) > max_size:
+                chunk = chunk[: max_size - kept]
+            kept += len(chunk)
+
+            pending += decoder.decode(chunk)
+            while len(pending) >= chunk_size:
+                parts.append(types.TextContent(type="text", text=pending[:chunk_size]))
+                pending = pending[chunk_size:]
+
+        if on_progress is not None and received - reported >= progress_interval:
+            reported = received
+            await on_progress(received, total)
+
+    if on_progress is not None and received != reported:
+        await on_progress(received, total)
+
+    if kept < received:
+        # The bytes of a character cut by the limit are still in the decoder: drop them rather than decode them
+        # into a replacement character
+        kept -= len(decoder.getstate()[0])
+    else:
+        pending += decoder.decode(b"", final=True)
+    if pending or not parts:
+        parts.append(types.TextContent(type="text", text=pending))
+
+    if kept < received:
+        parts.append(
+            types.TextContent(
+                type="text",
+                text=f"[Response truncated: showing the first {kept} of {received} bytes]",
+            )
+        )
+
+    return parts
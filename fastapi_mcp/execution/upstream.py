@@ -0,0 +1,196 @@
+import time
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+import anyio
+import httpx
+
+from fastapi_mcp.types import UpstreamConfig
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """The body of a response, that tells its transport when it's closed, and its connection released."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "PooledTransport"):
+        self._stream = stream
+        self._transport = transport
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._transport._release()
+        await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """
+    An `httpx.AsyncHTTPTransport` that keeps track of how often requests had to wait for a pooled connection,
+    and of the state of its connection pool.
+
+    Requests are counted from when they're sent until their response is closed, which is as long as they hold a
+    connection. The state of the pool is derived from these counts, without relying on the internals of the pool:
+    with HTTP/1.1 every request holds a connection of its own, while over HTTP/2 the requests to the API share
+    one connection.
+    """
+
+    def __init__(
+        self,
+        limits: httpx.Limits,
+        http2: bool = False,
+        verify: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(limits=limits, http2=http2, verify=verify)
+        self._max_connections = limits.max_connections
+        self._max_keepalive_connections = limits.max_keepalive_connections
+        self._keepalive_expiry = limits.keepalive_expiry
+        self._clock = clock
+        self.waits = 0
+        self.in_flight = 0
+        # Whether the API answered over HTTP/2, multiplexing the requests over one connection
+        self.multiplexed = False
+        # The connections opened, and not closed since: at most the most requests that were in flight at once
+        self._open = 0
+        self._released_at = clock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._is_saturated():
+            self.waits += 1
+
+        self.in_flight += 1
+        self._open = max(self._open, self.in_use)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+        if response.extensions.get("http_version") == b"HTTP/2":
+            self.multiplexed = True
+            self._open = min(self._open, 1)
+        response.stream = _TrackedStream(response.stream, self)
+        return response
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._released_at = self._clock()
+        # The pool closes the connections it's done with beyond the ones it keeps alive
+        if self._max_keepalive_connections is not None:
+            self._open = min(self._open, self.in_use + self._max_keepalive_connections)
+
+    def _is_saturated(self) -> bool:
+        # Over HTTP/2 the requests are multiplexed, up to a limit of streams the API decides, rather than each
+        # waiting for a connection of its own
+        if self._max_connections is None or self.multiplexed:
+            return False
+        return self.in_flight >= self._max_connections
+
+    @property
+    def in_use(self) -> int:
+        """The connections serving a request."""
+        if self.multiplexed:
+            return min(self.in_flight, 1)
+        if self._max_connections is None:
+            return self.in_flight
+        return min(self.in_flight, self._max_connections)
+
+    @property
+    def waiting(self) -> int:
+        """The requests waiting for a connection: those beyond the limit of connections (with HTTP/1.1)."""
+        if self._max_connections is None or self.multiplexed:
+            return 0
+        return max(self.in_flight - self._max_connections, 0)
+
+    @property
+    def idle(self) -> int:
+        """The connections kept open for reuse, until they've been idle for `keepalive_expiry`."""
+        if self._keepalive_expiry is not None and self._clock() - self._released_at > self._keepalive_expiry:
+            self._open = self.in_use
+        return self._open - self.in_use
+
+    def pool_stats(self) -> Dict[str, Optional[int]]:
+        """
+        The state of the connection pool:
+
+        - `connections`: open connections, `in_use` + `idle`
+        - `in_use`: connections serving a request
+        - `idle`: connections kept open for reuse
+        - `in_flight`: requests sent, whose response isn't closed yet
+        - `waiting`: requests currently waiting for a connection
+        - `waits`: total number of requests that found the pool saturated and had to wait for a connection
+        """
+        in_use, idle = self.in_use, self.idle
+        return {
+            "connections": in_use + idle,
+            "in_use": in_use,
+            "idle": idle,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "waits": self.waits,
+            "max_connections": self._max_connections,
+            "max_keepalive_connections": self._max_keepalive_connections,
+        }
+
+
+def create_upstream_client(config: UpstreamConfig) -> Tuple[httpx.AsyncClient, PooledTransport]:
+    """
+    Create the HTTP client for a remote API, with the pool, keepalive and timeout settings of `config`, and return
+    it with its transport, which keeps the state of the pool.
+    """
+    timeout = httpx.Timeout(
+        config.timeout,
+        connect=config.connect_timeout if config.connect_timeout is not None else config.timeout,
+        read=config.read_timeout if config.read_timeout is not None else config.timeout,
+        write=config.write_timeout if config.write_timeout is not None else config.timeout,
+        pool=config.pool_timeout if config.pool_timeout is not None else config.timeout,
+    )
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    transport = PooledTransport(limits=limits, http2=config.http2, verify=config.verify)
+    return httpx.AsyncClient(base_url=config.base_url, timeout=timeout, transport=transport), transport
+
+
+async def warm_up_client(client: httpx.AsyncClient, config: UpstreamConfig) -> int:
+    """
+    Open `config.warm_up_connections` connections to the API ahead of the first tool calls, by sending that many
+    concurrent `HEAD` requests. Failures are logged, not raised: the tool calls will connect on their own.
+
+    Returns:
+        The number of requests that got a response
+    """
+    connections = config.warm_up_connections
+    if connections <= 0:
+        return 0
+
+    # Connections beyond these limits would be closed again right away
+    for limit in (config.max_connections, config.max_keepalive_connections):
+        if limit is not None:
+            connections = min(connections, limit)
+
+    warmed = 0
+
+    async def warm_up_connection() -> None:
+        nonlocal warmed
+        try:
+            await client.head(config.warm_up_path)
+            warmed += 1
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to warm up a connection to {config.base_url}: {e!r}")
+
+    async with anyio.create_task_group() as task_group:
+        for _ in range(connections):
+            task_group.start_soon(warm_up_connection)
+
+    logger.info(f"Warmed up {warmed} connection(s) to {config.base_url}")
+    return warmed
@@ -0,0 +1,490 @@
+import functools
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FieldError:
+    field: str
+    """The path of the invalid value in the arguments, e.g. `items[0].price`, or `""` for the arguments object"""
+    message: str
+
+
+class InvalidArgumentsError(ValueError):
+    """
+    The arguments of a tool call don't match the tool's input schema. Its message is a JSON document listing the
+    errors of each field, returned to the client as the (error) result of the call.
+    """
+
+    def __init__(self, tool_name: str, errors: List[FieldError]):
+        self.tool_name = tool_name
+        self.errors = errors
+        super().__init__(
+            json.dumps(
+                {
+                    "error": f"Invalid arguments for tool {tool_name}",
+                    "fields": [{"field": error.field, "message": error.message} for error in errors],
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+# Checks a value at a path, appending to the errors. Returns the value, as coerced by the check
+_Check = Callable[[Any, str, List[FieldError]], Any]
+
+# Strings pydantic accepts for booleans, in lax mode
+_TRUE_STRINGS = frozenset({"1", "on", "t", "true", "y", "yes"})
+_FALSE_STRINGS = frozenset({"0", "f", "false", "n", "no", "off"})
+
+_JSON_TYPE_NAMES = {
+    bool: "boolean",
+    int: "integer",
+    float: "number",
+    str: "string",
+    list: "array",
+    dict: "object",
+    type(None): "null",
+}
+
+
+def _json_type(value: Any) -> str:
+    return _JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _is_type(value: Any, type_name: str) -> bool:
+    if type_name == "string":
+        return isinstance(value, str)
+    if type_name == "integer":
+        return (isinstance(value, int) and not isinstance(value, bool)) or (
+            isinstance(value, float) and value.is_integer()
+        )
+    if type_name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if type_name == "boolean":
+        return isinstance(value, bool)
+    if type_name == "object":
+        return isinstance(value, dict)
+    if type_name == "array":
+        return isinstance(value, list)
+    if type_name == "null":
+        return value is None
+    # Unknown types aren't checked
+    return True
+
+
+def _coerce(value: Any, type_name: str) -> Tuple[bool, Any]:
+    """
+    Coerce a value like FastAPI (pydantic, in lax mode) does: strings to numbers and booleans (e.g. for query
+    parameters), booleans to numbers, and 0 and 1 to booleans.
+
+    Returns:
+        Whether the value could be coerced, and the coerced value
+    """
+    if isinstance(value, bool):
+        if type_name in ("integer", "number"):
+            return True, int(value)
+        return False, value
+    if isinstance(value, (int, float)):
+        if type_name == "boolean" and value in (0, 1):
+            return True, bool(value)
+        return False, value
+    if not isinstance(value, str):
+        return False, value
+
+    text = value.strip()
+    try:
+        if type_name == "integer":
+            number = float(text)
+            if number.is_integer():
+                return True, int(number)
+        elif type_name == "number":
+            number = float(text)
+            if math.isfinite(number):
+                return True, number
+        elif type_name == "boolean":
+            if text.lower() in _TRUE_STRINGS:
+                return True, True
+            if text.lower() in _FALSE_STRINGS:
+                return True, False
+    except ValueError:
+        pass
+    return False, value
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    # `True == 1` in Python, but not in JSON
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    return bool(a == b)
+
+
+def _child_path(path: str, name: str) -> str:
+    return f"{path}.{name}" if path else name
+
+
+# Keywords that only describe a value, and don't constrain it
+_ANNOTATIONS = frozenset({"title", "description", "default", "examples", "example", "format", "deprecated"})
+
+
+def _compile(schema: Any, text: bool = False) -> _Check:
+    """
+    Compile the checks of a schema. `text` values are sent to the app as strings (path, query, header and cookie
+    parameters): FastAPI gets `123` as `"123"`, so numbers and booleans are valid where a string is expected.
+    """
+    if schema is False:
+        return _fail("No value is allowed here")
+    if not isinstance(schema, dict) or "$ref" in schema:
+        # Anything goes. References left in resolved schemas are recursive, and aren't followed
+        return _accept
+
+    # Most schemas are scalar leaves (e.g. `{"type": "integer", "title": "item_id"}`), repeated across the tools of
+    # an app: their checks are compiled once and shared
+    leaf_key = _leaf_key(schema)
+    if leaf_key is not None:
+        return _compile_leaf(leaf_key, text)
+    return _compile_schema(schema, text)
+
+
+def _accept(value: Any, path: str, errors: List[FieldError]) -> Any:
+    return value
+
+
+def _leaf_key(schema: Dict[str, Any]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """A hashable key of a schema with only scalar (or lists of scalar) constraints, or `None` for other schemas."""
+    items = []
+    for keyword, value in schema.items():
+        if keyword in _ANNOTATIONS:
+            continue
+        # Booleans aren't shared, since `True` and `1` are the same key
+        if isinstance(value, list):
+            if not all(isinstance(item, (str, int, float)) and not isinstance(item, bool) for item in value):
+                return None
+            value = tuple(value)
+        elif not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            return None
+        items.append((keyword, value))
+    return tuple(sorted(items, key=lambda item: item[0]))
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_leaf(leaf_key: Tuple[Tuple[str, Any], ...], text: bool) -> _Check:
+    schema = {keyword: list(value) if isinstance(value, tuple) else value for keyword, value in leaf_key}
+    return _compile_schema(schema, text)
+
+
+def _compile_schema(
+    schema: Dict[str, Any], text: bool = False, text_properties: AbstractSet[str] = frozenset()
+) -> _Check:
+    checks: List[_Check] = []
+
+    type_names: Optional[List[str]] = None
+    # The conversion adds a `type` next to the `anyOf` of union parameters, for clients that need one: the union is
+    # what describes the parameter, so it's what is checked
+    if "type" in schema and not ("anyOf" in schema or "oneOf" in schema):
+        type_names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+
+    if "enum" in schema:
+        checks.append(_compile_enum(schema["enum"]))
+    if "const" in schema:
+        checks.append(_compile_enum([schema["const"]]))
+    if any(keyword in schema for keyword in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")):
+        checks.append(_compile_bounds(schema))
+    if "multipleOf" in schema:
+        checks.append(_compile_multiple_of(schema["multipleOf"]))
+    if "minLength" in schema or "maxLength" in schema or "pattern" in schema:
+        checks.append(_compile_string(schema))
+    if any(keyword in schema for keyword in ("properties", "required", "additionalProperties")):
+        checks.append(_compile_object(schema, text, text_properties))
+    if any(keyword in schema for keyword in ("items", "prefixItems", "minItems", "maxItems")):
+        checks.append(_compile_array(schema, text))
+    if "allOf" in schema:
+        checks.extend(_compile(subschema, text) for subschema in schema["allOf"])
+    if "anyOf" in schema:
+        branches = [_compile(subschema, text) for subschema in schema["anyOf"]]
+        checks.append(_compile_any_of(branches, exactly_one=False))
+    if "oneOf" in schema:
+        branches = [_compile(subschema, text) for subschema in schema["oneOf"]]
+        checks.append(_compile_any_of(branches, exactly_one=True))
+
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if type_names is not None:
+            value, ok = _check_type(value, type_names, text)
+            if not ok:
+                errors.append(FieldError(path, f"Expected {' or '.join(type_names)}, got {_json_type(value)}"))
+                return value
+        for subcheck in checks:
+            value = subcheck(value, path, errors)
+        return value
+
+    return check
+
+
+def _check_type(value: Any, type_names: List[str], text: bool) -> Tuple[Any, bool]:
+    for type_name in type_names:
+        if _is_type(value, type_name):
+            return value, True
+    # The opposite of `_coerce()`: what's sent as a string is a string, whatever it was
+    if text and "string" in type_names and isinstance(value, (int, float)):
+        return value, True
+    # A single value is sent as a parameter given once, which FastAPI reads as a list of one
+    if text and "array" in type_names and not isinstance(value, (list, dict)):
+        return [value], True
+    for type_name in type_names:
+        ok, coerced = _coerce(value, type_name)
+        if ok:
+            return coerced, True
+    return value, False
+
+
+def _fail(message: str) -> _Check:
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        errors.append(FieldError(path, message))
+        return value
+
+    return check
+
+
+def _compile_enum(allowed: List[Any]) -> _Check:
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if not any(_json_equal(value, option) for option in allowed):
+            errors.append(FieldError(path, f"Expected one of {json.dumps(allowed, ensure_ascii=False)}"))
+        return value
+
+    return check
+
+
+def _compile_bounds(schema: Dict[str, Any]) -> _Check:
+    bounds: List[Tuple[Callable[[float, float], bool], Any, str]] = []
+    if "minimum" in schema:
+        bounds.append((lambda value, bound: value >= bound, schema["minimum"], "greater than or equal to"))
+    if "maximum" in schema:
+        bounds.append((lambda value, bound: value <= bound, schema["maximum"], "less than or equal to"))
+    # Numeric in JSON Schema 2020-12, boolean modifiers of minimum and maximum in older drafts
+    exclusive_minimum = schema.get("exclusiveMinimum")
+    exclusive_maximum = schema.get("exclusiveMaximum")
+    if isinstance(exclusive_minimum, bool):
+        if exclusive_minimum and "minimum" in schema:
+            bounds.append((lambda value, bound: value > bound, schema["minimum"], "greater than"))
+    elif exclusive_minimum is not None:
+        bounds.append((lambda value, bound: value > bound, exclusive_minimum, "greater than"))
+    if isinstance(exclusive_maximum, bool):
+        if exclusive_maximum and "maximum" in schema:
+            bounds.append((lambda value, bound: value < bound, schema["maximum"], "less than"))
+    elif exclusive_maximum is not None:
+        bounds.append((lambda value, bound: value < bound, exclusive_maximum, "less than"))
+
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            for holds, bound, description in bounds:
+                if not holds(value, bound):
+                    errors.append(FieldError(path, f"Must be {description} {bound}"))
+        return value
+
+    return check
+
+
+def _compile_multiple_of(factor: Any) -> _Check:
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and factor:
+            quotient = value / factor
+            if not math.isclose(quotient, round(quotient), rel_tol=0, abs_tol=1e-9):
+                errors.append(FieldError(path, f"Must be a multiple of {factor}"))
+        return value
+
+    return check
+
+
+def _compile_string(schema: Dict[str, Any]) -> _Check:
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    pattern = None
+    if "pattern" in schema:
+        try:
+            pattern = re.compile(schema["pattern"])
+        except re.error:
+            logger.debug(f"Not checking unsupported pattern: {schema['pattern']}")
+
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if not isinstance(value, str):
+            return value
+        if min_length is not None and len(value) < min_length:
+            errors.append(FieldError(path, f"Must have at least {min_length} characters"))
+        if max_length is not None and len(value) > max_length:
+            errors.append(FieldError(path, f"Must have at most {max_length} characters"))
+        if pattern is not None and not pattern.search(value):
+            errors.append(FieldError(path, f"Must match the pattern {pattern.pattern!r}"))
+        return value
+
+    return check
+
+
+def _compile_object(schema: Dict[str, Any], text: bool, text_properties: AbstractSet[str]) -> _Check:
+    properties = {
+        name: _compile(subschema, text or name in text_properties)
+        for name, subschema in schema.get("properties", {}).items()
+    }
+    required = list(schema.get("required", []))
+    additional_properties = schema.get("additionalProperties", True)
+    check_additional = None if additional_properties is True else _compile(additional_properties, text)
+
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if not isinstance(value, dict):
+            return value
+        for name in required:
+            if name not in value:
+                errors.append(FieldError(_child_path(path, name), "Field required"))
+        for name, item in value.items():
+            check_property = properties.get(name)
+            if check_property is not None:
+                check_property(item, _child_path(path, name), errors)
+            elif check_additional is not None:
+                if additional_properties is False:
+                    errors.append(FieldError(_child_path(path, name), "Unexpected field"))
+                else:
+                    check_additional(item, _child_path(path, name), errors)
+        return value
+
+    return check
+
+
+def _compile_array(schema: Dict[str, Any], text: bool) -> _Check:
+    items = schema.get("items")
+    prefix_items = schema.get("prefixItems")
+    # Before JSON Schema 2020-12, a list of `items` was what `prefixItems` is now
+    if isinstance(items, list):
+        prefix_items, items = items, schema.get("additionalItems")
+    check_prefix = [_compile(subschema, text) for subschema in prefix_items or []]
+    check_items = _compile(items, text) if items is not None else None
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        if not isinstance(value, list):
+            return value
+        if min_items is not None and len(value) < min_items:
+            errors.append(FieldError(path, f"Must have at least {min_items} items"))
+        if max_items is not None and len(value) > max_items:
+            errors.append(FieldError(path, f"Must have at most {max_items} items"))
+        for index, item in enumerate(value):
+            item_path = f"{path}[{index}]"
+            if index < len(check_prefix):
+                check_prefix[index](item, item_path, errors)
+            elif check_items is not None:
+                check_items(item, item_path, errors)
+        return value
+
+    return check
+
+
+def _compile_any_of(branches: List[_Check], exactly_one: bool) -> _Check:
+    def check(value: Any, path: str, errors: List[FieldError]) -> Any:
+        matches = 0
+        best_errors: Optional[List[FieldError]] = None
+        matched_value = value
+        for branch in branches:
+            branch_errors: List[FieldError] = []
+            branch_value = branch(value, path, branch_errors)
+            if not branch_errors:
+                if matches == 0:
+                    matched_value = branch_value
+                matches += 1
+                if not exactly_one:
+                    break
+            elif best_errors is None or len(branch_errors) < len(best_errors):
+                best_errors = branch_errors
+
+        if matches == 0:
+            # Report the errors of the closest branch, which is the most likely intent
+            errors.extend(best_errors or [FieldError(path, "Doesn't match any of the allowed schemas")])
+        elif exactly_one and matches > 1:
+            errors.append(FieldError(path, "Matches more than one of the allowed schemas"))
+        return matched_value
+
+    return check
+
+
+class ArgumentValidator:
+    """
+    A tool's input schema, compiled once into a tree of checks, that validates the arguments of its calls.
+
+    `parameters` are the names of the arguments sent as path, query, header or cookie parameters, rather than in
+    the body: the app gets them as strings, so any scalar is valid for those of type string, and a single value is
+    valid for those of type array.
+    """
+
+    def __init__(self, tool_name: str, input_schema: Dict[str, Any], parameters: Iterable[str] = ()):
+        self.tool_name = tool_name
+        if isinstance(input_schema, dict) and "$ref" not in input_schema:
+            self._check = _compile_schema(input_schema, text_properties=frozenset(parameters))
+        else:
+            self._check = _compile(input_schema)
+
+    def errors(self, arguments: Dict[str, Any]) -> List[FieldError]:
+        errors: List[FieldError] = []
+        self._check(arguments, "", errors)
+        return errors
+
+    def validate(self, arguments: Dict[str, Any]) -> None:
+        """
+        Raises:
+            InvalidArgumentsError: If the arguments don't match the schema
+        """
+        errors = self.errors(arguments)
+        if errors:
+            raise InvalidArgumentsError(self.tool_name, errors)
+
+
+class ArgumentValidators:
+    """
+    The compiled validators of a server's tools, keyed by tool name. Each one is compiled the first time it's
+    needed (or ahead of time with `compile()`), and kept until it's discarded, e.g. because its tool changed.
+    """
+
+    def __init__(self) -> None:
+        self._validators: Dict[str, ArgumentValidator] = {}
+        self.compiled = 0
+
+    def get(
+        self,
+        tool_name: str,
+        input_schema: Callable[[], Dict[str, Any]],
+        parameters: Callable[[], Iterable[str]] = tuple,
+    ) -> ArgumentValidator:
+        """
+        Get the validator of a tool, compiling it from `input_schema()` and `parameters()` (see `ArgumentValidator`)
+        if it isn't compiled yet.
+        """
+        validator = self._validators.get(tool_name)
+        if validator is None:
+            validator = ArgumentValidator(tool_name, input_schema(), parameters())
+            self._validators[tool_name] = validator
+            self.compiled += 1
+        return validator
+
+    def compile(
+        self, input_schemas: Dict[str, Dict[str, Any]], parameters: Optional[Mapping[str, Iterable[str]]] = None
+    ) -> None:
+        for tool_name, input_schema in input_schemas.items():
+            tool_parameters = parameters.get(tool_name, ()) if parameters is not None else ()
+            self.get(tool_name, lambda: input_schema, lambda: tool_parameters)
+
+    def discard(self, tool_name: str) -> None:
+        self._validators.pop(tool_name, None)
+
+    def __contains__(self, tool_name: object) -> bool:
+        return tool_name in self._validators
+
+    def __len__(self) -> int:
+        return len(self._validators)
+
+    def clear(self) -> None:
+        self._validators = {}
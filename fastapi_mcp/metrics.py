@@ -0,0 +1,250 @@
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# The content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: Union[int, float]) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names: Sequence[str], labels: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(label_names, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing count, per combination of label values.
+
+    Like the other metrics, it isn't locked: it's only updated from the event loop, between `await`s, where
+    nothing else runs. Recording is a dict update.
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Labels, Union[int, float]] = {}
+
+    def inc(self, labels: Labels = (), amount: Union[int, float] = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def get(self, labels: Labels = ()) -> Union[int, float]:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> List[str]:
+        if not self._values and not self.label_names:
+            return [f"{self.name} 0"]
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. the number of calls in flight."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Labels, Union[int, float]] = {}
+
+    def inc(self, labels: Labels = (), amount: Union[int, float] = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: Union[int, float] = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) - amount
+
+    def set(self, value: Union[int, float], labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def get(self, labels: Labels = ()) -> Union[int, float]:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> List[str]:
+        if not self._values and not self.label_names:
+            return [f"{self.name} 0"]
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """
+    The distribution of observed values, in fixed buckets. Observing a value increments a single bucket (found by
+    bisection) and the sum: the cumulative counts of the exposition format are only computed when rendering.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: the count of each bucket (the last one is +Inf), then the sum of the observations
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series is not None else 0
+
+    def sum(self, labels: Labels = ()) -> float:
+        series = self._series.get(labels)
+        return series[-1] if series is not None else 0.0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cumulative)}")
+        return lines
+
+
+class MCPMetrics:
+    """
+    The metrics of an MCP server: its tool calls, the upstream requests they make, and its transports. Rendered in
+    the Prometheus text format by `render()`, e.g. from the endpoint added by `FastApiMCP.mount(metrics=True)`.
+    """
+
+    def __init__(self) -> None:
+        self.tool_calls = Counter(
+            "mcp_tool_calls_total", "Tool calls, by tool and outcome (success or error)", ("tool", "outcome")
+        )
+        self.tool_call_duration = Histogram(
+            "mcp_tool_call_duration_seconds", "Duration of tool calls, by tool", ("tool",), LATENCY_BUCKETS
+        )
+        self.tool_calls_in_flight = Gauge("mcp_tool_calls_in_flight", "Tool calls being executed")
+        self.upstream_responses = Counter(
+            "mcp_upstream_responses_total",
+            "Responses of the API to tool calls, by tool and status code",
+            ("tool", "status"),
+        )
+        self.upstream_request_size = Histogram(
+            "mcp_upstream_request_size_bytes",
+            "Size of the request bodies sent to the API, by tool",
+            ("tool",),
+            SIZE_BUCKETS,
+        )
+        self.upstream_response_size = Histogram(
+            "mcp_upstream_response_size_bytes",
+            "Size of the response bodies of the API, by tool",
+            ("tool",),
+            SIZE_BUCKETS,
+        )
+        self.messages_received = Counter("mcp_messages_received_total", "MCP messages received from clients")
+        self.message_size = Histogram(
+            "mcp_message_size_bytes", "Size of the MCP messages received from clients", (), SIZE_BUCKETS
+        )
+        self.messages_queued = Gauge(
+            "mcp_messages_queued", "MCP messages accepted, but not yet handed over to their session"
+        )
+        self.sse_sessions = Gauge("mcp_sse_sessions_active", "Open SSE sessions")
+        self.http_sessions = Gauge("mcp_http_sessions_active", "Open streamable HTTP sessions")
+        self.relayed_messages = Counter(
+            "mcp_relayed_messages_total",
+            "MCP messages relayed between workers to the one holding their SSE session, by direction",
+            ("direction",),
+        )
+
+        self._metrics: List[_Metric] = [
+            self.tool_calls,
+            self.tool_call_duration,
+            self.tool_calls_in_flight,
+            self.upstream_responses,
+            self.upstream_request_size,
+            self.upstream_response_size,
+            self.messages_received,
+            self.message_size,
+            self.messages_queued,
+            self.sse_sessions,
+            self.http_sessions,
+            self.relayed_messages,
+        ]
+
+    def record_tool_call(self, tool_name: str, success: bool, duration: float) -> None:
+        self.tool_calls.inc((tool_name, "success" if success else "error"))
+        self.tool_call_duration.observe(duration, (tool_name,))
+
+    def record_upstream_response(
+        self, tool_name: str, status_code: int, request_size: Optional[int], response_size: Optional[int]
+    ) -> None:
+        self.upstream_responses.inc((tool_name, str(status_code)))
+        if request_size is not None:
+            self.upstream_request_size.observe(request_size, (tool_name,))
+        if response_size is not None:
+            self.upstream_response_size.observe(response_size, (tool_name,))
+
+    def record_message(self, size: int) -> None:
+        self.messages_received.inc()
+        self.message_size.observe(size)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
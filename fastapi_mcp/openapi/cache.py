@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import mcp.types as types
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the layout of the cached catalogs, or the output of the conversion, changes
+CATALOG_FORMAT_VERSION = 1
+
+# Catalogs that no process has loaded or stored for this long are removed
+DEFAULT_MAX_AGE = 24 * 3600.0
+
+
+def catalog_key(openapi_schema: Dict[str, Any], options: Dict[str, Any]) -> str:
+    """
+    A content hash of everything the converted tools depend on: the OpenAPI document, the conversion options and
+    the version of the converter.
+    """
+    from fastapi_mcp import __version__
+
+    document = {
+        "format_version": CATALOG_FORMAT_VERSION,
+        "fastapi_mcp_version": __version__,
+        "options": options,
+        "openapi": openapi_schema,
+    }
+    encoded = json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CatalogCache:
+    """
+    A directory of converted tool catalogs (the tools and operation map of an OpenAPI document), so that processes
+    serving the same app don't have to convert it again.
+
+    Each catalog is a JSON file named after its namespace (e.g. the server name) and its `catalog_key()`. Writes are
+    atomic (the file is written next to its final path, then renamed), so concurrent workers never see a partial
+    catalog.
+
+    Several apps, or versions of an app during a rolling deploy, can share a namespace and still be in use: a
+    catalog is only removed, when another one of its namespace is stored, once it hasn't been loaded or stored for
+    `max_age` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, "os.PathLike[str]"],
+        namespace: str = "catalog",
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.directory = Path(directory)
+        self.namespace = re.sub(r"[^A-Za-z0-9_.-]+", "-", namespace).strip("-") or "catalog"
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{self.namespace}-{key}.json"
+
+    def load(self, key: str) -> Optional[Tuple[List[types.Tool], Dict[str, Dict[str, Any]]]]:
+        """
+        Load the catalog stored for a key.
+
+        Returns:
+            The tools and operation map, or `None` if there's no valid catalog for the key
+        """
+        path = self.path_for(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                document = json.load(f)
+            if document.get("format_version") != CATALOG_FORMAT_VERSION or document.get("key") != key:
+                raise ValueError("stale catalog")
+            tools = [types.Tool.model_validate(tool) for tool in document["tools"]]
+            operation_map: Dict[str, Dict[str, Any]] = document["operation_map"]
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring invalid tool catalog {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Marks the catalog as in use
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return tools, operation_map
+
+    def store(self, key: str, tools: List[types.Tool], operation_map: Dict[str, Dict[str, Any]]) -> Path:
+        """Atomically store the catalog for a key, and remove the catalogs of the namespace no longer in use."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+        document = {
+            "format_version": CATALOG_FORMAT_VERSION,
+            "key": key,
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in tools],
+            "operation_map": operation_map,
+        }
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{self.namespace}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(Path(temp_path))
+            raise
+
+        catalog_name = re.compile(rf"{re.escape(self.namespace)}-[0-9a-f]{{64}}\.json")
+        now = time.time()
+        for stale_path in self.directory.glob(f"{self.namespace}-*.json"):
+            if stale_path == path or not catalog_name.fullmatch(stale_path.name):
+                continue
+            try:
+                unused_for = now - stale_path.stat().st_mtime
+            except OSError:
+                continue
+            if unused_for > self.max_age:
+                logger.debug(f"Removing stale tool catalog {stale_path}")
+                self._remove(stale_path)
+
+        return path
+
+    def _remove(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
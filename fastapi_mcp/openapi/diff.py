@@ -0,0 +1,33 @@
+from dataclasses import dataclass, field
+from typing import Collection, List, Sequence
+
+
+@dataclass
+class CatalogDiff:
+    """The tools that changed between two versions of a tool catalog."""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_catalogs(old_names: Sequence[str], new_names: Sequence[str], converted: Collection[str]) -> CatalogDiff:
+    """
+    Diff the tool names of two catalog versions.
+
+    Args:
+        old_names: The tool names before
+        new_names: The tool names after
+        converted: The operations whose tool was converted again, because the operation changed
+    """
+    old_set = set(old_names)
+    new_set = set(new_names)
+    return CatalogDiff(
+        added=[name for name in new_names if name not in old_set],
+        removed=[name for name in old_names if name not in new_set],
+        changed=[name for name in new_names if name in old_set and name in converted],
+    )
@@ -0,0 +1,211 @@
+import logging
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Set, Tuple
+
+import mcp.types as types
+from fastapi import FastAPI
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.openapi.utils import get_openapi
+from fastapi.routing import APIRoute
+
+from .convert import convert_operation_to_mcp_tool, get_operation_details
+from .utils import resolve_schema_references
+
+logger = logging.getLogger(__name__)
+
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch")
+
+
+@dataclass
+class IndexedOperation:
+    """What is known about an operation without generating its OpenAPI document."""
+
+    operation_id: str
+    path: str
+    method: str
+    tags: List[str]
+    security: List[Dict[str, List[str]]]
+    route: APIRoute
+
+
+def index_operations(app: FastAPI) -> List[IndexedOperation]:
+    """
+    List the operations of an app from its routes, in the same order as `get_openapi()` would, but without
+    generating any schema.
+    """
+    operations_by_path: Dict[str, List[IndexedOperation]] = {}
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.include_in_schema:
+            continue
+
+        operation_id = route.operation_id or route.unique_id
+        tags = [tag.value if isinstance(tag, Enum) else tag for tag in route.tags or []]
+        # The `security` requirements of the operation, as `get_openapi()` lists them
+        security = [
+            {requirement.security_scheme.scheme_name: list(requirement.scopes or [])}
+            for requirement in get_flat_dependant(route.dependant, skip_repeats=True).security_requirements
+        ]
+        for method in route.methods:
+            method = method.lower()
+            if method not in HTTP_METHODS:
+                logger.debug(f"Skipping non-HTTP method: {method}")
+                continue
+            operations_by_path.setdefault(route.path_format, []).append(
+                IndexedOperation(
+                    operation_id=operation_id,
+                    path=route.path_format,
+                    method=method,
+                    tags=tags,
+                    security=security,
+                    route=route,
+                )
+            )
+
+    return [operation for operations in operations_by_path.values() for operation in operations]
+
+
+class LazyToolCatalog:
+    """
+    The tools of an app, converted one operation at a time, the first time each one is needed.
+
+    Creating the catalog only walks the app's routes. The OpenAPI document of an operation, and the tool converted
+    from it, are generated on first access and then kept.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        describe_all_responses: bool = False,
+        describe_full_response_schema: bool = False,
+    ):
+        self.app = app
+        self.describe_all_responses = describe_all_responses
+        self.describe_full_response_schema = describe_full_response_schema
+
+        self.operations = self._index()
+        self._converted: Dict[str, Tuple[types.Tool, Dict[str, Any]]] = {}
+
+    def _index(self) -> Dict[str, IndexedOperation]:
+        operations: Dict[str, IndexedOperation] = {}
+        for operation in index_operations(self.app):
+            # Like the eager conversion, the last operation with a given ID wins
+            operations[operation.operation_id] = operation
+        return operations
+
+    def reindex(self) -> Set[str]:
+        """
+        Index the app's routes again, e.g. after routes were added at runtime. The conversions of the operations
+        that were removed or whose route changed are discarded.
+
+        Returns:
+            The IDs of the operations that are new or whose route changed
+        """
+        previous_operations = self.operations
+        self.operations = self._index()
+
+        changed: Set[str] = set()
+        for operation_id, operation in self.operations.items():
+            previous = previous_operations.get(operation_id)
+            if (
+                previous is None
+                or previous.route is not operation.route
+                or (previous.path, previous.method) != (operation.path, operation.method)
+            ):
+                changed.add(operation_id)
+                self._converted.pop(operation_id, None)
+
+        for operation_id in previous_operations:
+            if operation_id not in self.operations:
+                self._converted.pop(operation_id, None)
+
+        return changed
+
+    @property
+    def operation_ids(self) -> List[str]:
+        return list(self.operations)
+
+    @property
+    def converted_count(self) -> int:
+        return len(self._converted)
+
+    def openapi_index(self) -> Dict[str, Any]:
+        """
+        A skeleton OpenAPI document with only the operation IDs, tags and security requirements, e.g. for filtering
+        tools by tag.
+        """
+        paths: Dict[str, Dict[str, Any]] = {}
+        for operation in self.operations.values():
+            paths.setdefault(operation.path, {})[operation.method] = {
+                "operationId": operation.operation_id,
+                "tags": operation.tags,
+                "security": operation.security,
+            }
+        return {"paths": paths}
+
+    def tool(self, operation_id: str) -> types.Tool:
+        return self._convert(operation_id)[0]
+
+    def operation(self, operation_id: str) -> Dict[str, Any]:
+        return self._convert(operation_id)[1]
+
+    def warm(self, operation_ids: Iterable[str]) -> None:
+        """Convert the given operations ahead of their first use."""
+        for operation_id in operation_ids:
+            self._convert(operation_id)
+
+    def _convert(self, operation_id: str) -> Tuple[types.Tool, Dict[str, Any]]:
+        converted = self._converted.get(operation_id)
+        if converted is not None:
+            return converted
+
+        indexed = self.operations[operation_id]
+        openapi_schema = get_openapi(
+            title=self.app.title,
+            version=self.app.version,
+            openapi_version=self.app.openapi_version,
+            routes=[indexed.route],
+        )
+        resolved_openapi_schema = resolve_schema_references(openapi_schema, openapi_schema)
+        operation = resolved_openapi_schema["paths"][indexed.path][indexed.method]
+
+        tool = convert_operation_to_mcp_tool(
+            operation_id,
+            indexed.path,
+            indexed.method,
+            operation,
+            describe_all_responses=self.describe_all_responses,
+            describe_full_response_schema=self.describe_full_response_schema,
+        )
+        converted = (tool, get_operation_details(indexed.path, indexed.method, operation))
+        self._converted[operation_id] = converted
+        return converted
+
+
+class LazyOperationMap(Mapping[str, Dict[str, Any]]):
+    """
+    A read-only operation map backed by a `LazyToolCatalog`: lookups convert the operation on first access, while
+    membership tests and iteration don't convert anything.
+    """
+
+    def __init__(self, catalog: LazyToolCatalog, operation_ids: Iterable[str]):
+        self._catalog = catalog
+        self._operation_ids = dict.fromkeys(operation_ids)
+
+    def set_operation_ids(self, operation_ids: Iterable[str]) -> None:
+        self._operation_ids = dict.fromkeys(operation_ids)
+
+    def __getitem__(self, operation_id: str) -> Dict[str, Any]:
+        if operation_id not in self._operation_ids:
+            raise KeyError(operation_id)
+        return self._catalog.operation(operation_id)
+
+    def __contains__(self, operation_id: object) -> bool:
+        return operation_id in self._operation_ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._operation_ids)
+
+    def __len__(self) -> int:
+        return len(self._operation_ids)
@@ -0,0 +1,156 @@
+import base64
+import binascii
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import mcp.types as types
+from mcp.shared.exceptions import McpError
+from pydantic import PrivateAttr
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# The arguments `ServerSession` dumps results with, before sending them
+_SESSION_DUMP_ARGS = {"by_alias": True, "mode": "json", "exclude_none": True}
+
+
+class PreserializedServerResult(types.ServerResult):
+    """
+    A `ServerResult` that is dumped once, when created, instead of every time it is sent: the MCP session dumps
+    results with `model_dump()` before sending them, and this returns the dump made at creation.
+    """
+
+    _serialized: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, root: Any):
+        super().__init__(root)
+        self._serialized = super().model_dump(**_SESSION_DUMP_ARGS)
+
+    def model_dump(self, **kwargs: Any) -> Dict[str, Any]:  # type: ignore[override]
+        if kwargs == _SESSION_DUMP_ARGS:
+            return self._serialized
+        return super().model_dump(**kwargs)
+
+
+def catalog_version(catalog: Any) -> str:
+    """
+    A content hash of a tool catalog, as the version of the catalog in cursors: every worker serving the same
+    catalog issues and accepts the same cursors, and a cursor never outlives a change of the catalog.
+    """
+    encoded = json.dumps(catalog, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(version: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor: str, version: str, total: int) -> int:
+    """
+    Get the offset a cursor points to.
+
+    Raises:
+        McpError: If the cursor is invalid, or was issued for another version of the catalog
+    """
+    try:
+        cursor_version, _, raw_offset = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").rpartition(":")
+        offset = int(raw_offset)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise McpError(types.ErrorData(code=types.INVALID_PARAMS, message="Invalid cursor"))
+
+    if cursor_version != version:
+        raise McpError(
+            types.ErrorData(code=types.INVALID_PARAMS, message="Expired cursor: the tools changed, list them again")
+        )
+    if not 0 <= offset < total:
+        raise McpError(types.ErrorData(code=types.INVALID_PARAMS, message="Invalid cursor"))
+    return offset
+
+
+ToolListing = Tuple[int, Callable[[int, int], List[types.Tool]]]
+
+
+class _Listing:
+    def __init__(self, total: int, load: Callable[[int, int], List[types.Tool]]):
+        self.total = total
+        self.load = load
+        self.pages: Dict[int, PreserializedServerResult] = {}
+
+
+class ToolPages:
+    """
+    The pages of `tools/list` results, pre-serialized once per version of the tool catalog.
+
+    Cursors are opaque to clients, but encode the catalog version (see `catalog_version()`) and the offset of the
+    page. A cursor issued before the catalog changed is rejected, since the pages may have shifted: clients are
+    notified of the change with `notifications/tools/list_changed` and list the tools again.
+
+    Sessions that see different subsets of the catalog get different listings, each with its own pages, cached
+    under a key (e.g. the set of visible tools). The least recently used listings are evicted past `max_listings`.
+    """
+
+    def __init__(self, page_size: Optional[int] = None, max_listings: int = 64):
+        if page_size is not None and page_size <= 0:
+            raise ValueError("page_size must be positive")
+
+        self.page_size = page_size
+        self.max_listings = max_listings
+        self._version: Optional[str] = None
+        self._listings: "OrderedDict[Hashable, _Listing]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        version: str,
+        cursor: Optional[str],
+        listing: Callable[[], ToolListing],
+        key: Hashable = None,
+    ) -> PreserializedServerResult:
+        """
+        Get the page a cursor points to.
+
+        Args:
+            version: The current version of the catalog
+            cursor: The cursor of the page, or `None` for the first one
+            listing: Called, once per version and key, to get the number of tools listed and a function that
+                gets the tools of a page from its (start, end)
+            key: Identifies the listing, when sessions see different tools
+        """
+        if version != self._version:
+            self._listings.clear()
+            self._version = version
+
+        cached_listing = self._listings.get(key)
+        if cached_listing is None:
+            cached_listing = _Listing(*listing())
+            self._listings[key] = cached_listing
+            while len(self._listings) > self.max_listings:
+                self._listings.popitem(last=False)
+        else:
+            self._listings.move_to_end(key)
+
+        total = cached_listing.total
+        offset = 0 if cursor is None else decode_cursor(cursor, version, total)
+
+        page = cached_listing.pages.get(offset)
+        if page is not None:
+            self.hits += 1
+            return page
+
+        self.misses += 1
+        end = total if self.page_size is None else min(offset + self.page_size, total)
+        next_cursor = encode_cursor(version, end) if end < total else None
+        tools = cached_listing.load(offset, end)
+        page = PreserializedServerResult(types.ListToolsResult(tools=tools, nextCursor=next_cursor))
+        cached_listing.pages[offset] = page
+        return page
+
+    def clear(self) -> None:
+        self._listings.clear()
+        self._version = None
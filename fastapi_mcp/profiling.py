@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from types import CodeType, FrameType
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+# A stack, from its root to the frame being executed, as (code, line) pairs
+Stack = Tuple[Tuple[CodeType, int], ...]
+
+# The leaf of the stacks of calls that are suspended, e.g. waiting for the network or a thread pool
+AWAITING = "[awaiting]"
+
+_MAX_DEPTH = 128
+
+
+def arguments_hash(arguments: Optional[Dict[str, Any]]) -> str:
+    """A short, stable hash of tool arguments, to group the profiles of identical calls without storing them."""
+    encoded = json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _format_frame(code: CodeType, line: int) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{line})"
+
+
+class CallProfile:
+    """
+    The stack samples of a tool call, aggregated by stack. Stacks ending with `[awaiting]` are samples taken while
+    the call was suspended, the others while it was running on the event loop.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        tool_name: str,
+        arguments_hash: str,
+        started_at: float,
+        duration: float,
+        trigger: str,
+        error: bool,
+        interval: float,
+        stacks: Dict[Tuple[Stack, bool], int],
+    ):
+        self.id = id
+        self.tool_name = tool_name
+        self.arguments_hash = arguments_hash
+        self.started_at = started_at
+        self.duration = duration
+        self.trigger = trigger
+        self.error = error
+        self.interval = interval
+        self.samples = sum(stacks.values())
+        # Formatted once, when the profile is kept, rather than on every sample
+        self.stacks: Dict[str, int] = {}
+        for (stack, awaiting), count in stacks.items():
+            frames = [_format_frame(code, line) for code, line in stack]
+            if awaiting:
+                frames.append(AWAITING)
+            key = ";".join(frames)
+            self.stacks[key] = self.stacks.get(key, 0) + count
+
+    def collapsed(self) -> str:
+        """The stacks in the collapsed format of flame graph tools (e.g. `flamegraph.pl`, speedscope)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "tool": self.tool_name,
+            "arguments_hash": self.arguments_hash,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "trigger": self.trigger,
+            "error": self.error,
+            "samples": self.samples,
+            "interval": self.interval,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        profile = self.summary()
+        profile["stacks"] = [
+            {"stack": stack, "count": count}
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        ]
+        return profile
+
+
+class _ActiveCall:
+    __slots__ = ("task", "loop", "thread_id", "root", "coroutine", "stacks", "samples")
+
+    def __init__(self, task: "asyncio.Task[Any]", coroutine: Any):
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.coroutine = coroutine
+        self.root: Optional[FrameType] = getattr(coroutine, "cr_frame", None)
+        self.stacks: Dict[Tuple[Stack, bool], int] = {}
+        self.samples = 0
+
+
+class SlowCallProfiler:
+    """
+    Captures stack profiles of outlier tool calls: those slower than `threshold` seconds, and a `sample_rate`
+    fraction of all the calls.
+
+    Whether a call is slow is only known once it ends, so the stacks of every call are sampled while it runs, and
+    only the profiles of the calls that qualify are kept, in a ring buffer of the last `max_profiles`. The samples
+    are taken every `interval` seconds by a background thread, and only while calls are in flight. They cover
+    the execution of the tool call, including the FastAPI app when it is called in-process, and record where the
+    call was suspended when it wasn't running (e.g. waiting for the network, or a sync endpoint in the thread pool).
+
+    Each sample walks the stack of every call in flight, holding the GIL, so the overhead grows with the
+    concurrency and the sampling frequency: raise `interval` to lower it. While the event loop is busy, samples
+    are further apart than `interval`, since the sampler has to wait for the GIL.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = 1.0,
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        max_profiles: int = 100,
+        max_samples: int = 10000,
+    ):
+        if threshold is None and sample_rate <= 0.0:
+            raise ValueError("Either threshold or sample_rate must be set")
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if interval <= 0.0:
+            raise ValueError("interval must be positive")
+
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_samples = max_samples
+        self._profiles: Deque[CallProfile] = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._active: Dict[int, _ActiveCall] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def run(self, tool_name: str, arguments: Optional[Dict[str, Any]], call: Awaitable[T]) -> T:
+        """Await a tool call, profiling it."""
+        task = asyncio.current_task()
+        if task is None:
+            return await call
+
+        active = _ActiveCall(task, call)
+        key = id(active)
+        with self._lock:
+            self._active[key] = active
+        self._ensure_sampler()
+
+        sampled = self.sample_rate > 0.0 and random.random() < self.sample_rate
+        started_at = time.time()
+        start = time.perf_counter()
+        error = True
+        try:
+            result = await call
+            error = False
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                del self._active[key]
+
+            slow = self.threshold is not None and duration >= self.threshold
+            if slow or sampled:
+                self._profiles.append(
+                    CallProfile(
+                        id=next(self._ids),
+                        tool_name=tool_name,
+                        arguments_hash=arguments_hash(arguments),
+                        started_at=started_at,
+                        duration=duration,
+                        trigger="slow" if slow else "sampled",
+                        error=error,
+                        interval=self.interval,
+                        stacks=active.stacks,
+                    )
+                )
+
+    def profiles(self) -> List[CallProfile]:
+        """The profiles kept, most recent first."""
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[CallProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+    def _ensure_sampler(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._sample_forever, name="mcp-slow-call-profiler", daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def _sample_forever(self) -> None:
+        while True:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            time.sleep(self.interval)
+            # Calls are only added and removed under the lock, so a call's samples are complete once it's removed
+            with self._lock:
+                try:
+                    self._sample(list(self._active.values()))
+                except Exception as e:  # pragma: no cover
+                    logger.debug(f"Failed to sample the stacks of tool calls: {e!r}")
+
+    def _sample(self, active: List[_ActiveCall]) -> None:
+        frames = sys._current_frames()
+        running_tasks: Dict[int, Any] = {}
+        for call in active:
+            if call.samples >= self.max_samples or call.root is None:
+                continue
+
+            if call.thread_id not in running_tasks:
+                running_tasks[call.thread_id] = asyncio.current_task(call.loop)
+
+            if running_tasks[call.thread_id] is call.task:
+                stack = self._running_stack(frames.get(call.thread_id), call.root)
+                awaiting = False
+            else:
+                stack = self._awaiting_stack(call.coroutine)
+                awaiting = True
+
+            if stack:
+                key = (stack, awaiting)
+                call.stacks[key] = call.stacks.get(key, 0) + 1
+                call.samples += 1
+
+    @staticmethod
+    def _running_stack(frame: Optional[FrameType], root: FrameType) -> Stack:
+        # From the frame being executed up to the root frame of the call: the frames of the event loop below it
+        # aren't part of the call
+        frames = []
+        while frame is not None and len(frames) < _MAX_DEPTH:
+            frames.append((frame.f_code, frame.f_lineno))
+            if frame is root:
+                return tuple(reversed(frames))
+            frame = frame.f_back
+        # The root wasn't found: the task moved on between taking the frames and the current task
+        return ()
+
+    @staticmethod
+    def _awaiting_stack(coroutine: Any) -> Stack:
+        # Follow the chain of awaits of the suspended call, down to the awaitable it is waiting for
+        frames = []
+        while coroutine is not None and len(frames) < _MAX_DEPTH:
+            frame = getattr(coroutine, "cr_frame", None) or getattr(coroutine, "gi_frame", None)
+            if frame is None:
+                break
+            frames.append((frame.f_code, frame.f_lineno))
+            coroutine = getattr(coroutine, "cr_await", None) or getattr(coroutine, "gi_yieldfrom", None)
+        return tuple(frames)
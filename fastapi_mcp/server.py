@@ -1,16 +1,104 @@
-import json
+import os
+import time
+import weakref
+from uuid import uuid4
 import httpx
-from typing import Dict, Optional, Any, List, Union, Callable, Awaitable, Iterable, Literal, Sequence
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from contextlib import asynccontextmanager, nullcontext
+from typing import (
+    Dict,
+    Optional,
+    Any,
+    List,
+    Union,
+    Callable,
+    Awaitable,
+    AsyncIterator,
+    Iterable,
+    Literal,
+    Mapping,
+    Sequence,
+    Set,
+    Tuple,
+)
 from typing_extensions import Annotated, Doc
 
-from fastapi import FastAPI, Request, APIRouter, params
+from fastapi import FastAPI, HTTPException, Request, Response, APIRouter, params
 from fastapi.openapi.utils import get_openapi
-from mcp.server.lowlevel.server import Server
+from pydantic import AnyUrl
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.server.lowlevel.server import NotificationOptions, Server
+from mcp.server.models import InitializationOptions
+from mcp.server.session import ServerSession
+from mcp.shared.exceptions import McpError
+from mcp.shared.message import SessionMessage
 import mcp.types as types
 
-from fastapi_mcp.openapi.convert import convert_openapi_to_mcp_tools
+from fastapi_mcp.openapi.cache import CatalogCache, catalog_key
+from fastapi_mcp.openapi.convert import (
+    convert_openapi_to_mcp_tools,
+    convert_operation_to_mcp_tool,
+    get_operation_details,
+    iter_operations,
+)
+from fastapi_mcp.openapi.diff import CatalogDiff, diff_catalogs
+from fastapi_mcp.openapi.lazy import LazyOperationMap, LazyToolCatalog
+from fastapi_mcp.openapi.utils import resolve_schema_references
+from fastapi_mcp.execution.batch import (
+    BATCH_TOOL_NAME,
+    format_batch_results,
+    make_batch_tool,
+    parse_batch_calls,
+    run_batch,
+)
+from fastapi_mcp.execution.cache import CallKey, ResponseCache, call_key, credential_hash
+from fastapi_mcp.execution.coalesce import SingleFlight
+from fastapi_mcp.execution.direct import DirectDispatcher
+from fastapi_mcp.execution.limits import ConcurrencyLimiter
+from fastapi_mcp.execution.plan import (
+    PathConvertors,
+    RequestPlan,
+    compile_request_plan,
+    compile_request_plans,
+    index_path_convertors,
+    parameter_locations,
+)
+from fastapi_mcp.execution.resources import ResultStore, inline_uri
+from fastapi_mcp.execution.upstream import PooledTransport, create_upstream_client, warm_up_client
+from fastapi_mcp.execution.validation import ArgumentValidators
+from fastapi_mcp.execution.response import (
+    RESPONSE_MODES,
+    ResponseMode,
+    binary_content,
+    collect_streamed_response,
+    format_response_text,
+    is_text_content_type,
+    media_type_of,
+    read_body,
+)
+from fastapi_mcp.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MCPMetrics
+from fastapi_mcp.pagination import ToolListing, ToolPages, catalog_version
+from fastapi_mcp.profiling import SlowCallProfiler
+from fastapi_mcp.sessions import SessionStore
+from fastapi_mcp.tracing import SpanContext, Tracer
+from fastapi_mcp.transport.http import FastApiHttpTransport
+from fastapi_mcp.transport.messages import MessageContext, as_message_context
 from fastapi_mcp.transport.sse import FastApiSseTransport
-from fastapi_mcp.types import HTTPRequestInfo, AuthConfig
+from fastapi_mcp.types import (
+    HTTPRequestInfo,
+    AuthConfig,
+    CacheConfig,
+    ConcurrencyConfig,
+    RequestCaptureConfig,
+    UpstreamConfig,
+)
+from fastapi_mcp.visibility import (
+    SessionVisibility,
+    VisibilityIndex,
+    VisibilityPolicy,
+    resolve_visibility,
+    session_visibility,
+)
 
 import logging
 
@@ -19,10 +107,74 @@ logger = logging.getLogger(__name__)
 
 
 class LowlevelMCPServer(Server):
-    def call_tool(self):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # The connected sessions, to notify them when the tools change. See `FastApiMCP.refresh()`
+        self.sessions: "weakref.WeakSet[ServerSession]" = weakref.WeakSet()
+
+    def create_initialization_options(
+        self,
+        notification_options: Optional[NotificationOptions] = None,
+        experimental_capabilities: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> InitializationOptions:
+        # The tools can change at runtime, so advertise `tools.listChanged` by default
+        return super().create_initialization_options(
+            notification_options or NotificationOptions(tools_changed=True),
+            experimental_capabilities,
+        )
+
+    async def _handle_message(
+        self,
+        message: Any,
+        session: ServerSession,
+        lifespan_context: Any,
+        raise_exceptions: bool = False,
+    ):
+        self.sessions.add(session)
+        await super()._handle_message(message, session, lifespan_context, raise_exceptions)
+
+    def message_context(self) -> Optional[MessageContext]:
         """
-        A near-direct copy of `mcp.server.lowlevel.server.Server.call_tool()`, except that it looks for
-        the original HTTP request info in the MCP message, and passes it to the tool call handler.
+        The context of the request being handled: what the transport that received it knows about the HTTP request
+        that carried it. `None` outside of a request, or for messages that didn't come through our transports.
+        """
+        try:
+            context = self.request_context.request
+        except LookupError:
+            return None
+        return as_message_context(context)
+
+    def list_tools_page(self):
+        """
+        Like `mcp.server.lowlevel.server.Server.list_tools()`, except that the handler gets the cursor of the request,
+        and returns the whole result, so that it can paginate and pre-serialize it.
+        """
+
+        def decorator(func: Callable[[Optional[str]], Awaitable[types.ServerResult]]):
+            logger.debug("Registering handler for ListToolsRequest")
+
+            async def handler(req: types.ListToolsRequest):
+                return await func(req.params.cursor if req.params else None)
+
+            self.request_handlers[types.ListToolsRequest] = handler
+            return func
+
+        return decorator
+
+    def call_tool(
+        self,
+        validate_arguments: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        """
+        A near-direct copy of `mcp.server.lowlevel.server.Server.call_tool()`, except that it passes the original
+        HTTP request info, from the context of the message, to the tool call handler.
+
+        If given, `validate_arguments` is called with the tool name and arguments before the handler, and the
+        call fails with its error if it raises.
+
+        If given, `tracer` records how long the message waited before being handled, and the dispatch of the call,
+        in the trace started when the message was received.
         """
 
         def decorator(
@@ -33,16 +185,23 @@ class LowlevelMCPServer(Server):
         ):
             logger.debug("Registering handler for CallToolRequest")
 
-            async def handler(req: types.CallToolRequest):
+            async def call(req: types.CallToolRequest) -> types.ServerResult:
                 try:
-                    # Pull the original HTTP request info from the MCP message. It was injected in
-                    # `FastApiSseTransport.handle_fastapi_post_message()`
-                    if hasattr(req.params, "_http_request_info") and req.params._http_request_info is not None:
-                        http_request_info = HTTPRequestInfo.model_validate(req.params._http_request_info)
-                        results = await func(req.params.name, (req.params.arguments or {}), http_request_info)
+                    arguments = req.params.arguments or {}
+                    if validate_arguments is not None:
+                        validate_arguments(req.params.name, arguments)
+
+                    # The original HTTP request info, captured by the transport that received the message
+                    context = self.message_context()
+                    http_request_info = context.request_info if context is not None else None
+                    if http_request_info is not None:
+                        results = await func(req.params.name, arguments, http_request_info)
                     else:
-                        results = await func(req.params.name, (req.params.arguments or {}))
+                        results = await func(req.params.name, arguments)
                     return types.ServerResult(types.CallToolResult(content=list(results), isError=False))
+                except McpError:
+                    # Protocol-level errors (e.g. a concurrency limit being hit) are answered as JSON-RPC errors
+                    raise
                 except Exception as e:
                     return types.ServerResult(
                         types.CallToolResult(
@@ -51,6 +210,29 @@ class LowlevelMCPServer(Server):
                         )
                     )
 
+            async def handler(req: types.CallToolRequest):
+                if tracer is None:
+                    return await call(req)
+
+                # Carried by the context of the message, from the transport that received it
+                context = self.message_context()
+                parent = None
+                if context is not None:
+                    parent = SpanContext.from_traceparent(context.traceparent)
+                    if context.accepted_at is not None:
+                        tracer.start_span(
+                            "mcp.message.queue_wait",
+                            {"mcp.tool": req.params.name},
+                            parent=parent,
+                            start_time=context.accepted_at,
+                        ).end()
+
+                with tracer.start_span("mcp.tool.dispatch", {"mcp.tool": req.params.name}, parent=parent) as span:
+                    result = await call(req)
+                    if isinstance(result.root, types.CallToolResult) and result.root.isError:
+                        span.status = "error"
+                    return result
+
             self.request_handlers[types.CallToolRequest] = handler
             return func
 
@@ -89,7 +271,7 @@ class FastApiMCP:
             Doc(
                 """
                 Optional custom HTTP client to use for API calls to the FastAPI app.
-                Has to be an instance of `httpx.AsyncClient`.
+                Has to be an instance of `httpx.AsyncClient`. Cannot be used with `upstream`.
                 """
             ),
         ] = None,
@@ -113,6 +295,269 @@ class FastApiMCP:
             Optional[AuthConfig],
             Doc("Configuration for MCP authentication"),
         ] = None,
+        dispatch: Annotated[
+            Literal["http", "direct"],
+            Doc(
+                """
+                How tool calls reach the FastAPI app.
+
+                - `"http"` (default): every call is sent as an HTTP request through the HTTP client.
+                - `"direct"`: calls are dispatched in-process to the matching route's endpoint, skipping the
+                  HTTP request building, routing and JSON body round trip. Dependencies, validation, exception
+                  handlers and response models still run, but the app's middleware does not. Operations that
+                  can't be dispatched directly (e.g. form bodies) still go over HTTP. Ignored if a custom
+                  `http_client` or an `upstream` is given.
+                """
+            ),
+        ] = "http",
+        response_mode: Annotated[
+            ResponseMode,
+            Doc(
+                """
+                How JSON responses are turned into tool result text.
+
+                - `"pretty"` (default): parsed and re-encoded with indentation.
+                - `"compact"`: parsed and re-encoded without whitespace, which is smaller for the LLM to read.
+                - `"raw"`: the upstream body is forwarded as-is, decoded once to text, without ever being parsed.
+                  This is the cheapest option for large responses.
+                """
+            ),
+        ] = "pretty",
+        stream_results: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to read upstream responses incrementally instead of buffering them whole.
+
+                In streaming mode the body is forwarded as text (like `response_mode="raw"`), split into content
+                parts of at most `result_chunk_size` characters, and MCP progress notifications are sent as bytes
+                arrive (if the client asked for progress). At most `max_result_size` bytes are kept per call.
+
+                Note that the default in-process HTTP client (`httpx.ASGITransport`) buffers response bodies
+                itself; combine with `dispatch="direct"` or a remote HTTP client for truly incremental reads.
+                """
+            ),
+        ] = False,
+        result_chunk_size: Annotated[
+            int,
+            Doc("Maximum number of characters in each content part of a streamed tool result"),
+        ] = 64 * 1024,
+        max_result_size: Annotated[
+            Optional[int],
+            Doc(
+                """
+                Maximum number of response bytes kept for a streamed tool result. The rest of the body is read and
+                discarded, and the result notes the truncation. `None` disables the limit.
+                """
+            ),
+        ] = 10 * 1024 * 1024,
+        max_inline_binary_size: Annotated[
+            Optional[int],
+            Doc(
+                """
+                Binary responses (images, PDFs, files, etc.) are returned as image or embedded resource contents.
+                Those larger than this many bytes are not inlined: they are kept in a result store and the tool
+                result references them by URI, to be read with `resources/read`. `None` always inlines them.
+
+                Stored results can only be listed and read by the client they were fetched for: with the same
+                forwarded credential, or in the same session for calls without one.
+                """
+            ),
+        ] = 1024 * 1024,
+        result_store_size: Annotated[
+            int,
+            Doc(
+                """
+                Maximum total size, in bytes, of the results kept for `resources/read`. The least recently used
+                results are evicted first.
+                """
+            ),
+        ] = 64 * 1024 * 1024,
+        cache_config: Annotated[
+            Optional[CacheConfig],
+            Doc(
+                """
+                Configuration for caching the responses of GET tool calls. Caching is disabled if not provided.
+
+                Cached responses are keyed on the tool, its arguments and a hash of the forwarded credential, and
+                follow your app's `Cache-Control` and `ETag` headers. Counters are available in `response_cache.stats`.
+                Streamed tool results (`stream_results=True`) are never cached.
+                """
+            ),
+        ] = None,
+        concurrency_config: Annotated[
+            Optional[ConcurrencyConfig],
+            Doc(
+                """
+                Global, per-operation and per-tag limits on concurrent tool calls, with a bounded wait queue.
+                Calls that can't be queued fail right away with an MCP error. No limits apply if not provided.
+
+                Current usage is available in `concurrency_limiter.stats`.
+                """
+            ),
+        ] = None,
+        coalesce_calls: Annotated[
+            bool,
+            Doc(
+                """
+                Whether identical tool calls that are in flight at the same time share a single upstream request.
+
+                Calls are identical if they have the same tool, arguments and forwarded credential. Only calls with
+                a method in `coalesce_methods` are coalesced, and streamed results are never coalesced.
+                Counters are available in `single_flight.stats`.
+                """
+            ),
+        ] = False,
+        coalesce_methods: Annotated[
+            Sequence[str],
+            Doc(
+                """
+                HTTP methods whose calls may be coalesced. Only add methods that are idempotent in your app.
+                """
+            ),
+        ] = ("get",),
+        batch_tool: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to add a built-in `batch_call` tool, that runs several tool calls concurrently and returns
+                all of their results (or errors) in a single response, saving the client a round trip per call.
+
+                Each call of the batch goes through the same path as a regular tool call, including the forwarding
+                of the `Authorization` header and the cache and concurrency limits.
+                """
+            ),
+        ] = False,
+        batch_max_parallelism: Annotated[
+            int,
+            Doc("The maximum number of calls of a single batch that run at the same time"),
+        ] = 8,
+        batch_max_items: Annotated[
+            int,
+            Doc("The maximum number of calls in a single batch"),
+        ] = 50,
+        upstream: Annotated[
+            Optional[UpstreamConfig],
+            Doc(
+                """
+                Send tool calls to a deployed instance of the API instead of calling the FastAPI app in-process,
+                e.g. when the MCP server runs as a separate fleet. Configures the base URL, timeouts, connection
+                pool, keepalive, HTTP/2 and the warm-up of connections on startup.
+
+                The state of the connection pool is available from `pool_stats()`.
+                """
+            ),
+        ] = None,
+        lazy_tools: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to convert operations to tools on demand, for a fast startup on large APIs.
+
+                On startup, only the app's routes are indexed. Each tool's input schema and description are
+                generated the first time the tool is listed or called. Call `warm()` to convert all of them ahead
+                of time instead.
+                """
+            ),
+        ] = False,
+        catalog_cache_dir: Annotated[
+            Optional[Union[str, os.PathLike]],
+            Doc(
+                """
+                A directory where the tools converted from the OpenAPI schema are persisted, keyed by a hash of the
+                schema and the conversion options. Later starts with the same schema load them instead of converting
+                the schema again, and `refresh()` stores the catalog of the updated schema. Not used with
+                `lazy_tools`, which doesn't convert anything on startup.
+
+                The directory can be shared by several apps, and versions of an app: catalogs are only removed once
+                no process has loaded or stored them for a day.
+                """
+            ),
+        ] = None,
+        tools_page_size: Annotated[
+            Optional[int],
+            Doc(
+                """
+                The maximum number of tools per page of `tools/list` results. Clients get the next pages with the
+                returned cursor. `None` (the default) returns all the tools in one page.
+
+                Pages are serialized once and reused until the tools change (with `refresh()`, or by assigning
+                `tools`).
+                """
+            ),
+        ] = None,
+        visibility_policy: Annotated[
+            Optional[VisibilityPolicy],
+            Doc(
+                """
+                A function (sync or async) that decides which tools a session may see, e.g. from the scopes or roles
+                of its access token. It's called once per session, with the `HTTPRequestInfo` of the request that
+                opened it, and returns a `ToolVisibility`, or `None` to show all the tools.
+
+                The tools hidden from a session are left out of its `tools/list` results, and calling them fails as
+                if they didn't exist, including from `batch_call`. This applies on top of the operation and tag
+                filters.
+                """
+            ),
+        ] = None,
+        validate_arguments: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to validate the arguments of tool calls against the tool's input schema before calling
+                the API, so that invalid calls fail right away with the errors of each field, instead of a 422
+                from the app.
+
+                Like FastAPI, strings are accepted for numbers and booleans if they can be converted, and a single
+                value for a list parameter. Each tool's schema is compiled into a validator once: on startup, or on
+                the first call with `lazy_tools`. Off by default: the app still validates every call itself.
+                """
+            ),
+        ] = False,
+        collect_metrics: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to record metrics of the tool calls, their upstream requests and the SSE transport, in
+                `metrics`. Recording is a few dict updates per call, cheap enough to leave on. See
+                `mount(metrics=True)` to expose them to Prometheus.
+                """
+            ),
+        ] = True,
+        tracer: Annotated[
+            Optional[Tracer],
+            Doc(
+                """
+                Records a trace of each tool call, with spans for the receipt of the MCP message, its wait before
+                being handled, the dispatch of the tool call, the upstream request and the formatting of the
+                response. The trace context is forwarded to the API in a `traceparent` header, and continued from
+                the client's `traceparent`, if it sends one.
+
+                The spans are handed to the exporter of the tracer, e.g. an `InMemorySpanExporter` in tests.
+                """
+            ),
+        ] = None,
+        profiler: Annotated[
+            Optional[SlowCallProfiler],
+            Doc(
+                """
+                Captures stack profiles of the tool calls slower than its threshold, and of a sample of the others,
+                to diagnose tail latency in production. The profiles cover the API call, including the FastAPI app
+                when it's called in-process, and are kept in a ring buffer. See `mount(profiles=True)` to expose
+                them.
+                """
+            ),
+        ] = None,
+        request_capture: Annotated[
+            Optional[RequestCaptureConfig],
+            Doc(
+                """
+                Which parts of the HTTP request carrying an MCP message are captured for its handler, as the
+                `HTTPRequestInfo` passed to tool calls. Only the `Authorization` header by default, which is
+                forwarded to the API. Captured when a tool call asks for it, not for every message.
+                """
+            ),
+        ] = None,
     ):
         # Validate operation and tag filtering options
         if include_operations is not None and exclude_operations is not None:
@@ -121,9 +566,37 @@ class FastApiMCP:
         if include_tags is not None and exclude_tags is not None:
             raise ValueError("Cannot specify both include_tags and exclude_tags")
 
-        self.operation_map: Dict[str, Dict[str, Any]]
-        self.tools: List[types.Tool]
-        self.server: Server
+        if dispatch not in ("http", "direct"):
+            raise ValueError(f"Invalid dispatch mode: {dispatch}")
+
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"Invalid response mode: {response_mode}")
+
+        if result_chunk_size <= 0:
+            raise ValueError("result_chunk_size must be positive")
+
+        if http_client is not None and upstream is not None:
+            raise ValueError("Cannot specify both http_client and upstream")
+
+        if batch_max_parallelism <= 0 or batch_max_items <= 0:
+            raise ValueError("batch_max_parallelism and batch_max_items must be positive")
+
+        self.operation_map: Mapping[str, Dict[str, Any]]
+        self._tools: Optional[List[types.Tool]] = None
+        self._builtin_tools: List[types.Tool] = []
+        self._tool_catalog: Optional[LazyToolCatalog] = None
+        self._openapi_schema: Dict[str, Any] = {}
+        self._all_tools: Dict[str, types.Tool] = {}
+        self._all_operations: Dict[str, Dict[str, Any]] = {}
+        # A hash of the catalog, computed when tools are first listed after it changed
+        self._catalog_version: Optional[str] = None
+        self._tool_pages = ToolPages(tools_page_size)
+        self._visibility_index = VisibilityIndex([], {})
+        self.server: LowlevelMCPServer
+        self._request_plans: Dict[str, RequestPlan] = {}
+        # The operations listed as tools: all of `operation_map`, unless the filters match none of them
+        self._listed_operations: List[str] = []
+        self._path_convertors: Optional[PathConvertors] = None
 
         self.fastapi = fastapi
         self.name = name or self.fastapi.title or "FastAPI MCP"
@@ -137,20 +610,268 @@ class FastApiMCP:
         self._include_tags = include_tags
         self._exclude_tags = exclude_tags
         self._auth_config = auth_config
+        self._response_mode = response_mode
+        self._stream_results = stream_results
+        self._result_chunk_size = result_chunk_size
+        self._max_result_size = max_result_size
+        self._max_inline_binary_size = max_inline_binary_size
+        self.result_store: Optional[ResultStore] = (
+            ResultStore(result_store_size) if max_inline_binary_size is not None else None
+        )
+        # The owners of the stored results of the sessions whose calls have no credential
+        self._session_owners: "weakref.WeakKeyDictionary[ServerSession, str]" = weakref.WeakKeyDictionary()
+        self._batch_tool = batch_tool
+        self._batch_max_parallelism = batch_max_parallelism
+        self._batch_max_items = batch_max_items
+        self._lazy_tools = lazy_tools
+        self._visibility_policy = visibility_policy
+        self.argument_validators: Optional[ArgumentValidators] = ArgumentValidators() if validate_arguments else None
+        self.metrics: Optional[MCPMetrics] = MCPMetrics() if collect_metrics else None
+        self._tracer = tracer
+        self.profiler = profiler
+        self._request_capture = request_capture or RequestCaptureConfig()
+        self._catalog_cache: Optional[CatalogCache] = (
+            CatalogCache(catalog_cache_dir, namespace=self.name) if catalog_cache_dir is not None else None
+        )
+
+        self.response_cache: Optional[ResponseCache] = None
+        self._invalidate_on_mutation = False
+        if cache_config is not None:
+            cache_config = CacheConfig.model_validate(cache_config)
+            self.response_cache = ResponseCache(
+                max_entries=cache_config.max_entries,
+                ttl=cache_config.ttl,
+                respect_cache_control=cache_config.respect_cache_control,
+            )
+            self._invalidate_on_mutation = cache_config.invalidate_on_mutation
+
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if coalesce_calls else None
+        self._coalesce_methods = frozenset(method.lower() for method in coalesce_methods)
+
+        self.concurrency_limiter: Optional[ConcurrencyLimiter] = None
+        if concurrency_config is not None:
+            concurrency_config = ConcurrencyConfig.model_validate(concurrency_config)
+            self.concurrency_limiter = ConcurrencyLimiter(
+                max_concurrent_calls=concurrency_config.max_concurrent_calls,
+                per_operation=concurrency_config.per_operation,
+                per_tag=concurrency_config.per_tag,
+                max_queue_size=concurrency_config.max_queue_size,
+                queue_timeout=concurrency_config.queue_timeout,
+            )
 
         if self._auth_config:
             self._auth_config = self._auth_config.model_validate(self._auth_config)
 
-        self._http_client = http_client or httpx.AsyncClient(
+        self._upstream = UpstreamConfig.model_validate(upstream) if upstream is not None else None
+        # The transport of the `upstream` client, which keeps the state of its connection pool
+        self._upstream_transport: Optional[PooledTransport] = None
+        self._owns_http_client = http_client is None
+        self._http_client = http_client or self._create_http_client()
+        self._lifespan_apps: List[FastAPI] = []
+        self._http_transports: List[FastApiHttpTransport] = []
+        self._sse_transports: List[FastApiSseTransport] = []
+
+        self._direct_dispatcher: Optional[DirectDispatcher] = None
+        if dispatch == "direct" and http_client is None and self._upstream is None:
+            self._direct_dispatcher = DirectDispatcher(self.fastapi, self._base_url)
+
+        self.setup_server()
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        if self._upstream is not None:
+            client, self._upstream_transport = create_upstream_client(self._upstream)
+            return client
+
+        return httpx.AsyncClient(
             transport=httpx.ASGITransport(app=self.fastapi, raise_app_exceptions=False),
             base_url=self._base_url,
             timeout=10.0,
         )
 
-        self.setup_server()
+    async def start(self) -> None:
+        """
+        Get the HTTP client ready for tool calls: re-open it if it was closed, and warm up the connections to the
+        `upstream` API. Called on startup of the app the MCP server is mounted to.
+        """
+        if self._owns_http_client and self._http_client.is_closed:
+            self._http_client = self._create_http_client()
+            for plan in self._request_plans.values():
+                plan.bind(self._http_client)
 
-    def setup_server(self) -> None:
-        openapi_schema = get_openapi(
+        if self._upstream is not None:
+            await warm_up_client(self._http_client, self._upstream)
+
+    async def aclose(self) -> None:
+        """
+        End the sessions of the streamable HTTP transport, stop relaying the messages of the SSE sessions, and close
+        the HTTP client, if it was created by `FastApiMCP`. Called on shutdown of the app the MCP server is mounted to.
+        """
+        for transport in self._http_transports:
+            await transport.aclose()
+        for sse_transport in self._sse_transports:
+            await sse_transport.aclose()
+
+        if self._owns_http_client and not self._http_client.is_closed:
+            await self._http_client.aclose()
+
+    def pool_stats(self) -> Optional[Dict[str, Optional[int]]]:
+        """
+        The state of the `upstream` connection pool (connections in use and idle, requests waiting for a
+        connection, and the total number of waits), or `None` when the calls don't go through a pool.
+        """
+        if self._upstream_transport is None:
+            return None
+        return self._upstream_transport.pool_stats()
+
+    def _manage_lifespan(self, app: FastAPI) -> None:
+        """Start and close the HTTP client, and the sessions of the transports, with the app."""
+        if not (self._owns_http_client or self._http_transports or self._sse_transports) or any(
+            managed is app for managed in self._lifespan_apps
+        ):
+            return
+        self._lifespan_apps.append(app)
+
+        app_lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI) -> AsyncIterator[Any]:
+            async with app_lifespan(app) as state:
+                await self.start()
+                try:
+                    yield state
+                finally:
+                    await self.aclose()
+
+        app.router.lifespan_context = lifespan
+
+    @property
+    def tools(self) -> List[types.Tool]:
+        """The tools of the MCP server. With `lazy_tools`, this converts the operations not converted yet."""
+        if self._tools is None:
+            assert self._tool_catalog is not None
+            self._tools = [self._tool_catalog.tool(operation_id) for operation_id in self._listed_operations]
+            self._tools.extend(self._builtin_tools)
+        return self._tools
+
+    @tools.setter
+    def tools(self, tools: List[types.Tool]) -> None:
+        self._tools = tools
+        self._catalog_changed()
+
+    def _catalog_changed(self) -> None:
+        self._catalog_version = None
+        self._tool_pages.clear()
+
+    def _current_catalog_version(self) -> str:
+        if self._catalog_version is None:
+            if self._tools is not None:
+                catalog: List[Any] = [tool.model_dump(mode="json", exclude_none=True) for tool in self._tools]
+            else:
+                # Without converting the operations of a lazy catalog: their routes stand for their tools
+                assert self._tool_catalog is not None
+                operations = self._tool_catalog.operations
+                catalog = [
+                    [name, operations[name].path, operations[name].method, operations[name].tags]
+                    for name in self._listed_operations
+                ]
+                catalog.extend(tool.model_dump(mode="json", exclude_none=True) for tool in self._builtin_tools)
+            self._catalog_version = catalog_version(catalog)
+        return self._catalog_version
+
+    def _count_tools(self) -> int:
+        if self._tools is not None:
+            return len(self._tools)
+        return len(self._listed_operations) + len(self._builtin_tools)
+
+    def _load_tools(self, start: int, end: int) -> List[types.Tool]:
+        """The tools in a range of `tools`, without converting the others with `lazy_tools`."""
+        if self._tools is not None:
+            return self._tools[start:end]
+        return self._load_lazy_tools(self._listed_operations, start, end)
+
+    def _load_lazy_tools(self, names: List[str], start: int, end: int) -> List[types.Tool]:
+        assert self._tool_catalog is not None
+        return [
+            self._tool_catalog.tool(names[index]) if index < len(names) else self._builtin_tools[index - len(names)]
+            for index in range(start, end)
+        ]
+
+    def _session_mask(self) -> Optional[int]:
+        """The operations visible to the current session, or `None` if it isn't restricted."""
+        visibility = session_visibility.get()
+        if visibility is None:
+            return None
+        mask = visibility.mask(self._visibility_index)
+        return None if mask == self._visibility_index.all else mask
+
+    def _list_tools(self, mask: Optional[int]) -> ToolListing:
+        """The number of tools visible with a mask, and a function to load a range of them."""
+        if mask is None:
+            return self._count_tools(), self._load_tools
+
+        index = self._visibility_index
+        builtin_names = {tool.name for tool in self._builtin_tools}
+        if self._tools is not None:
+            tools = [tool for tool in self._tools if tool.name in builtin_names or index.contains(mask, tool.name)]
+            return len(tools), lambda start, end: tools[start:end]
+
+        names = [name for name in self._listed_operations if index.contains(mask, name)]
+        return len(names) + len(self._builtin_tools), lambda start, end: self._load_lazy_tools(names, start, end)
+
+    def _validate_arguments(self, tool_name: str, arguments: Dict[str, Any]) -> None:
+        """
+        Validate the arguments of a call against the tool's input schema, with its compiled validator.
+
+        Raises:
+            InvalidArgumentsError: If the arguments don't match the schema
+        """
+        if self.argument_validators is None or tool_name not in self.operation_map:
+            # Built-in and unknown tools are left to the call handler
+            return
+
+        # Don't tell sessions about the fields of tools they can't see
+        self._check_tool_visible(tool_name)
+        validator = self.argument_validators.get(
+            tool_name, lambda: self._input_schema(tool_name), lambda: self._parameter_names(tool_name)
+        )
+        validator.validate(arguments)
+
+    def _input_schema(self, tool_name: str) -> Dict[str, Any]:
+        if self._tool_catalog is not None:
+            return self._tool_catalog.tool(tool_name).inputSchema
+        return self._all_tools[tool_name].inputSchema
+
+    def _parameter_names(self, tool_name: str) -> List[str]:
+        """The arguments of a tool that are sent as path, query or header parameters, rather than in the body."""
+        plan = self._request_plans.get(tool_name)
+        if plan is not None:
+            return list(plan.locations)
+        try:
+            return list(parameter_locations(self.operation_map[tool_name]))
+        except ValueError:
+            # Not a valid operation: its calls fail anyway
+            return []
+
+    def _is_tool_visible(self, tool_name: str) -> bool:
+        mask = self._session_mask()
+        return mask is None or self._visibility_index.contains(mask, tool_name)
+
+    def _check_tool_visible(self, tool_name: str) -> None:
+        if not self._is_tool_visible(tool_name):
+            # Hidden tools fail like unknown ones, so that sessions can't probe for them
+            raise Exception(f"Unknown tool: {tool_name}")
+
+    def warm(self) -> None:
+        """
+        Convert all the operations to tools and compile their request plans now, instead of on first use.
+        Only useful with `lazy_tools`.
+        """
+        self.tools
+        for operation_id in self.operation_map:
+            self._get_request_plan(operation_id, self.operation_map)
+
+    def _generate_openapi(self) -> Dict[str, Any]:
+        return get_openapi(
             title=self.fastapi.title,
             version=self.fastapi.version,
             openapi_version=self.fastapi.openapi_version,
@@ -158,25 +879,268 @@ class FastApiMCP:
             routes=self.fastapi.routes,
         )
 
-        all_tools, self.operation_map = convert_openapi_to_mcp_tools(
-            openapi_schema,
+    def _setup_tools(self) -> None:
+        openapi_schema = self._generate_openapi()
+
+        all_tools, self.operation_map = self._convert_openapi(openapi_schema)
+
+        # Kept to diff against in `refresh()`
+        self._openapi_schema = openapi_schema
+        self._all_tools = {tool.name: tool for tool in all_tools}
+        self._all_operations = dict(self.operation_map)
+        self._visibility_index = VisibilityIndex(self._all_tools, openapi_schema)
+
+        # Filter tools based on operation IDs and tags
+        self.tools = self._filter_tools(all_tools) + self._builtin_tools
+
+        # Precompile how each operation's arguments map onto an HTTP request, so tool calls don't have to
+        self._path_convertors = None
+        self._request_plans = compile_request_plans(self.operation_map, self._http_client, self._route_convertors())
+        if self._direct_dispatcher is not None:
+            self._direct_dispatcher.compile(self._request_plans)
+        if self.argument_validators is not None:
+            self.argument_validators.clear()
+            self.argument_validators.compile(
+                {name: self._all_tools[name].inputSchema for name in self.operation_map},
+                {name: self._parameter_names(name) for name in self.operation_map},
+            )
+
+    def _convert_openapi(self, openapi_schema: Dict[str, Any]) -> Tuple[List[types.Tool], Dict[str, Dict[str, Any]]]:
+        """Convert the OpenAPI schema to tools, or load the result of a previous conversion from the catalog cache."""
+        if self._catalog_cache is not None:
+            key = catalog_key(openapi_schema, self._conversion_options())
+            catalog = self._catalog_cache.load(key)
+            if catalog is not None:
+                logger.debug(f"Loaded {len(catalog[0])} tools from {self._catalog_cache.path_for(key)}")
+                return catalog
+
+        tools, operation_map = convert_openapi_to_mcp_tools(openapi_schema, **self._conversion_options())
+        self._store_catalog(openapi_schema, tools, operation_map)
+        return tools, operation_map
+
+    def _conversion_options(self) -> Dict[str, Any]:
+        return {
+            "describe_all_responses": self._describe_all_responses,
+            "describe_full_response_schema": self._describe_full_response_schema,
+        }
+
+    def _store_catalog(
+        self, openapi_schema: Dict[str, Any], tools: List[types.Tool], operation_map: Dict[str, Dict[str, Any]]
+    ) -> None:
+        if self._catalog_cache is None:
+            return
+        try:
+            self._catalog_cache.store(catalog_key(openapi_schema, self._conversion_options()), tools, operation_map)
+        except OSError as e:
+            logger.warning(f"Failed to store the tool catalog in {self._catalog_cache.directory}: {e}")
+
+    def _setup_lazy_tools(self) -> None:
+        # Only index the operations: their tools and request plans are built on first use
+        self._tool_catalog = LazyToolCatalog(
+            self.fastapi,
             describe_all_responses=self._describe_all_responses,
             describe_full_response_schema=self._describe_full_response_schema,
         )
+        operation_ids = self._tool_catalog.operation_ids
+        self._visibility_index = VisibilityIndex(operation_ids, self._tool_catalog.openapi_index())
+        self._listed_operations, callable_operations = self._select_operations(operation_ids)
+        self.operation_map = LazyOperationMap(self._tool_catalog, callable_operations)
+        self._tools = None
+        self._catalog_changed()
+        self._request_plans = {}
+        self._path_convertors = None
+        if self._direct_dispatcher is not None:
+            self._direct_dispatcher.compile(self._request_plans)
+        if self.argument_validators is not None:
+            self.argument_validators.clear()
+
+    async def refresh(self) -> CatalogDiff:
+        """
+        Update the tools after the app's routes changed at runtime (or the filters changed, see `set_filters()`),
+        without replacing the MCP server, so connected sessions keep working.
 
-        # Filter tools based on operation IDs and tags
-        self.tools = self._filter_tools(all_tools, openapi_schema)
+        Only the operations that were added or changed are converted again. `tools` and `operation_map` are updated
+        in place, and if any tool was added, removed or changed, the connected sessions are sent a
+        `notifications/tools/list_changed`.
+
+        Returns:
+            The tools that were added, removed and changed
+        """
+        previous_names = list(self.operation_map)
+        previous_listed = self._listed_operations
+        self._path_convertors = None
+
+        if self._tool_catalog is not None:
+            converted = self._tool_catalog.reindex()
+            operation_ids = self._tool_catalog.operation_ids
+            self._visibility_index = VisibilityIndex(operation_ids, self._tool_catalog.openapi_index())
+            names, operation_names = self._select_operations(operation_ids)
+            self._check_builtin_tools(names)
+
+            assert isinstance(self.operation_map, LazyOperationMap)
+            self.operation_map.set_operation_ids(operation_names)
+            self._tools = None
+            self._catalog_changed()
+        else:
+            converted = self._reconvert_openapi()
+            self._visibility_index = VisibilityIndex(list(self._all_operations), self._openapi_schema)
+            names, operation_names = self._select_operations(list(self._all_operations))
+            self._check_builtin_tools(names)
+
+            assert isinstance(self.operation_map, dict) and self._tools is not None
+            self.operation_map.clear()
+            self.operation_map.update((name, self._all_operations[name]) for name in operation_names)
+            self._tools[:] = [self._all_tools[name] for name in names] + self._builtin_tools
+            self._catalog_changed()
+
+        self._listed_operations = names
+        diff = diff_catalogs(previous_listed, names, converted)
+
+        for name in list(self._request_plans):
+            if name in converted or name not in self.operation_map:
+                del self._request_plans[name]
+        if self.argument_validators is not None:
+            for name in set(previous_names) | converted:
+                if name in converted or name not in self.operation_map:
+                    self.argument_validators.discard(name)
+        if self._tool_catalog is None:
+            missing_operations = {
+                name: operation for name, operation in self.operation_map.items() if name not in self._request_plans
+            }
+            self._request_plans.update(
+                compile_request_plans(missing_operations, self._http_client, self._route_convertors())
+            )
+            if self.argument_validators is not None:
+                missing_validators = [name for name in self.operation_map if name not in self.argument_validators]
+                self.argument_validators.compile(
+                    {name: self._all_tools[name].inputSchema for name in missing_validators},
+                    {name: self._parameter_names(name) for name in missing_validators},
+                )
+        if self._direct_dispatcher is not None:
+            self._direct_dispatcher.compile(self._request_plans)
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.clear_cache()
+
+        if diff.has_changes:
+            logger.info(
+                f"Tools refreshed: {len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed"
+            )
+            if self.response_cache is not None:
+                self.response_cache.clear()
+            await self._notify_tool_list_changed()
+
+        return diff
+
+    async def set_filters(
+        self,
+        include_operations: Optional[List[str]] = None,
+        exclude_operations: Optional[List[str]] = None,
+        include_tags: Optional[List[str]] = None,
+        exclude_tags: Optional[List[str]] = None,
+    ) -> CatalogDiff:
+        """
+        Replace the operation and tag filters, and `refresh()` the tools accordingly.
+        """
+        if include_operations is not None and exclude_operations is not None:
+            raise ValueError("Cannot specify both include_operations and exclude_operations")
+
+        if include_tags is not None and exclude_tags is not None:
+            raise ValueError("Cannot specify both include_tags and exclude_tags")
+
+        self._include_operations = include_operations
+        self._exclude_operations = exclude_operations
+        self._include_tags = include_tags
+        self._exclude_tags = exclude_tags
+        return await self.refresh()
+
+    def _reconvert_openapi(self) -> Set[str]:
+        """
+        Generate the OpenAPI schema again, and convert the operations that were added or changed since the last time.
+
+        Returns:
+            The IDs of the operations that were converted
+        """
+        openapi_schema = self._generate_openapi()
+        if openapi_schema == self._openapi_schema:
+            return set()
+
+        previous_schema = resolve_schema_references(self._openapi_schema, self._openapi_schema)
+        previous_operations = {
+            operation_id: (path, method, operation)
+            for operation_id, path, method, operation in iter_operations(previous_schema, log_skipped=False)
+        }
+
+        all_tools: Dict[str, types.Tool] = {}
+        all_operations: Dict[str, Dict[str, Any]] = {}
+        converted: Set[str] = set()
+
+        resolved_schema = resolve_schema_references(openapi_schema, openapi_schema)
+        for operation_id, path, method, operation in iter_operations(resolved_schema, log_skipped=False):
+            if operation_id in self._all_tools and previous_operations.get(operation_id) == (path, method, operation):
+                all_tools[operation_id] = self._all_tools[operation_id]
+                all_operations[operation_id] = self._all_operations[operation_id]
+                continue
+
+            all_tools[operation_id] = convert_operation_to_mcp_tool(
+                operation_id,
+                path,
+                method,
+                operation,
+                describe_all_responses=self._describe_all_responses,
+                describe_full_response_schema=self._describe_full_response_schema,
+            )
+            all_operations[operation_id] = get_operation_details(path, method, operation)
+            converted.add(operation_id)
+
+        self._openapi_schema = openapi_schema
+        self._all_tools = all_tools
+        self._all_operations = all_operations
+        # So that the next starts load the catalog of the schema as it is now
+        self._store_catalog(openapi_schema, list(all_tools.values()), all_operations)
+        return converted
+
+    def _check_builtin_tools(self, operation_ids: Iterable[str]) -> None:
+        if self._batch_tool and BATCH_TOOL_NAME in operation_ids:
+            raise ValueError(f"Cannot add the {BATCH_TOOL_NAME} tool, an operation with the same ID already exists")
+
+    async def _notify_tool_list_changed(self) -> None:
+        for session in list(self.server.sessions):
+            try:
+                await session.send_tool_list_changed()
+            except Exception as e:
+                # The session is gone
+                logger.debug(f"Failed to notify a session of the tool list change: {e!r}")
+                self.server.sessions.discard(session)
+
+    def setup_server(self) -> None:
+        self._builtin_tools = []
+        if self._batch_tool:
+            self._builtin_tools.append(make_batch_tool(self._batch_max_items))
+
+        if self._lazy_tools:
+            self._setup_lazy_tools()
+        else:
+            self._setup_tools()
+
+        self._check_builtin_tools(self.operation_map)
 
         mcp_server: LowlevelMCPServer = LowlevelMCPServer(self.name, self.description)
 
-        @mcp_server.list_tools()
-        async def handle_list_tools() -> List[types.Tool]:
-            return self.tools
+        @mcp_server.list_tools_page()
+        async def handle_list_tools(cursor: Optional[str]) -> types.ServerResult:
+            mask = self._session_mask()
+            return self._tool_pages.get(
+                self._current_catalog_version(), cursor, lambda: self._list_tools(mask), key=mask
+            )
 
-        @mcp_server.call_tool()
+        @mcp_server.call_tool(validate_arguments=self._validate_arguments, tracer=self._tracer)
         async def handle_call_tool(
             name: str, arguments: Dict[str, Any], http_request_info: Optional[HTTPRequestInfo] = None
         ) -> List[Union[types.TextContent, types.ImageContent, types.EmbeddedResource]]:
+            if self._batch_tool and name == BATCH_TOOL_NAME:
+                return await self._execute_batch(arguments, http_request_info)
+
+            self._check_tool_visible(name)
             return await self._execute_api_tool(
                 client=self._http_client,
                 tool_name=name,
@@ -185,6 +1149,32 @@ class FastApiMCP:
                 http_request_info=http_request_info,
             )
 
+        if self.result_store is not None:
+            result_store = self.result_store
+
+            # Sessions only get to see the results stored for them, of the tools they can see
+            @mcp_server.list_resources()
+            async def handle_list_resources() -> List[types.Resource]:
+                owner = self._result_owner(self._request_credential())
+                return [
+                    types.Resource(
+                        uri=AnyUrl(result.uri),
+                        name=f"Result of {result.tool_name}",
+                        mimeType=result.mime_type,
+                        size=len(result.data),
+                    )
+                    for result in result_store.list(owner)
+                    if self._is_tool_visible(result.tool_name)
+                ]
+
+            @mcp_server.read_resource()
+            async def handle_read_resource(uri: AnyUrl) -> List[ReadResourceContents]:
+                result = result_store.get(str(uri), self._result_owner(self._request_credential()))
+                if result is None or not self._is_tool_visible(result.tool_name):
+                    # Results of other owners fail like unknown ones
+                    raise ValueError(f"Unknown resource: {uri}")
+                return [ReadResourceContents(content=result.data, mime_type=result.mime_type)]
+
         self.server = mcp_server
 
     def _register_mcp_connection_endpoint_sse(
@@ -196,13 +1186,73 @@ class FastApiMCP:
     ):
         @router.get(mount_path, include_in_schema=False, operation_id="mcp_connection", dependencies=dependencies)
         async def handle_mcp_connection(request: Request):
-            async with transport.connect_sse(request.scope, request.receive, request._send) as (reader, writer):
-                await self.server.run(
-                    reader,
-                    writer,
-                    self.server.create_initialization_options(notification_options=None, experimental_capabilities={}),
-                    raise_exceptions=False,
-                )
+            # The visibility of the session is resolved once, from the request that opens it, and applies to all
+            # of its messages: they are handled within this request's context
+            token = session_visibility.set(await self._resolve_session_visibility(request))
+            try:
+                async with transport.connect_sse(request.scope, request.receive, request._send) as (reader, writer):
+                    await self.server.run(
+                        reader,
+                        writer,
+                        self.server.create_initialization_options(
+                            notification_options=None, experimental_capabilities={}
+                        ),
+                        raise_exceptions=False,
+                    )
+            finally:
+                session_visibility.reset(token)
+
+    async def _resolve_session_visibility(self, request: Request) -> Optional[SessionVisibility]:
+        if self._visibility_policy is None:
+            return None
+        http_request_info = HTTPRequestInfo(
+            method=request.method,
+            path=request.url.path,
+            headers=dict(request.headers),
+            cookies=request.cookies,
+            query_params=dict(request.query_params),
+            body=None,
+        )
+        return await resolve_visibility(self._visibility_policy, http_request_info)
+
+    async def _run_http_session(
+        self,
+        request: Request,
+        read_stream: MemoryObjectReceiveStream[Any],
+        write_stream: MemoryObjectSendStream[SessionMessage],
+        stateless: bool,
+    ) -> None:
+        """Run the MCP server for a session of the streamable HTTP transport, opened by `request`."""
+        # As with SSE, the visibility of the session is resolved from the request that opens it: the `initialize`
+        # request, or the one request of a stateless session. The session runs in a task of its own, so this context
+        # applies to all of its messages
+        session_visibility.set(await self._resolve_session_visibility(request))
+        await self.server.run(
+            read_stream,
+            write_stream,
+            self.server.create_initialization_options(notification_options=None, experimental_capabilities={}),
+            raise_exceptions=False,
+            stateless=stateless,
+        )
+
+    def _register_mcp_endpoints_http(
+        self,
+        router: FastAPI | APIRouter,
+        transport: FastApiHttpTransport,
+        mount_path: str,
+        dependencies: Optional[Sequence[params.Depends]],
+    ):
+        @router.post(mount_path, include_in_schema=False, operation_id="mcp_http_messages", dependencies=dependencies)
+        async def handle_http_message(request: Request):
+            return await transport.handle_fastapi_post_message(request)
+
+        @router.get(mount_path, include_in_schema=False, operation_id="mcp_http_stream", dependencies=dependencies)
+        async def handle_http_stream(request: Request):
+            return await transport.handle_fastapi_get(request)
+
+        @router.delete(mount_path, include_in_schema=False, operation_id="mcp_http_session", dependencies=dependencies)
+        async def handle_http_session_end(request: Request):
+            return await transport.handle_fastapi_delete(request)
 
     def _register_mcp_messages_endpoint_sse(
         self,
@@ -230,6 +1280,56 @@ class FastApiMCP:
         self._register_mcp_connection_endpoint_sse(router, transport, mount_path, dependencies)
         self._register_mcp_messages_endpoint_sse(router, transport, mount_path, dependencies)
 
+    def _register_metrics_endpoint(
+        self,
+        router: FastAPI | APIRouter,
+        mount_path: str,
+        dependencies: Optional[Sequence[params.Depends]],
+    ):
+        assert self.metrics is not None
+        metrics = self.metrics
+
+        @router.get(
+            f"{mount_path}/metrics",
+            include_in_schema=False,
+            operation_id="mcp_metrics",
+            dependencies=dependencies,
+        )
+        async def handle_metrics():
+            return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+    def _register_profiles_endpoints(
+        self,
+        router: FastAPI | APIRouter,
+        mount_path: str,
+        dependencies: Optional[Sequence[params.Depends]],
+    ):
+        assert self.profiler is not None
+        profiler = self.profiler
+
+        @router.get(
+            f"{mount_path}/profiles",
+            include_in_schema=False,
+            operation_id="mcp_profiles",
+            dependencies=dependencies,
+        )
+        async def handle_profiles(tool: Optional[str] = None):
+            return [profile.summary() for profile in profiler.profiles() if tool is None or profile.tool_name == tool]
+
+        @router.get(
+            f"{mount_path}/profiles/{{profile_id}}",
+            include_in_schema=False,
+            operation_id="mcp_profile",
+            dependencies=dependencies,
+        )
+        async def handle_profile(profile_id: int, format: Literal["json", "collapsed"] = "json"):
+            profile = profiler.get(profile_id)
+            if profile is None:
+                raise HTTPException(status_code=404, detail="Profile not found")
+            if format == "collapsed":
+                return Response(content=profile.collapsed(), media_type="text/plain; charset=utf-8")
+            return profile.to_dict()
+
     def _setup_auth_2025_03_26(self):
         from fastapi_mcp.auth.proxy import (
             setup_oauth_custom_metadata,
@@ -304,13 +1404,64 @@ class FastApiMCP:
             ),
         ] = "/mcp",
         transport: Annotated[
-            Literal["sse"],
+            Literal["sse", "http"],
             Doc(
                 """
-                The transport type for the MCP server. Currently only 'sse' is supported.
+                The transport type for the MCP server:
+
+                - 'sse': clients receive messages on an SSE stream opened with a GET of `mount_path`, and POST
+                  theirs to `{mount_path}/messages/`, which answers with a 202
+                - 'http': MCP's streamable HTTP transport, on the single endpoint `mount_path`. Each POST gets its
+                  response in its own body, as JSON, or as an SSE stream when the server sends notifications
+                  before responding (e.g. progress)
                 """
             ),
         ] = "sse",
+        metrics: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to add a `{mount_path}/metrics` endpoint, that serves the `metrics` of the server in the
+                Prometheus text format. It's protected by the same auth dependencies as the MCP endpoints.
+                """
+            ),
+        ] = False,
+        profiles: Annotated[
+            bool,
+            Doc(
+                """
+                Whether to add a `{mount_path}/profiles` endpoint, that lists the profiles of slow tool calls
+                captured by the `profiler`, and a `{mount_path}/profiles/{profile_id}` endpoint that serves one of
+                them, as JSON or in the collapsed format of flame graph tools (with `?format=collapsed`). They're
+                protected by the same auth dependencies as the MCP endpoints.
+                """
+            ),
+        ] = False,
+        session_store: Annotated[
+            Optional[SessionStore],
+            Doc(
+                """
+                Where the transport keeps its sessions, to share them between the workers of the app: a request can
+                then be handled by any worker, not only the one that started its session, without sticky sessions
+                in front of the workers. E.g. a `FileSessionStore` in a directory of the host. Sessions are
+                otherwise kept in the memory of the worker that started them.
+
+                With 'http', any worker resumes the sessions of the store. With 'sse', the worker holding the stream
+                of a session is recorded in the store, and the messages posted to the other workers are relayed to
+                it over Unix domain sockets: the workers must then share a host.
+                """
+            ),
+        ] = None,
+        stateless: Annotated[
+            bool,
+            Doc(
+                """
+                Whether the 'http' transport runs without sessions: clients don't need to initialize, and each
+                request is handled, by any worker, as if it was the only one. There's then no GET stream for
+                the server to notify clients, e.g. that the list of tools changed.
+                """
+            ),
+        ] = False,
     ) -> None:
         """
         Mount the MCP server to **any** FastAPI app or APIRouter.
@@ -335,19 +1486,53 @@ class FastApiMCP:
         else:
             raise ValueError(f"Invalid router type: {type(router)}")
 
-        messages_path = f"{base_path}{mount_path}/messages/"
+        if metrics and self.metrics is None:
+            raise ValueError("Cannot add a metrics endpoint with collect_metrics=False")
+
+        if profiles and self.profiler is None:
+            raise ValueError("Cannot add a profiles endpoint without a profiler")
 
-        sse_transport = FastApiSseTransport(messages_path)
+        if transport != "http" and stateless:
+            raise ValueError("stateless only applies to the 'http' transport")
 
         dependencies = self._auth_config.dependencies if self._auth_config else None
 
         if transport == "sse":
+            messages_path = f"{base_path}{mount_path}/messages/"
+            sse_transport = FastApiSseTransport(
+                messages_path,
+                metrics=self.metrics,
+                tracer=self._tracer,
+                store=session_store,
+                request_capture=self._request_capture,
+            )
+            if session_store is not None:
+                self._sse_transports.append(sse_transport)
             self._register_mcp_endpoints_sse(router, sse_transport, mount_path, dependencies)
+        elif transport == "http":
+            http_transport = FastApiHttpTransport(
+                self._run_http_session,
+                metrics=self.metrics,
+                tracer=self._tracer,
+                store=session_store,
+                stateless=stateless,
+                request_capture=self._request_capture,
+            )
+            self._http_transports.append(http_transport)
+            self._register_mcp_endpoints_http(router, http_transport, mount_path, dependencies)
         else:  # pragma: no cover
             raise ValueError(f"Invalid transport: {transport}")  # pragma: no cover
 
+        if metrics:
+            self._register_metrics_endpoint(router, mount_path, dependencies)
+
+        if profiles:
+            self._register_profiles_endpoints(router, mount_path, dependencies)
+
         self._setup_auth()
 
+        self._manage_lifespan(router if isinstance(router, FastAPI) else self.fastapi)
+
         # HACK: If we got a router and not a FastAPI instance, we need to re-include the router so that
         # FastAPI will pick up the new routes we added. The problem with this approach is that we assume
         # that the router is a sub-router of self.fastapi, which may not always be the case.
@@ -363,7 +1548,7 @@ class FastApiMCP:
         client: Annotated[httpx.AsyncClient, Doc("httpx client to use in API calls")],
         tool_name: Annotated[str, Doc("The name of the tool to execute")],
         arguments: Annotated[Dict[str, Any], Doc("The arguments for the tool")],
-        operation_map: Annotated[Dict[str, Dict[str, Any]], Doc("A mapping from tool names to operation details")],
+        operation_map: Annotated[Mapping[str, Dict[str, Any]], Doc("A mapping from tool names to operation details")],
         http_request_info: Annotated[
             Optional[HTTPRequestInfo],
             Doc("HTTP request info to forward to the actual API call"),
@@ -378,56 +1563,47 @@ class FastApiMCP:
         if tool_name not in operation_map:
             raise Exception(f"Unknown tool: {tool_name}")
 
-        operation = operation_map[tool_name]
-        path: str = operation["path"]
-        method: str = operation["method"]
-        parameters: List[Dict[str, Any]] = operation.get("parameters", [])
-        arguments = arguments.copy() if arguments else {}  # Deep copy arguments to avoid mutating the original
-
-        for param in parameters:
-            if param.get("in") == "path" and param.get("name") in arguments:
-                param_name = param.get("name", None)
-                if param_name is None:
-                    raise ValueError(f"Parameter name is None for parameter: {param}")
-                path = path.replace(f"{{{param_name}}}", str(arguments.pop(param_name)))
-
-        query = {}
-        for param in parameters:
-            if param.get("in") == "query" and param.get("name") in arguments:
-                param_name = param.get("name", None)
-                if param_name is None:
-                    raise ValueError(f"Parameter name is None for parameter: {param}")
-                query[param_name] = arguments.pop(param_name)
-
-        headers = {}
-        for param in parameters:
-            if param.get("in") == "header" and param.get("name") in arguments:
-                param_name = param.get("name", None)
-                if param_name is None:
-                    raise ValueError(f"Parameter name is None for parameter: {param}")
-                headers[param_name] = arguments.pop(param_name)
-
-        if http_request_info and http_request_info.headers:
-            if "Authorization" in http_request_info.headers:
-                headers["Authorization"] = http_request_info.headers["Authorization"]
-            elif "authorization" in http_request_info.headers:
-                headers["Authorization"] = http_request_info.headers["authorization"]
-
-        body = arguments if arguments else None
+        call = self._call_api_tool(client, tool_name, arguments, operation_map, http_request_info)
+        if self.profiler is not None:
+            call = self.profiler.run(tool_name, arguments, call)
 
+        metrics = self.metrics
+        if metrics is None:
+            return await call
+
+        metrics.tool_calls_in_flight.inc()
+        start = time.perf_counter()
+        success = False
         try:
-            logger.debug(f"Making {method.upper()} request to {path}")
-            response = await self._request(client, method, path, query, headers, body)
+            result = await call
+            success = True
+            return result
+        finally:
+            metrics.tool_calls_in_flight.dec()
+            metrics.record_tool_call(tool_name, success, time.perf_counter() - start)
+
+    async def _call_api_tool(
+        self,
+        client: httpx.AsyncClient,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        operation_map: Mapping[str, Dict[str, Any]],
+        http_request_info: Optional[HTTPRequestInfo],
+    ) -> List[Union[types.TextContent, types.ImageContent, types.EmbeddedResource]]:
+        plan = self._get_request_plan(tool_name, operation_map)
+        path_values, query, headers, body = plan.route_arguments(arguments or {})
+        path = plan.render_path(path_values)
 
-            # TODO: Better typing for the AsyncClientProtocol. It should return a ResponseProtocol that has a json() method that returns a dict/list/etc.
-            try:
-                result = response.json()
-                result_text = json.dumps(result, indent=2, ensure_ascii=False)
-            except json.JSONDecodeError:
-                if hasattr(response, "text"):
-                    result_text = response.text
-                else:
-                    result_text = response.content
+        credential = _forwarded_credential(http_request_info)
+        if credential is not None:
+            headers["Authorization"] = credential
+
+        if self._stream_results:
+            return await self._execute_streamed(client, tool_name, plan, path, path_values, query, headers, body)
+
+        try:
+            logger.debug(f"Making {plan.method.upper()} request to {path}")
+            response = await self._fetch(client, tool_name, arguments, plan, path, path_values, query, headers, body)
 
             # If not raising an exception, the MCP server will return the result as a regular text response, without marking it as an error.
             # TODO: Use a raise_for_status() method on the response (it needs to also be implemented in the AsyncClientProtocol)
@@ -436,92 +1612,441 @@ class FastApiMCP:
                     f"Error calling {tool_name}. Status code: {response.status_code}. Response: {response.text}"
                 )
 
-            try:
-                return [types.TextContent(type="text", text=result_text)]
-            except ValueError:
+            content_type = response.headers.get("content-type") if hasattr(response, "headers") else None
+            with self._span("mcp.response.format", {"mcp.tool": tool_name}):
+                if not is_text_content_type(content_type):
+                    credential = headers.get("Authorization")
+                    return [self._binary_result(tool_name, response.content, media_type_of(content_type), credential)]
+
+                # TODO: Better typing for the AsyncClientProtocol. It should return a ResponseProtocol that has a json() method that returns a dict/list/etc.
+                result_text = format_response_text(response, self._response_mode)
                 return [types.TextContent(type="text", text=result_text)]
 
+        except McpError:
+            raise
+        except Exception as e:
+            logger.exception(f"Error calling {tool_name}")
+            raise e
+
+    def _binary_result(
+        self, tool_name: str, data: bytes, media_type: str, credential: Optional[str]
+    ) -> Union[types.TextContent, types.ImageContent, types.EmbeddedResource]:
+        """
+        The tool result for a binary response body: inlined if it's small enough, otherwise kept in the result
+        store for the caller, and referenced by URI.
+        """
+        media_type = media_type or "application/octet-stream"
+        max_inline_size = self._max_inline_binary_size
+        if self.result_store is None or max_inline_size is None or len(data) <= max_inline_size:
+            return binary_content(data, media_type, inline_uri(tool_name))
+
+        uri = self.result_store.put(tool_name, data, media_type, self._result_owner(credential))
+        return types.TextContent(
+            type="text",
+            text=(
+                f"The response is too large to include ({len(data)} bytes of {media_type}). "
+                f"Read the resource {uri} to get it."
+            ),
+        )
+
+    def _request_credential(self) -> Optional[str]:
+        """The credential forwarded to the API for the request being handled."""
+        context = self.server.message_context()
+        return _forwarded_credential(context.request_info if context is not None else None)
+
+    def _result_owner(self, credential: Optional[str]) -> str:
+        """
+        Whom the stored results of a call belong to: the hash of its forwarded credential, as in the keys of the
+        response cache, or the session of the client for calls without one.
+        """
+        if credential:
+            return credential_hash(credential)
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            # Not a call of a client: no session will be able to read the result
+            return uuid4().hex
+        owner = self._session_owners.get(session)
+        if owner is None:
+            owner = self._session_owners[session] = f"session:{uuid4().hex}"
+        return owner
+
+    async def _execute_batch(
+        self,
+        arguments: Dict[str, Any],
+        http_request_info: Optional[HTTPRequestInfo] = None,
+    ) -> List[Union[types.TextContent, types.ImageContent, types.EmbeddedResource]]:
+        """
+        Execute a call of the `batch_call` tool: run each of its calls concurrently with `_execute_api_tool()`.
+        """
+        calls = parse_batch_calls(arguments, self._batch_max_items)
+
+        async def execute(tool_name: str, call_arguments: Dict[str, Any]):
+            self._check_tool_visible(tool_name)
+            self._validate_arguments(tool_name, call_arguments)
+            return await self._execute_api_tool(
+                client=self._http_client,
+                tool_name=tool_name,
+                arguments=call_arguments,
+                operation_map=self.operation_map,
+                http_request_info=http_request_info,
+            )
+
+        results = await run_batch(calls, execute, self._batch_max_parallelism)
+        result_text = format_batch_results(results, compact=self._response_mode != "pretty")
+        return [types.TextContent(type="text", text=result_text)]
+
+    async def _fetch(
+        self,
+        client: httpx.AsyncClient,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Any:
+        """
+        Get the upstream response for a tool call, going through the response cache and the coalescing of
+        identical in-flight calls, if they are enabled.
+        """
+        cache = self.response_cache
+        coalesce = (
+            self.single_flight is not None and plan.method in self._coalesce_methods and client is self._http_client
+        )
+
+        key: Optional[CallKey] = None
+        if coalesce or (cache is not None and plan.method == "get"):
+            key = call_key(tool_name, arguments or {}, headers.get("Authorization"))
+        flight_key = key if coalesce else None
+
+        if cache is None or plan.method != "get":
+            response = await self._coalesced_dispatch(flight_key, client, plan, path, path_values, query, headers, body)
+            if cache is not None and self._invalidate_on_mutation and response.status_code < 400:
+                cache.invalidate_path(path)
+            return response
+
+        assert key is not None
+        entry = cache.lookup(key)
+        if entry is not None and entry.is_fresh(time.monotonic()):
+            cache.record_hit()
+            return entry.to_response()
+
+        if entry is not None:
+            headers = {**headers, **entry.conditional_headers()}
+
+        response = await self._coalesced_dispatch(flight_key, client, plan, path, path_values, query, headers, body)
+        if entry is not None and response.status_code == 304:
+            return cache.revalidated(key, entry, response).to_response()
+
+        cache.record_miss()
+        cache.store(key, path, response)
+        return response
+
+    async def _coalesced_dispatch(
+        self,
+        key: Optional[CallKey],
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Any:
+        if key is None or self.single_flight is None:
+            return await self._dispatch(client, plan, path, path_values, query, headers, body)
+
+        return await self.single_flight.do(
+            key, lambda: self._dispatch(client, plan, path, path_values, query, headers, body)
+        )
+
+    async def _dispatch(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Any:
+        """
+        Send a tool call to the app, either directly in-process or over HTTP, within the concurrency limits.
+        """
+        if self.concurrency_limiter is None:
+            return await self._send(client, plan, path, path_values, query, headers, body)
+
+        async with self.concurrency_limiter.limit(plan.operation_id, plan.tags):
+            return await self._send(client, plan, path, path_values, query, headers, body)
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Any:
+        if self._tracer is None:
+            response = await self._send_upstream(client, plan, path, path_values, query, headers, body)
+        else:
+            with self._tracer.start_span("mcp.upstream.request", self._upstream_attributes(plan, path)) as span:
+                headers = self._tracer.inject(dict(headers), span)
+                response = await self._send_upstream(client, plan, path, path_values, query, headers, body)
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 400:
+                    span.status = "error"
+
+        if self.metrics is not None:
+            self.metrics.record_upstream_response(
+                plan.operation_id, response.status_code, _request_size(response), len(response.content)
+            )
+        return response
+
+    async def _send_upstream(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> Any:
+        if self._direct_dispatcher is not None and client is self._http_client:
+            response = await self._direct_dispatcher.dispatch(plan, path, path_values, query, headers, body)
+            if response is not None:
+                return response
+        return await self._request(client, plan, path, query, headers, body)
+
+    def _span(self, name: str, attributes: Dict[str, Any]) -> Any:
+        """A span of the tracer, or a no-op context manager if there's no tracer."""
+        if self._tracer is None:
+            return _NO_SPAN
+        return self._tracer.start_span(name, attributes)
+
+    def _upstream_attributes(self, plan: RequestPlan, path: str) -> Dict[str, Any]:
+        return {
+            "mcp.tool": plan.operation_id,
+            "http.method": plan.method.upper(),
+            "url.path": path,
+        }
+
+    async def _execute_streamed(
+        self,
+        client: httpx.AsyncClient,
+        tool_name: str,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> List[Union[types.TextContent, types.ImageContent, types.EmbeddedResource]]:
+        """
+        Execute a tool call reading the upstream response incrementally. See `stream_results`.
+        """
+        try:
+            logger.debug(f"Making streamed {plan.method.upper()} request to {path}")
+            async with self._stream_request(client, plan, path, path_values, query, headers, body) as response:
+                try:
+                    if 400 <= response.status_code < 600:
+                        error_parts = await collect_streamed_response(
+                            response, chunk_size=self._result_chunk_size, max_size=self._max_result_size
+                        )
+                        error_text = "".join(part.text for part in error_parts)
+                        raise Exception(
+                            f"Error calling {tool_name}. Status code: {response.status_code}. Response: {error_text}"
+                        )
+
+                    content_type = response.headers.get("content-type")
+                    if is_text_content_type(content_type):
+                        result = await collect_streamed_response(
+                            response,
+                            chunk_size=self._result_chunk_size,
+                            max_size=self._max_result_size,
+                            on_progress=self._get_progress_reporter(),
+                        )
+                    else:
+                        # Binary data can't be truncated meaningfully, so it's either kept whole or not at all
+                        data = await read_body(response, self._max_result_size)
+                        credential = headers.get("Authorization")
+                        result = [self._binary_result(tool_name, data, media_type_of(content_type), credential)]
+                finally:
+                    if self.metrics is not None:
+                        self.metrics.record_upstream_response(
+                            plan.operation_id,
+                            response.status_code,
+                            _request_size(response),
+                            response.num_bytes_downloaded,
+                        )
+
+            if self.response_cache is not None and self._invalidate_on_mutation and plan.method != "get":
+                self.response_cache.invalidate_path(path)
+            return result
+
+        except McpError:
+            raise
         except Exception as e:
             logger.exception(f"Error calling {tool_name}")
             raise e
 
+    @asynccontextmanager
+    async def _stream_request(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> AsyncIterator[httpx.Response]:
+        if self.concurrency_limiter is None:
+            async with self._open_stream(client, plan, path, path_values, query, headers, body) as response:
+                yield response
+            return
+
+        async with self.concurrency_limiter.limit(plan.operation_id, plan.tags):
+            async with self._open_stream(client, plan, path, path_values, query, headers, body) as response:
+                yield response
+
+    @asynccontextmanager
+    async def _open_stream(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> AsyncIterator[httpx.Response]:
+        if self._tracer is None:
+            async with self._open_upstream_stream(client, plan, path, path_values, query, headers, body) as response:
+                yield response
+            return
+
+        with self._tracer.start_span("mcp.upstream.request", self._upstream_attributes(plan, path)) as span:
+            headers = self._tracer.inject(dict(headers), span)
+            async with self._open_upstream_stream(client, plan, path, path_values, query, headers, body) as response:
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 400:
+                    span.status = "error"
+                yield response
+
+    @asynccontextmanager
+    async def _open_upstream_stream(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        path: str,
+        path_values: Dict[str, Any],
+        query: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Any],
+    ) -> AsyncIterator[httpx.Response]:
+        if self._direct_dispatcher is not None and client is self._http_client:
+            async with self._direct_dispatcher.stream(plan, path, path_values, query, headers, body) as response:
+                if response is not None:
+                    yield response
+                    return
+
+        async with client.stream(
+            plan.method.upper(),
+            path,
+            params=query,
+            headers=headers,
+            json=body if plan.sends_body else None,
+        ) as response:
+            yield response
+
+    def _get_progress_reporter(self) -> Optional[Callable[[int, Optional[int]], Awaitable[None]]]:
+        """
+        A callback that reports the bytes received so far as MCP progress notifications, if the client of the
+        current tool call asked for progress (by sending a progress token).
+        """
+        try:
+            request_context = self.server.request_context
+        except LookupError:
+            return None
+
+        progress_token = request_context.meta.progressToken if request_context.meta else None
+        if progress_token is None:
+            return None
+
+        async def report_progress(received: int, total: Optional[int]) -> None:
+            await request_context.session.send_progress_notification(
+                progress_token,
+                received,
+                total=total,
+                related_request_id=str(request_context.request_id),
+            )
+
+        return report_progress
+
+    def _route_convertors(self) -> PathConvertors:
+        """The convertors of the path parameters of the app's routes, indexed once per version of the routes."""
+        if self._path_convertors is None:
+            self._path_convertors = index_path_convertors(self.fastapi.routes)
+        return self._path_convertors
+
+    def _get_request_plan(self, tool_name: str, operation_map: Mapping[str, Dict[str, Any]]) -> RequestPlan:
+        if operation_map is not self.operation_map:
+            # A custom operation map was passed in, compile the plan for this call only
+            return compile_request_plan(tool_name, operation_map[tool_name])
+
+        plan = self._request_plans.get(tool_name)
+        if plan is None:
+            # Not compiled yet (with `lazy_tools`) or not compilable: compile it now, and keep it for the next calls
+            plan = compile_request_plan(
+                tool_name, operation_map[tool_name], self._http_client, self._route_convertors()
+            )
+            self._request_plans[tool_name] = plan
+            if self._direct_dispatcher is not None:
+                self._direct_dispatcher.add(plan)
+        return plan
+
     async def _request(
         self,
         client: httpx.AsyncClient,
-        method: str,
+        plan: RequestPlan,
         path: str,
         query: Dict[str, Any],
         headers: Dict[str, str],
         body: Optional[Any],
     ) -> Any:
-        if method.lower() == "get":
-            return await client.get(path, params=query, headers=headers)
-        elif method.lower() == "post":
-            return await client.post(path, params=query, headers=headers, json=body)
-        elif method.lower() == "put":
-            return await client.put(path, params=query, headers=headers, json=body)
-        elif method.lower() == "delete":
-            return await client.delete(path, params=query, headers=headers)
-        elif method.lower() == "patch":
-            return await client.patch(path, params=query, headers=headers, json=body)
+        if plan.client_method is not None and client is self._http_client:
+            send = plan.client_method
         else:
-            raise ValueError(f"Unsupported HTTP method: {method}")
+            send = getattr(client, plan.method)
+
+        if plan.sends_body:
+            return await send(path, params=query, headers=headers, json=body)
+        return await send(path, params=query, headers=headers)
 
-    def _filter_tools(self, tools: List[types.Tool], openapi_schema: Dict[str, Any]) -> List[types.Tool]:
+    def _filter_tools(self, tools: List[types.Tool]) -> List[types.Tool]:
         """
         Filter tools based on operation IDs and tags.
 
         Args:
             tools: List of tools to filter
-            openapi_schema: The OpenAPI schema
 
         Returns:
             Filtered list of tools
         """
-        if (
-            self._include_operations is None
-            and self._exclude_operations is None
-            and self._include_tags is None
-            and self._exclude_tags is None
-        ):
+        operations_to_include = self._get_included_operations()
+        if operations_to_include is None:
+            self._listed_operations = [tool.name for tool in tools]
             return tools
 
-        operations_by_tag: Dict[str, List[str]] = {}
-        for path, path_item in openapi_schema.get("paths", {}).items():
-            for method, operation in path_item.items():
-                if method not in ["get", "post", "put", "delete", "patch"]:
-                    continue
-
-                operation_id = operation.get("operationId")
-                if not operation_id:
-                    continue
-
-                tags = operation.get("tags", [])
-                for tag in tags:
-                    if tag not in operations_by_tag:
-                        operations_by_tag[tag] = []
-                    operations_by_tag[tag].append(operation_id)
-
-        operations_to_include = set()
-
-        if self._include_operations is not None:
-            operations_to_include.update(self._include_operations)
-        elif self._exclude_operations is not None:
-            all_operations = {tool.name for tool in tools}
-            operations_to_include.update(all_operations - set(self._exclude_operations))
-
-        if self._include_tags is not None:
-            for tag in self._include_tags:
-                operations_to_include.update(operations_by_tag.get(tag, []))
-        elif self._exclude_tags is not None:
-            excluded_operations = set()
-            for tag in self._exclude_tags:
-                excluded_operations.update(operations_by_tag.get(tag, []))
-
-            all_operations = {tool.name for tool in tools}
-            operations_to_include.update(all_operations - excluded_operations)
-
         filtered_tools = [tool for tool in tools if tool.name in operations_to_include]
+        self._listed_operations = [tool.name for tool in filtered_tools]
 
         if filtered_tools:
             filtered_operation_ids = {tool.name for tool in filtered_tools}
@@ -530,3 +2055,49 @@ class FastApiMCP:
             }
 
         return filtered_tools
+
+    def _select_operations(self, operation_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        The operations listed as tools, and the ones that can be called, per the operation and tag filters. Same as
+        `_filter_tools()`: if the filters match nothing, no operation is listed, but they all stay callable.
+        """
+        included_operations = self._get_included_operations()
+        if included_operations is None:
+            return operation_ids, operation_ids
+        listed = [operation_id for operation_id in operation_ids if operation_id in included_operations]
+        return listed, listed or operation_ids
+
+    def _get_included_operations(self) -> Optional[Set[str]]:
+        """
+        The IDs of the operations selected by the operation and tag filters, or `None` if there are no filters.
+        They are looked up in the precomputed `VisibilityIndex` of the catalog.
+        """
+        mask = self._visibility_index.select(
+            include_operations=self._include_operations,
+            exclude_operations=self._exclude_operations,
+            include_tags=self._include_tags,
+            exclude_tags=self._exclude_tags,
+        )
+        if mask is None:
+            return None
+        return set(self._visibility_index.names(mask))
+
+
+_NO_SPAN = nullcontext()
+
+
+def _forwarded_credential(http_request_info: Optional[HTTPRequestInfo]) -> Optional[str]:
+    """The `Authorization` header of the MCP request, which is forwarded to the API."""
+    if not http_request_info or not http_request_info.headers:
+        return None
+    headers = http_request_info.headers
+    return headers.get("Authorization", headers.get("authorization"))
+
+
+def _request_size(response: Any) -> Optional[int]:
+    """The size of the body of the request a response answers, if it's known."""
+    try:
+        return len(response.request.content)
+    except (AttributeError, RuntimeError):
+        # No request (e.g. a response built by hand), or a streamed body
+        return None
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import anyio.to_thread
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Session IDs come from a header: only those that are safe as file names are looked up
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+@dataclass
+class SessionRecord:
+    """
+    What outlives the process that handles a session: enough to resume it on any worker. `client_params` are the
+    params of the `initialize` request of the client, to initialize the server again when the session is resumed.
+
+    SSE sessions can't move, as their stream is held by one worker: their `owner` is the address that worker relays
+    their messages from.
+    """
+
+    session_id: str
+    client_params: Dict[str, Any]
+    owner: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    last_active_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> "SessionRecord":
+        return cls(**json.loads(data))
+
+
+class SessionStore:
+    """
+    Where the sessions of the transports are kept, so that a request can be handled by another worker than the one
+    that started its session.
+
+    Sessions expire when they haven't been active for `ttl` seconds. Stores are called on every request of a
+    session, on the event loop, so implementations shouldn't block it.
+    """
+
+    def __init__(self, ttl: float = 3600.0):
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+
+    async def create(self, record: SessionRecord) -> None:
+        raise NotImplementedError
+
+    async def get(self, session_id: str) -> Optional[SessionRecord]:
+        """The record of a session, or None if it doesn't exist, or has expired."""
+        raise NotImplementedError
+
+    async def touch(self, session_id: str) -> None:
+        """Mark a session as active now, which postpones its expiry."""
+        raise NotImplementedError
+
+    async def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    async def purge(self) -> None:
+        """Forget the expired sessions."""
+        raise NotImplementedError
+
+    def _expired(self, record: SessionRecord, now: float) -> bool:
+        return now - record.last_active_at > self.ttl
+
+
+class InMemorySessionStore(SessionStore):
+    """Keeps the sessions in the memory of the process: for a single worker, and tests."""
+
+    def __init__(self, ttl: float = 3600.0):
+        super().__init__(ttl)
+        self._records: Dict[str, SessionRecord] = {}
+
+    async def create(self, record: SessionRecord) -> None:
+        self._records[record.session_id] = record
+
+    async def get(self, session_id: str) -> Optional[SessionRecord]:
+        record = self._records.get(session_id)
+        if record is not None and self._expired(record, time.time()):
+            del self._records[session_id]
+            return None
+        return record
+
+    async def touch(self, session_id: str) -> None:
+        record = self._records.get(session_id)
+        if record is not None:
+            record.last_active_at = time.time()
+
+    async def delete(self, session_id: str) -> None:
+        self._records.pop(session_id, None)
+
+    async def purge(self) -> None:
+        now = time.time()
+        for session_id in [session_id for session_id, record in self._records.items() if self._expired(record, now)]:
+            del self._records[session_id]
+
+
+class FileSessionStore(SessionStore):
+    """
+    Keeps each session in a JSON file of `directory`, which the workers of a host (or of several, on a shared
+    volume) share. Files are replaced atomically, and accessed from a worker thread.
+
+    The modification time of the file of a session is when it was last active. Touching a session only updates it:
+    unlike rewriting the record, that can't bring back a session another worker has just deleted.
+    """
+
+    def __init__(self, directory: str, ttl: float = 3600.0):
+        super().__init__(ttl)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def create(self, record: SessionRecord) -> None:
+        await anyio.to_thread.run_sync(self._write, record)
+
+    async def get(self, session_id: str) -> Optional[SessionRecord]:
+        return await anyio.to_thread.run_sync(self._read, session_id)
+
+    async def touch(self, session_id: str) -> None:
+        await anyio.to_thread.run_sync(self._touch, session_id)
+
+    async def delete(self, session_id: str) -> None:
+        await anyio.to_thread.run_sync(self._remove, session_id)
+
+    async def purge(self) -> None:
+        await anyio.to_thread.run_sync(self._purge)
+
+    def _path(self, session_id: str) -> Optional[str]:
+        if not _SESSION_ID_PATTERN.match(session_id):
+            return None
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def _write(self, record: SessionRecord) -> None:
+        path = self._path(record.session_id)
+        if path is None:
+            raise ValueError(f"Invalid session ID: {record.session_id!r}")
+        fd, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(record.to_json())
+            os.utime(temporary_path, (record.last_active_at, record.last_active_at))
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def _read(self, session_id: str) -> Optional[SessionRecord]:
+        path = self._path(session_id)
+        if path is None:
+            return None
+        try:
+            with open(path) as f:
+                record = SessionRecord.from_json(f.read())
+                record.last_active_at = os.fstat(f.fileno()).st_mtime
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError):
+            logger.warning(f"Ignoring the invalid record of session {session_id}")
+            return None
+        if self._expired(record, time.time()):
+            self._remove(session_id)
+            return None
+        return record
+
+    def _touch(self, session_id: str) -> None:
+        path = self._path(session_id)
+        if path is None:
+            return
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                # Expired, and left to be purged
+                return
+            os.utime(path)
+        except FileNotFoundError:
+            # Deleted, or expired and purged: it stays so
+            pass
+
+    def _remove(self, session_id: str) -> None:
+        path = self._path(session_id)
+        if path is None:
+            return
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def _purge(self) -> None:
+        names: List[str] = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        for name in names:
+            session_id = name[: -len(".json")]
+            # Reading an expired record removes it
+            self._read(session_id)
@@ -0,0 +1,225 @@
+import random
+import re
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Any, Deque, Dict, List, Mapping, Optional
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext:
+    """What identifies a span across process boundaries, as carried by the W3C `traceparent` header."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, traceparent: Optional[str]) -> Optional["SpanContext"]:
+        if not traceparent:
+            return None
+        match = _TRACEPARENT_RE.match(traceparent.strip().lower())
+        if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+            return None
+        return cls(match.group(1), match.group(2), sampled=bool(int(match.group(3), 16) & 1))
+
+
+class Span:
+    """
+    A timed operation of a trace. Times are in nanoseconds since the epoch.
+
+    Spans are context managers: entering one makes it the current span (the parent of the spans started inside
+    it), and exiting it ends it, records the exception that ended it if any, and exports it.
+    """
+
+    __slots__ = (
+        "name",
+        "context",
+        "parent_id",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status",
+        "error",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        attributes: Optional[Dict[str, Any]] = None,
+        start_time: Optional[int] = None,
+    ):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.start_time = start_time if start_time is not None else time.time_ns()
+        self.end_time: Optional[int] = None
+        self.attributes: Dict[str, Any] = attributes if attributes is not None else {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._tracer = tracer
+        self._token: Optional[Token] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.context.trace_id
+
+    @property
+    def span_id(self) -> str:
+        return self.context.span_id
+
+    @property
+    def duration(self) -> Optional[float]:
+        """The duration of the span, in seconds, once it has ended."""
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self, end_time: Optional[int] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = end_time if end_time is not None else time.time_ns()
+        if self.context.sampled:
+            self._tracer.export(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        if exc is not None:
+            self.record_error(exc)
+        self.end()
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, trace_id={self.trace_id}, span_id={self.span_id}, parent_id={self.parent_id})"
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class SpanExporter:
+    """
+    Receives the spans of a `Tracer` as they end. Called inline, on the event loop, so implementations should
+    only buffer the spans and ship them elsewhere in the background.
+    """
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the last `max_spans` spans in memory, e.g. for tests and benchmarks."""
+
+    def __init__(self, max_spans: int = 10000):
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_spans(self, name: Optional[str] = None, trace_id: Optional[str] = None) -> List[Span]:
+        return [
+            span
+            for span in self.spans
+            if (name is None or span.name == name) and (trace_id is None or span.trace_id == trace_id)
+        ]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class Tracer:
+    """
+    Starts spans and hands the finished ones to an exporter.
+
+    Traces are sampled when they start: `sample_rate` is the fraction of the new traces that are recorded. A trace
+    continued from a `traceparent` keeps the sampling decision of its caller. Spans of unsampled traces still
+    propagate their context, but aren't exported.
+    """
+
+    def __init__(self, exporter: SpanExporter, sample_rate: float = 1.0):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+        start_time: Optional[int] = None,
+    ) -> Span:
+        """
+        Start a span, as a child of `parent` if given, or else of the current span, or else as the root of a new
+        trace. Use it as a context manager to make it the current span and end it.
+        """
+        if parent is None:
+            current = _current_span.get()
+            if current is not None:
+                parent = current.context
+
+        if parent is None:
+            context = SpanContext(
+                f"{random.getrandbits(128):032x}",
+                f"{random.getrandbits(64):016x}",
+                sampled=self.sample_rate >= 1.0 or random.random() < self.sample_rate,
+            )
+            parent_id = None
+        else:
+            context = SpanContext(parent.trace_id, f"{random.getrandbits(64):016x}", sampled=parent.sampled)
+            parent_id = parent.span_id
+
+        return Span(self, name, context, parent_id, attributes, start_time)
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Failed to export span {span.name}: {e!r}")
+
+    def inject(self, headers: Dict[str, str], span: Optional[Span] = None) -> Dict[str, str]:
+        """Add the `traceparent` header of a span (the current one by default) to outgoing headers."""
+        span = span or _current_span.get()
+        if span is not None:
+            headers[TRACEPARENT_HEADER] = span.context.to_traceparent()
+        return headers
+
+    @staticmethod
+    def extract(headers: Mapping[str, str]) -> Optional[SpanContext]:
+        """The span context of incoming headers, if they carry a valid `traceparent`."""
+        return SpanContext.from_traceparent(headers.get(TRACEPARENT_HEADER) or headers.get("Traceparent"))
@@ -0,0 +1,613 @@
+import asyncio
+import functools
+import json
+import time
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+import logging
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from fastapi import Request, Response
+from mcp.server.streamable_http import (
+    CONTENT_TYPE_JSON,
+    CONTENT_TYPE_SSE,
+    MCP_SESSION_ID_HEADER,
+    StreamableHTTPServerTransport,
+)
+from mcp.shared.message import SessionMessage
+from mcp.types import (
+    INTERNAL_ERROR,
+    INVALID_REQUEST,
+    PARSE_ERROR,
+    ErrorData,
+    JSONRPCError,
+    JSONRPCMessage,
+    JSONRPCNotification,
+    JSONRPCRequest,
+)
+from pydantic import ValidationError
+from starlette.types import Message, Receive, Scope, Send
+
+from fastapi_mcp.metrics import MCPMetrics
+from fastapi_mcp.sessions import SessionRecord, SessionStore
+from fastapi_mcp.tracing import Tracer, current_span
+from fastapi_mcp.transport.messages import MESSAGE_CONTEXT_KEY, message_context
+from fastapi_mcp.types import RequestCaptureConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+MAXIMUM_MESSAGE_SIZE = 4 * 1024 * 1024
+
+# What mcp's transport requires POST requests to accept: it answers them with an SSE stream, that `_PostResponse`
+# turns into what the client accepts
+_ACCEPT_BOTH = "application/json, text/event-stream"
+
+
+# Runs the MCP server on the streams of a session, until they're closed. Given the request that opened the session,
+# and whether the session is stateless (already initialized)
+SessionRunner = Callable[
+    [Request, MemoryObjectReceiveStream[Any], MemoryObjectSendStream[SessionMessage], bool],
+    Awaitable[None],
+]
+
+
+class _HttpSession:
+    """
+    A session of the streamable HTTP transport: mcp's `StreamableHTTPServerTransport`, which routes the messages of
+    the session between its HTTP requests and its server, and the task running that server.
+
+    Only the public API of mcp's transport is used: `connect()` to run the server, and `handle_request()` for the
+    requests of the client, and for the ones of our own, to initialize a resumed session and to end a session.
+    """
+
+    def __init__(self, session_id: Optional[str]) -> None:
+        self.id = session_id
+        self.transport = StreamableHTTPServerTransport(mcp_session_id=session_id)
+        self.task: Optional["asyncio.Task[None]"] = None
+        # The GET streams open, that keep the session without requests
+        self.streams = 0
+        self.ended = False
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.transport.handle_request(scope, receive, send)
+
+    async def post(self, message: JSONRPCMessage) -> Tuple[int, List[Dict[str, Any]]]:
+        """Send a message of our own to the server, and return the status code, and the messages, of the response."""
+        headers = {"Accept": _ACCEPT_BOTH, "Content-Type": CONTENT_TYPE_JSON}
+        if self.id is not None:
+            headers[MCP_SESSION_ID_HEADER] = self.id
+        body = message.model_dump_json(by_alias=True, exclude_none=True).encode()
+        status_code, response_body = await _call(self.transport, "POST", headers, body)
+        return status_code, [json.loads(data) for data in _sse_data(response_body)[0] if data is not None]
+
+    async def end(self) -> None:
+        """End the session, closing all its streams, which stops its server."""
+        if self.ended:
+            return
+        self.ended = True
+        if self.id is None:
+            # mcp's transport only ends sessions with an ID: the server of a transient one is stopped instead
+            if self.task is not None:
+                self.task.cancel()
+            return
+        await _call(self.transport, "DELETE", {MCP_SESSION_ID_HEADER: self.id})
+
+
+async def _call(
+    transport: StreamableHTTPServerTransport, method: str, headers: Dict[str, str], body: bytes = b""
+) -> Tuple[int, bytes]:
+    """Send a request of our own to mcp's transport, and return the status code and the body of its response."""
+    scope: Scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    received = False
+    status_code = 500
+    response_body = bytearray()
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            # Never disconnects: the response ends on its own
+            await anyio.sleep_forever()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            response_body.extend(message.get("body", b""))
+
+    await transport.handle_request(scope, receive, send)
+    return status_code, bytes(response_body)
+
+
+def _sse_data(stream: bytes) -> Tuple[List[Optional[bytes]], bytes]:
+    """
+    Split the complete events off the start of an SSE stream: the data of each, a JSON-RPC message (`None` for
+    comments, like pings), and the rest of the stream.
+    """
+    *events, rest = stream.replace(b"\r\n", b"\n").split(b"\n\n")
+    data: List[Optional[bytes]] = []
+    for event in events:
+        lines = [line[5:].lstrip(b" ") for line in event.split(b"\n") if line.startswith(b"data:")]
+        data.append(b"\n".join(lines) if lines else None)
+    return data, rest
+
+
+def _is_response(message: Dict[str, Any]) -> bool:
+    return "method" not in message and ("result" in message or "error" in message)
+
+
+class _PostResponse:
+    """
+    The response to a POST, written by mcp's transport, which streams the messages of the request as SSE, shaped
+    into what the client accepts: when the first message is the response, it's sent as plain JSON, and the stream is
+    only kept when the server sends notifications before responding (e.g. progress). To a client that doesn't accept
+    SSE, only the response is sent, as JSON.
+    """
+
+    def __init__(self, request: Request, send: Send, accepts_json: bool, accepts_sse: bool) -> None:
+        self._request = request
+        self._send = send
+        self._accepts_json = accepts_json
+        self._accepts_sse = accepts_sse
+        self._start: Optional[Message] = None
+        self._headers: Dict[str, str] = {}
+        self._received = bytearray()
+        self._events = b""
+        # "pending" until it's decided whether the stream is sent, then "stream" if it is, or "done" if not
+        self._state = "pending"
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = dict(message.get("headers", []))
+            if not headers.get(b"content-type", b"").startswith(CONTENT_TYPE_SSE.encode()) or not self._accepts_json:
+                self._state = "stream"
+            else:
+                self._start = message
+                self._headers = {
+                    name.decode(): value.decode()
+                    for name, value in headers.items()
+                    if name.decode() == MCP_SESSION_ID_HEADER.lower()
+                }
+
+        if self._state == "stream":
+            await self._send(message)
+            return
+        if self._state == "done" or message["type"] != "http.response.body":
+            return
+
+        body = message.get("body", b"")
+        self._received.extend(body)
+        events, self._events = _sse_data(self._events + body)
+        for data in events:
+            if data is not None and _is_response(json.loads(data)):
+                self._state = "done"
+                await self._respond(Response(data, media_type=CONTENT_TYPE_JSON))
+                return
+            if self._accepts_sse:
+                # Upgrade to the SSE stream, that carries the messages sent so far and those to come
+                self._state = "stream"
+                assert self._start is not None
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": bytes(self._received), "more_body": True})
+                return
+            # The client can't be streamed to: the messages before the response are dropped
+
+        if not message.get("more_body", False):
+            self._state = "done"
+            await self._respond(_error_response(500, "Error processing request: No response received", INTERNAL_ERROR))
+
+    async def _respond(self, response: Response) -> None:
+        response.headers.update(self._headers)
+        await response(self._request.scope, self._request.receive, self._send)
+
+
+class _TransportResponse(Response):
+    """A response written through the ASGI `send` of the request, once its endpoint returned."""
+
+    def __init__(self, respond: Callable[[Send], Awaitable[None]]) -> None:
+        super().__init__()
+        self._respond = respond
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._respond(send)
+
+
+def _replayed(body: bytes, receive: Receive) -> Receive:
+    """The `receive` of a request whose body was read already: the body once more, then the rest of the request."""
+    replayed = False
+
+    async def replay() -> Message:
+        nonlocal replayed
+        if replayed:
+            return await receive()
+        replayed = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+def _accepted_types(request: Request) -> Tuple[bool, bool]:
+    """Whether the client accepts JSON, and SSE. A missing `Accept` header, or `*/*`, accepts both."""
+    accept = request.headers.get("accept", "")
+    media_types = [media_type.split(";")[0].strip() for media_type in accept.split(",") if media_type.strip()]
+    if not media_types or "*/*" in media_types:
+        return True, True
+    accepts_json = CONTENT_TYPE_JSON in media_types or "application/*" in media_types
+    accepts_sse = CONTENT_TYPE_SSE in media_types or "text/*" in media_types
+    return accepts_json, accepts_sse
+
+
+def _error_response(
+    status_code: int, message: str, code: int = INVALID_REQUEST, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    error = JSONRPCError(jsonrpc="2.0", id="server-error", error=ErrorData(code=code, message=message))
+    return Response(
+        error.model_dump_json(by_alias=True, exclude_none=True),
+        status_code=status_code,
+        media_type=CONTENT_TYPE_JSON,
+        headers=headers,
+    )
+
+
+class FastApiHttpTransport:
+    """
+    MCP's streamable HTTP transport, on a single endpoint, as a FastAPI-native alternative to the two channels of
+    the SSE transport.
+
+    Clients POST each message to the endpoint, and get the response in the body of the POST: as plain JSON, unless
+    the server sends notifications related to the request before responding (e.g. progress notifications, or the
+    chunks of a streamed result), in which case the response is upgraded to an SSE stream of those notifications,
+    ending with the response. Clients can also open a GET SSE stream to receive the messages that aren't related to
+    a request (e.g. `notifications/tools/list_changed`), and end their session with a DELETE.
+
+    Sessions are created by `initialize` requests, identified by the `Mcp-Session-Id` header of the following
+    requests, and each runs the MCP server in a background task until it's ended, or the transport is closed.
+
+    Sessions live in the process that started them, unless there's a `store`: then the workers share the sessions
+    of the store, and a worker that gets a request of a session started by another one resumes it, by initializing
+    a server of its own with the params the client initialized the session with. In `stateless` mode, there are no
+    sessions at all: each request is handled by a server of its own, that's already initialized, and ends with it.
+    """
+
+    def __init__(
+        self,
+        run_session: SessionRunner,
+        metrics: Optional[MCPMetrics] = None,
+        tracer: Optional[Tracer] = None,
+        store: Optional[SessionStore] = None,
+        stateless: bool = False,
+        request_capture: Optional[RequestCaptureConfig] = None,
+    ) -> None:
+        if stateless and store is not None:
+            raise ValueError("A stateless transport has no sessions to store")
+        self._run_session = run_session
+        self.metrics = metrics
+        self.tracer = tracer
+        self.store = store
+        self.stateless = stateless
+        self.request_capture = request_capture or RequestCaptureConfig()
+        self._sessions: Dict[str, _HttpSession] = {}
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+        self._resuming: Dict[str, "asyncio.Task[Optional[_HttpSession]]"] = {}
+        # When each local session last had a request, to end those left idle, with a store
+        self._last_active: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+
+    @property
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    async def handle_fastapi_post_message(self, request: Request) -> Response:
+        # The response is written by mcp's transport, as the message is handled
+        return _TransportResponse(functools.partial(self._respond_to_post, request))
+
+    async def _respond_to_post(self, request: Request, send: Send) -> None:
+        if self.tracer is None:
+            await self._handle_post_message(request, send)
+            return
+
+        # Continues the trace of the client, if it sent a `traceparent` header
+        with self.tracer.start_span("mcp.message.receive", parent=self.tracer.extract(request.headers)) as span:
+
+            async def traced_send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self._handle_post_message(request, traced_send)
+
+    async def _handle_post_message(self, request: Request, send: Send) -> None:
+        logger.debug("Handling POST message HTTP")
+
+        accepts_json, accepts_sse = _accepted_types(request)
+        if not (accepts_json or accepts_sse):
+            await self._reply(
+                request,
+                send,
+                _error_response(406, "Not Acceptable: Client must accept application/json or text/event-stream"),
+            )
+            return
+
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        if content_type != CONTENT_TYPE_JSON:
+            await self._reply(
+                request, send, _error_response(415, "Unsupported Media Type: Content-Type must be application/json")
+            )
+            return
+
+        body = await request.body()
+        if len(body) > MAXIMUM_MESSAGE_SIZE:
+            await self._reply(request, send, _error_response(413, "Payload Too Large: Message exceeds maximum size"))
+            return
+        if self.metrics is not None:
+            self.metrics.record_message(len(body))
+
+        try:
+            with self._span("mcp.message.parse"):
+                message = JSONRPCMessage.model_validate_json(body)
+        except ValidationError as e:
+            logger.error(f"Failed to parse message: {e}")
+            await self._reply(request, send, _error_response(400, "Parse error", PARSE_ERROR))
+            return
+
+        is_request = isinstance(message.root, JSONRPCRequest)
+        session_id = request.headers.get(MCP_SESSION_ID_HEADER)
+        if self.stateless:
+            # Without a session, the notifications of the client, like `notifications/initialized`, are about nothing
+            if not is_request:
+                await self._reply(request, send, Response(status_code=202))
+                return
+            session = await self._start_session(request, None)
+        elif session_id is None:
+            if not (isinstance(message.root, JSONRPCRequest) and message.root.method == "initialize"):
+                await self._reply(request, send, _error_response(400, "Bad Request: Missing session ID"))
+                return
+            if self.store is not None:
+                await self._sweep()
+            session = await self._start_session(request, uuid4().hex)
+            if session is not None and self.store is not None:
+                assert session.id is not None
+                await self.store.create(SessionRecord(session.id, dict(message.root.params or {})))
+        else:
+            session = await self._find_session(request, session_id)
+            if session is None:
+                await self._reply(request, send, _error_response(404, "Not Found: Invalid or expired session ID"))
+                return
+        if session is None:
+            await self._reply(request, send, _error_response(500, "Could not start the session", INTERNAL_ERROR))
+            return
+
+        span = current_span() if self.tracer is not None else None
+        if span is not None and session.id is not None:
+            span.set_attribute("mcp.session_id", session.id)
+
+        # mcp's transport makes the request the `request_context` of the message: its scope carries the context
+        scope = dict(request.scope, headers=_with_accept(request.scope["headers"]))
+        scope[MESSAGE_CONTEXT_KEY] = message_context(message, request, body, self.request_capture, span)
+        response = _PostResponse(request, send, accepts_json, accepts_sse)
+        try:
+            await session.handle(scope, _replayed(body, request.receive), response.send)
+        finally:
+            # The transient session of a stateless request ends with it
+            if session.id is None:
+                await session.end()
+
+    async def handle_fastapi_get(self, request: Request) -> Response:
+        """Open the stream of the messages of a session that aren't related to a request."""
+        if self.stateless:
+            return _error_response(405, "Method Not Allowed: The server is stateless", headers={"Allow": "POST"})
+
+        _, accepts_sse = _accepted_types(request)
+        if not accepts_sse:
+            return _error_response(406, "Not Acceptable: Client must accept text/event-stream")
+
+        session = await self._get_session(request)
+        if isinstance(session, Response):
+            return session
+        return _TransportResponse(functools.partial(self._stream, session, request))
+
+    async def _stream(self, session: _HttpSession, request: Request, send: Send) -> None:
+        session.streams += 1
+        try:
+            await session.handle(request.scope, request.receive, send)
+        finally:
+            session.streams -= 1
+
+    async def handle_fastapi_delete(self, request: Request) -> Response:
+        """End a session."""
+        if self.stateless:
+            return _error_response(405, "Method Not Allowed: The server is stateless", headers={"Allow": "POST"})
+
+        session_id = request.headers.get(MCP_SESSION_ID_HEADER)
+        if session_id is None:
+            return _error_response(400, "Bad Request: Missing session ID")
+
+        session = self._sessions.get(session_id)
+        found = session is not None
+        if self.store is not None:
+            # The session may have been started by another worker, and is then ended everywhere as it's looked up
+            found = found or await self.store.get(session_id) is not None
+            await self.store.delete(session_id)
+        if not found:
+            return _error_response(404, "Not Found: Invalid or expired session ID")
+
+        if session is not None:
+            await self._end_session(session)
+        return Response(status_code=200)
+
+    async def aclose(self) -> None:
+        """
+        End all the sessions of this worker, and wait for their servers to stop. Sessions stay in the store, if any,
+        for the other workers to resume.
+        """
+        for session in list(self._sessions.values()):
+            await session.end()
+        self._sessions.clear()
+        self._last_active.clear()
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _get_session(self, request: Request) -> "_HttpSession | Response":
+        session_id = request.headers.get(MCP_SESSION_ID_HEADER)
+        if session_id is None:
+            return _error_response(400, "Bad Request: Missing session ID")
+        session = await self._find_session(request, session_id)
+        if session is None:
+            return _error_response(404, "Not Found: Invalid or expired session ID")
+        return session
+
+    async def _find_session(self, request: Request, session_id: str) -> Optional[_HttpSession]:
+        """
+        The session with `session_id`, if it exists. With a store, the store decides: sessions started by other
+        workers are resumed, and those ended by other workers, or expired, are ended here too.
+        """
+        if self.store is None:
+            return self._sessions.get(session_id)
+
+        record = await self.store.get(session_id)
+        session = self._sessions.get(session_id)
+        if record is None:
+            if session is not None:
+                await self._end_session(session)
+            return None
+
+        # Postponing the expiry of the session on every request would be a write per request
+        if time.time() - record.last_active_at >= self.store.ttl / 10:
+            await self.store.touch(session_id)
+
+        # Concurrent requests of the session resume it once, and wait until its server is initialized again
+        resuming = self._resuming.get(session_id)
+        if resuming is None and session is None:
+            resuming = asyncio.create_task(self._resume_session(request, record))
+            self._resuming[session_id] = resuming
+            resuming.add_done_callback(lambda _: self._resuming.pop(session_id, None))
+        if resuming is not None:
+            session = await asyncio.shield(resuming)
+            if session is None:
+                return None
+
+        self._last_active[session_id] = time.monotonic()
+        return session
+
+    async def _resume_session(self, request: Request, record: SessionRecord) -> Optional[_HttpSession]:
+        """Start a session of the store here, and initialize its server as the client did when it started it."""
+        await self._sweep()
+        session = await self._start_session(request, record.session_id)
+        if session is None:
+            return None
+
+        initialize = JSONRPCRequest(
+            jsonrpc="2.0", id=f"resume-{uuid4().hex}", method="initialize", params=record.client_params
+        )
+        status_code, messages = await session.post(JSONRPCMessage(initialize))
+        if status_code != 200 or not any(_is_response(message) for message in messages):
+            logger.warning(f"Failed to initialize resumed session {record.session_id}: {status_code} {messages}")
+            return None
+        for message in messages:
+            if "error" in message:
+                logger.warning(f"Failed to initialize resumed session {record.session_id}: {message['error']}")
+
+        initialized = JSONRPCNotification(jsonrpc="2.0", method="notifications/initialized")
+        status_code, _ = await session.post(JSONRPCMessage(initialized))
+        if status_code != 202:
+            return None
+
+        logger.debug(f"Resumed session {record.session_id}")
+        return session
+
+    async def _start_session(self, request: Request, session_id: Optional[str]) -> Optional[_HttpSession]:
+        """
+        Start a session, and the MCP server on its streams. A session without an ID is a transient one, of stateless
+        mode: it isn't registered, and its server is already initialized.
+        """
+        session = _HttpSession(session_id)
+        started = anyio.Event()
+        connected = False
+
+        async def run() -> None:
+            nonlocal connected
+            try:
+                async with session.transport.connect() as (read_stream, write_stream):
+                    connected = True
+                    if session_id is not None:
+                        self._sessions[session_id] = session
+                        self._last_active[session_id] = time.monotonic()
+                        if self.metrics is not None:
+                            self.metrics.http_sessions.inc()
+                    started.set()
+                    await self._run_session(request, read_stream, write_stream, session_id is None)
+            except Exception:
+                # Ending a session closes its streams under its server, which is how it's meant to stop
+                if not session.ended:
+                    logger.exception(f"Error in MCP session {session_id}")
+            finally:
+                started.set()
+                if session_id is not None and self._sessions.get(session_id) is session:
+                    del self._sessions[session_id]
+                    self._last_active.pop(session_id, None)
+                    if self.metrics is not None:
+                        self.metrics.http_sessions.dec()
+
+        # The session outlives the request that starts it. Its task is created from the context of the request, so
+        # that the context set by `run_session` from the request applies to all the messages of the session
+        session.task = asyncio.create_task(run())
+        self._tasks.add(session.task)
+        session.task.add_done_callback(self._tasks.discard)
+
+        await started.wait()
+        return session if connected and not session.ended else None
+
+    async def _end_session(self, session: _HttpSession) -> None:
+        if session.id is not None and self._sessions.get(session.id) is session:
+            del self._sessions[session.id]
+            self._last_active.pop(session.id, None)
+        await session.end()
+
+    async def _sweep(self) -> None:
+        """
+        Every so often, end the local sessions that have been idle for longer than the store keeps sessions, and
+        purge the store. Clients often leave without ending their session, and with a store, the next request of a
+        session may go to any worker.
+        """
+        assert self.store is not None
+        now = time.monotonic()
+        if now - self._last_sweep < self.store.ttl / 10:
+            return
+        self._last_sweep = now
+
+        for session_id, last_active in list(self._last_active.items()):
+            session = self._sessions.get(session_id)
+            # An open GET stream keeps its session, even without requests
+            if session is not None and now - last_active > self.store.ttl and not session.streams:
+                await self._end_session(session)
+        await self.store.purge()
+
+    @staticmethod
+    async def _reply(request: Request, send: Send, response: Response) -> None:
+        await response(request.scope, request.receive, send)
+
+    def _span(self, name: str):
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.start_span(name)
+
+
+def _with_accept(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """The headers of a POST, accepting what mcp's transport requires: `_PostResponse` answers what the client accepts."""
+    return [(name, value) for name, value in headers if name != b"accept"] + [(b"accept", _ACCEPT_BOTH.encode())]
@@ -0,0 +1,138 @@
+import json
+import time
+from typing import Any, Optional
+
+from fastapi import Request
+from mcp.shared.message import ServerMessageMetadata, SessionMessage
+from mcp.types import JSONRPCMessage, JSONRPCRequest
+
+from fastapi_mcp.tracing import Span
+from fastapi_mcp.types import HTTPRequestInfo, RequestCaptureConfig
+
+
+# The key of the ASGI scope under which the streamable HTTP transport puts the context of a message: mcp's transport
+# makes the request that carried the message its `request_context`, rather than the context itself
+MESSAGE_CONTEXT_KEY = "fastapi_mcp.message_context"
+
+
+class MessageContext:
+    """
+    What the handler of a message gets to know about the HTTP request that carried it, whatever the transport: the
+    parts of the request captured per a `RequestCaptureConfig`, forwarded to the API for auth, and the trace context.
+
+    It travels with the message, as the `request_context` of the metadata of its `SessionMessage`, which the MCP
+    server makes the `request` of the context of the handler. With the streamable HTTP transport, that's the request
+    that carried the message, with the context in its scope. Nothing is serialized or validated on the way, and the
+    request is only captured if the handler asks for it.
+    """
+
+    def __init__(
+        self,
+        request: Optional[Request],
+        body: bytes,
+        config: RequestCaptureConfig,
+        traceparent: Optional[str] = None,
+        accepted_at: Optional[int] = None,
+    ) -> None:
+        self._request = request
+        self._body = body
+        self._config = config
+        self._request_info: Optional[HTTPRequestInfo] = None
+        self.traceparent = traceparent
+        # When the message was accepted, in nanoseconds since the epoch, to measure how long it waits to be handled
+        self.accepted_at = accepted_at
+
+    @property
+    def request_info(self) -> Optional[HTTPRequestInfo]:
+        if self._request_info is None and self._request is not None:
+            self._request_info = capture_request(self._request, self._body, self._config)
+            # The request is no longer needed
+            self._request = None
+        return self._request_info
+
+    def to_json(self) -> str:
+        """The context, captured, to be relayed along with its message to another process."""
+        request_info = self.request_info
+        return json.dumps(
+            {
+                "request_info": request_info.model_dump(mode="json") if request_info is not None else None,
+                "traceparent": self.traceparent,
+                "accepted_at": self.accepted_at,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "MessageContext":
+        fields = json.loads(data)
+        context = cls(None, b"", RequestCaptureConfig(), fields["traceparent"], fields["accepted_at"])
+        if fields["request_info"] is not None:
+            # Captured by another worker of the app, from a request of Starlette: it's already well-formed
+            context._request_info = HTTPRequestInfo.model_construct(**fields["request_info"])
+        return context
+
+
+def capture_request(request: Request, body: bytes, config: RequestCaptureConfig) -> HTTPRequestInfo:
+    """The parts of `request` that `config` asks for."""
+    if config.headers is None:
+        headers = dict(request.headers)
+    else:
+        headers = {}
+        for name in config.headers:
+            value = request.headers.get(name)
+            if value is not None:
+                headers[name.lower()] = value
+
+    # The values come from Starlette, with the right types already: no need to validate them
+    return HTTPRequestInfo.model_construct(
+        method=request.method,
+        path=request.url.path,
+        headers=headers,
+        cookies=request.cookies if config.cookies else {},
+        query_params=dict(request.query_params) if config.query_params else {},
+        body=body.decode() if config.body else None,
+    )
+
+
+def message_context(
+    message: JSONRPCMessage,
+    request: Request,
+    body: bytes,
+    config: RequestCaptureConfig,
+    span: Optional[Span] = None,
+) -> Optional[MessageContext]:
+    """
+    The context to attach to a message received by `request`, if it's a request: notifications and responses have
+    no handler to get it.
+    """
+    if span is not None:
+        span.set_attribute("mcp.message_size", len(body))
+        if hasattr(message.root, "method"):
+            span.set_attribute("mcp.method", message.root.method)
+
+    if not isinstance(message.root, JSONRPCRequest):
+        return None
+    if span is None:
+        return MessageContext(request, body, config)
+    # Carry the trace context to the handler of the message
+    return MessageContext(request, body, config, span.context.to_traceparent(), time.time_ns())
+
+
+def session_message(message: JSONRPCMessage, context: Optional[MessageContext]) -> SessionMessage:
+    """The message to hand off to a session, along with its context."""
+    if context is None:
+        return SessionMessage(message)
+    return SessionMessage(message, metadata=ServerMessageMetadata(request_context=context))
+
+
+def get_message_context(message: SessionMessage) -> Optional[MessageContext]:
+    metadata = message.metadata
+    if isinstance(metadata, ServerMessageMetadata):
+        return as_message_context(metadata.request_context)
+    return None
+
+
+def as_message_context(request_context: Any) -> Optional[MessageContext]:
+    """The context of a message, from the `request_context` of its metadata: the context, or the request carrying it."""
+    if isinstance(request_context, Request):
+        request_context = request_context.scope.get(MESSAGE_CONTEXT_KEY)
+    return request_context if isinstance(request_context, MessageContext) else None
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import struct
+import tempfile
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from fastapi_mcp.sessions import SessionRecord, SessionStore
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Frames are a 4-byte length, then the session ID and the message, separated by a newline. Each is acknowledged with
+# one byte, once the message is queued for its session, or if the session isn't held by the worker
+_FRAME_HEADER = struct.Struct("!I")
+_DELIVERED = b"\x01"
+_UNKNOWN_SESSION = b"\x00"
+
+# Connections kept open to each other worker, between messages
+MAX_IDLE_CONNECTIONS = 8
+
+# Owners of sessions remembered, to not look them up in the store for each message
+MAX_CACHED_OWNERS = 10000
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class MessageRelay:
+    """
+    Delivers the messages posted to any worker of a host to the worker holding the stream of their session.
+
+    Each worker listens on a Unix domain socket of `directory`, and records itself as the owner of its sessions in the
+    shared `store`. A worker that gets a message of a session it doesn't hold looks up its owner, and forwards the
+    message to it, which hands it to the session with `deliver`. The owner keeps its sessions from expiring in the
+    store while they're open, and forgets them when they end: the sessions of a worker that dies expire.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        deliver: Callable[[str, bytes], bool],
+        directory: Optional[str] = None,
+    ) -> None:
+        self.store = store
+        self._deliver = deliver
+        self.directory = directory or tempfile.gettempdir()
+        self.address = os.path.join(self.directory, f"fastapi-mcp-{os.getpid()}-{uuid4().hex[:8]}.sock")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._keep_alive_task: Optional["asyncio.Task[None]"] = None
+        self._starting: Optional[asyncio.Lock] = None
+        self._sessions: Set[str] = set()
+        self._owners: Dict[str, str] = {}
+        self._idle_connections: Dict[str, List[_Connection]] = {}
+        self._served_connections: Set[asyncio.StreamWriter] = set()
+
+    async def register(self, session_id: str) -> None:
+        """Record this worker as the owner of a session, listening for the messages of its sessions if not yet."""
+        await self._listen()
+        self._sessions.add(session_id)
+        await self.store.create(SessionRecord(session_id, {}, owner=self.address))
+
+    async def unregister(self, session_id: str) -> None:
+        self._sessions.discard(session_id)
+        await self.store.delete(session_id)
+
+    async def forward(self, session_id: str, data: bytes) -> bool:
+        """Deliver a message to a session held by another worker. False if no worker holds the session."""
+        owner = self._owners.get(session_id)
+        if owner is None:
+            record = await self.store.get(session_id)
+            if record is None or record.owner is None or record.owner == self.address:
+                return False
+            owner = record.owner
+            if len(self._owners) >= MAX_CACHED_OWNERS:
+                del self._owners[next(iter(self._owners))]
+            self._owners[session_id] = owner
+
+        try:
+            delivered = await self._send(owner, session_id, data)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # The owner is gone, and its sessions with it
+            logger.warning(f"Worker {owner} of session {session_id} is gone")
+            await self.store.delete(session_id)
+            delivered = False
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Failed to relay a message of session {session_id} to {owner}: {e!r}")
+            delivered = False
+
+        if not delivered:
+            self._owners.pop(session_id, None)
+        return delivered
+
+    async def aclose(self) -> None:
+        """Stop relaying, and forget the sessions of this worker."""
+        if self._keep_alive_task is not None:
+            self._keep_alive_task.cancel()
+            self._keep_alive_task = None
+
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._served_connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+
+        for connections in self._idle_connections.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle_connections.clear()
+
+        for session_id in list(self._sessions):
+            await self.store.delete(session_id)
+        self._sessions.clear()
+
+    async def _listen(self) -> None:
+        if self._starting is None:
+            self._starting = asyncio.Lock()
+        async with self._starting:
+            if self._server is not None:
+                return
+            self._server = await asyncio.start_unix_server(self._serve, path=self.address)
+            self._keep_alive_task = asyncio.create_task(self._keep_alive())
+            logger.debug(f"Relaying messages at {self.address}")
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._served_connections.add(writer)
+        try:
+            while True:
+                (size,) = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+                session_id, _, data = (await reader.readexactly(size)).partition(b"\n")
+                delivered = self._deliver(session_id.decode(), data)
+                writer.write(_DELIVERED if delivered else _UNKNOWN_SESSION)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # The other worker closed the connection
+            pass
+        finally:
+            self._served_connections.discard(writer)
+            writer.close()
+
+    async def _send(self, owner: str, session_id: str, data: bytes) -> bool:
+        idle = self._idle_connections.setdefault(owner, [])
+        reader, writer = idle.pop() if idle else await asyncio.open_unix_connection(owner)
+        frame = session_id.encode() + b"\n" + data
+        try:
+            writer.write(_FRAME_HEADER.pack(len(frame)) + frame)
+            await writer.drain()
+            acknowledgement = await reader.readexactly(1)
+        except BaseException:
+            writer.close()
+            raise
+
+        if len(idle) < MAX_IDLE_CONNECTIONS:
+            idle.append((reader, writer))
+        else:
+            writer.close()
+        return acknowledgement == _DELIVERED
+
+    async def _keep_alive(self) -> None:
+        """Postpone the expiry of the sessions of this worker, which may go without any message for a while."""
+        while True:
+            await asyncio.sleep(self.store.ttl / 10)
+            for session_id in list(self._sessions):
+                try:
+                    await self.store.touch(session_id)
+                except Exception:
+                    logger.exception(f"Failed to keep session {session_id} alive")
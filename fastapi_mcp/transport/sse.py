@@ -1,21 +1,124 @@
-from uuid import UUID
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from urllib.parse import quote
+from uuid import UUID, uuid4
 import logging
-from typing import Union
+from typing import Any, Dict, Optional, Set, Union
 
-from anyio.streams.memory import MemoryObjectSendStream
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 from fastapi import Request, Response, BackgroundTasks, HTTPException
 from fastapi.responses import JSONResponse
 from mcp.shared.message import SessionMessage
 from pydantic import ValidationError
 from mcp.server.sse import SseServerTransport
 from mcp.types import JSONRPCMessage, JSONRPCError, ErrorData
-from fastapi_mcp.types import HTTPRequestInfo
+from sse_starlette import EventSourceResponse
+from starlette.types import Receive, Scope, Send
+from fastapi_mcp.metrics import MCPMetrics
+from fastapi_mcp.sessions import SessionStore
+from fastapi_mcp.tracing import SpanContext, Tracer, current_span
+from fastapi_mcp.types import RequestCaptureConfig
+from fastapi_mcp.transport.messages import MessageContext, get_message_context, message_context, session_message
+from fastapi_mcp.transport.relay import MessageRelay
 
 
 logger = logging.getLogger(__name__)
 
 
 class FastApiSseTransport(SseServerTransport):
+    """
+    The SSE transport of MCP, integrated with FastAPI.
+
+    The stream of a session is held by the worker that accepted it. With a `store` shared by the workers of a host,
+    the messages posted to the other workers are relayed to it (see `MessageRelay`), so that the workers don't need
+    sticky sessions in front of them.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        metrics: Optional[MCPMetrics] = None,
+        tracer: Optional[Tracer] = None,
+        store: Optional[SessionStore] = None,
+        request_capture: Optional[RequestCaptureConfig] = None,
+    ) -> None:
+        super().__init__(endpoint)
+        self.metrics = metrics
+        self.tracer = tracer
+        self.request_capture = request_capture or RequestCaptureConfig()
+        self.relay = MessageRelay(store, self._deliver) if store is not None else None
+        self._relayed_sends: Set["asyncio.Task[None]"] = set()
+
+    @asynccontextmanager
+    async def connect_sse(self, scope: Scope, receive: Receive, send: Send):
+        """
+        A reimplementation of the connect_sse method of SseServerTransport, that forgets the session when its
+        stream ends, and, with a relay, records the session as held by this worker before telling the client where
+        to post its messages: they may be posted to any worker.
+        """
+        if scope["type"] != "http":
+            logger.error("connect_sse received non-HTTP request")
+            raise ValueError("connect_sse can only handle HTTP requests")
+
+        read_stream_writer: MemoryObjectSendStream[SessionMessage | Exception]
+        read_stream: MemoryObjectReceiveStream[SessionMessage | Exception]
+        read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+        write_stream, write_stream_reader = anyio.create_memory_object_stream[SessionMessage](0)
+
+        session_id = uuid4()
+        self._read_stream_writers[session_id] = read_stream_writer
+        logger.debug(f"Created new session with ID: {session_id}")
+        if self.metrics is not None:
+            self.metrics.sse_sessions.inc()
+
+        try:
+            if self.relay is not None:
+                await self.relay.register(session_id.hex)
+
+            # The messages endpoint, relative to the root path of the app
+            root_path = scope.get("root_path", "")
+            client_post_uri_data = f"{quote(root_path.rstrip('/') + self._endpoint)}?session_id={session_id.hex}"
+
+            sse_stream_writer, sse_stream_reader = anyio.create_memory_object_stream[Dict[str, Any]](0)
+
+            async def sse_writer():
+                async with sse_stream_writer, write_stream_reader:
+                    await sse_stream_writer.send({"event": "endpoint", "data": client_post_uri_data})
+                    async for session_message in write_stream_reader:
+                        await sse_stream_writer.send(
+                            {
+                                "event": "message",
+                                "data": session_message.message.model_dump_json(by_alias=True, exclude_none=True),
+                            }
+                        )
+
+            async with anyio.create_task_group() as tg:
+
+                async def response_wrapper(scope: Scope, receive: Receive, send: Send):
+                    # The response returns when the client disconnects: closing our side of the streams ends the
+                    # session
+                    await EventSourceResponse(content=sse_stream_reader, data_sender_callable=sse_writer)(
+                        scope, receive, send
+                    )
+                    await read_stream_writer.aclose()
+                    await write_stream_reader.aclose()
+                    logger.debug(f"Client session disconnected {session_id}")
+
+                tg.start_soon(response_wrapper, scope, receive, send)
+                yield (read_stream, write_stream)
+        finally:
+            self._read_stream_writers.pop(session_id, None)
+            if self.relay is not None:
+                await self.relay.unregister(session_id.hex)
+            if self.metrics is not None:
+                self.metrics.sse_sessions.dec()
+
+    async def aclose(self) -> None:
+        """Stop relaying the messages of the sessions of this worker."""
+        if self.relay is not None:
+            await self.relay.aclose()
+
     async def handle_fastapi_post_message(self, request: Request) -> Response:
         """
         A reimplementation of the handle_post_message method of SseServerTransport
@@ -34,7 +137,16 @@ class FastApiSseTransport(SseServerTransport):
         tracing tools like Sentry, which had destructive effects on the request object
         when using the original implementation.
         """
+        if self.tracer is None:
+            return await self._handle_post_message(request)
+
+        # Continues the trace of the client, if it sent a `traceparent` header
+        with self.tracer.start_span("mcp.message.receive", parent=self.tracer.extract(request.headers)) as span:
+            response = await self._handle_post_message(request)
+            span.set_attribute("http.status_code", response.status_code)
+            return response
 
+    async def _handle_post_message(self, request: Request) -> Response:
         logger.debug("Handling POST message SSE")
 
         session_id_param = request.query_params.get("session_id")
@@ -50,35 +162,34 @@ class FastApiSseTransport(SseServerTransport):
             raise HTTPException(status_code=400, detail="Invalid session ID")
 
         writer = self._read_stream_writers.get(session_id)
-        if not writer:
+        if not writer and self.relay is None:
             logger.warning(f"Could not find session for ID: {session_id}")
             raise HTTPException(status_code=404, detail="Could not find session")
 
         body = await request.body()
         logger.debug(f"Received JSON: {body.decode()}")
+        if self.metrics is not None:
+            self.metrics.record_message(len(body))
 
         try:
-            message = JSONRPCMessage.model_validate_json(body)
-
-            # HACK to inject the HTTP request info into the MCP message,
-            # so we can use it for auth.
-            # It is then used in our custom `LowlevelMCPServer.call_tool()` decorator.
-            if hasattr(message.root, "params") and message.root.params is not None:
-                message.root.params["_http_request_info"] = HTTPRequestInfo(
-                    method=request.method,
-                    path=request.url.path,
-                    headers=dict(request.headers),
-                    cookies=request.cookies,
-                    query_params=dict(request.query_params),
-                    body=body.decode(),
-                ).model_dump(mode="json")
+            with self._span("mcp.message.parse"):
+                message = JSONRPCMessage.model_validate_json(body)
+
+            span = current_span() if self.tracer is not None else None
+            if span is not None:
+                span.set_attribute("mcp.session_id", session_id.hex)
+            context = message_context(message, request, body, self.request_capture, span)
 
             logger.debug(f"Validated client message: {message}")
         except ValidationError as err:
             logger.error(f"Failed to parse message: {err}")
+            if not writer:
+                return await self._relay_message(session_id, _parse_error(err), None, status_code=400)
             # Create background task to send error
             background_tasks = BackgroundTasks()
             background_tasks.add_task(self._send_message_safely, writer, err)
+            if self.metrics is not None:
+                self.metrics.messages_queued.inc()
             response = JSONResponse(content={"error": "Could not parse message"}, status_code=400)
             response.background = background_tasks
             return response
@@ -86,9 +197,14 @@ class FastApiSseTransport(SseServerTransport):
             logger.error(f"Error processing request body: {e}")
             raise HTTPException(status_code=400, detail="Invalid request body")
 
+        if not writer:
+            return await self._relay_message(session_id, message, context, status_code=202)
+
         # Create background task to send message
         background_tasks = BackgroundTasks()
-        background_tasks.add_task(self._send_message_safely, writer, SessionMessage(message))
+        background_tasks.add_task(self._send_message_safely, writer, session_message(message, context))
+        if self.metrics is not None:
+            self.metrics.messages_queued.inc()
         logger.debug("Accepting message, will send in background")
 
         # Return response with background task
@@ -96,6 +212,68 @@ class FastApiSseTransport(SseServerTransport):
         response.background = background_tasks
         return response
 
+    async def _relay_message(
+        self, session_id: UUID, message: JSONRPCMessage, context: Optional[MessageContext], status_code: int
+    ) -> Response:
+        """Forward a message to the worker that holds its session, if any, along with its context."""
+        assert self.relay is not None
+        with self._span("mcp.message.relay"):
+            data = b"\n".join(
+                (
+                    context.to_json().encode() if context is not None else b"",
+                    message.model_dump_json(by_alias=True, exclude_none=True).encode(),
+                )
+            )
+            delivered = await self.relay.forward(session_id.hex, data)
+        if not delivered:
+            logger.warning(f"Could not find session for ID: {session_id}")
+            raise HTTPException(status_code=404, detail="Could not find session")
+
+        if self.metrics is not None:
+            self.metrics.relayed_messages.inc(("sent",))
+        if status_code == 400:
+            return JSONResponse(content={"error": "Could not parse message"}, status_code=400)
+        return JSONResponse(content={"message": "Accepted"}, status_code=202)
+
+    def _deliver(self, session_id: str, data: bytes) -> bool:
+        """Queue a message relayed by another worker for its session, if this worker holds it."""
+        try:
+            writer = self._read_stream_writers.get(UUID(hex=session_id))
+        except ValueError:
+            return False
+        if writer is None:
+            return False
+
+        context_data, _, message_data = data.partition(b"\n")
+        try:
+            context = MessageContext.from_json(context_data.decode()) if context_data else None
+            message = session_message(JSONRPCMessage.model_validate_json(message_data), context)
+        except ValidationError as err:
+            logger.error(f"Failed to parse relayed message: {err}")
+            return True
+
+        if self.metrics is not None:
+            self.metrics.relayed_messages.inc(("received",))
+            self.metrics.messages_queued.inc()
+        task = asyncio.create_task(self._send_message_safely(writer, message))
+        self._relayed_sends.add(task)
+        task.add_done_callback(self._relayed_sends.discard)
+        return True
+
+    def _span(self, name: str):
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.start_span(name)
+
+    def _handoff_span(self, message: SessionMessage):
+        # Background tasks run after the response is sent, outside of the span of the request: the trace context
+        # is the one carried by the message, if any
+        context = get_message_context(message)
+        parent = SpanContext.from_traceparent(context.traceparent) if context is not None else None
+        if self.tracer is None or parent is None:
+            return nullcontext()
+        return self.tracer.start_span("mcp.message.handoff", parent=parent)
+
     async def _send_message_safely(
         self, writer: MemoryObjectSendStream[SessionMessage], message: Union[SessionMessage, ValidationError]
     ):
@@ -105,20 +283,28 @@ class FastApiSseTransport(SseServerTransport):
             logger.debug(f"Sending message to writer from background task: {message}")
 
             if isinstance(message, ValidationError):
-                # Convert ValidationError to JSONRPCError
-                error_data = ErrorData(
-                    code=-32700,  # Parse error code in JSON-RPC
-                    message="Parse error",
-                    data={"validation_error": str(message)},
-                )
-                json_rpc_error = JSONRPCError(
-                    jsonrpc="2.0",
-                    id="unknown",  # We don't know the ID from the invalid request
-                    error=error_data,
-                )
-                error_message = SessionMessage(JSONRPCMessage(root=json_rpc_error))
-                await writer.send(error_message)
+                await writer.send(SessionMessage(_parse_error(message)))
             else:
-                await writer.send(message)
+                # Spans the wait for the session to take the message, which also blocks while it is busy
+                with self._handoff_span(message):
+                    await writer.send(message)
         except Exception as e:
             logger.error(f"Error sending message to writer: {e}")
+        finally:
+            if self.metrics is not None:
+                self.metrics.messages_queued.dec()
+
+
+def _parse_error(error: ValidationError) -> JSONRPCMessage:
+    """The JSON-RPC error sent to a session for a message that couldn't be parsed."""
+    error_data = ErrorData(
+        code=-32700,  # Parse error code in JSON-RPC
+        message="Parse error",
+        data={"validation_error": str(error)},
+    )
+    json_rpc_error = JSONRPCError(
+        jsonrpc="2.0",
+        id="unknown",  # We don't know the ID from the invalid request
+        error=error_data,
+    )
+    return JSONRPCMessage(root=json_rpc_error)
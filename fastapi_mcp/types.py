@@ -28,6 +28,270 @@ class HTTPRequestInfo(BaseType):
     body: Any
 
 
+class RequestCaptureConfig(BaseType):
+    headers: Annotated[
+        Optional[List[str]],
+        Doc(
+            """
+            Names of the headers to capture (case-insensitive), or `None` to capture all of them. The
+            `Authorization` header is forwarded to the API by tool calls.
+            """
+        ),
+    ] = ["authorization"]
+
+    cookies: Annotated[
+        bool,
+        Doc(
+            """
+            Whether to capture the cookies of the request.
+            """
+        ),
+    ] = False
+
+    query_params: Annotated[
+        bool,
+        Doc(
+            """
+            Whether to capture the query params of the request.
+            """
+        ),
+    ] = False
+
+    body: Annotated[
+        bool,
+        Doc(
+            """
+            Whether to capture the body of the request, i.e. the MCP message, as text.
+            """
+        ),
+    ] = False
+
+
+class CacheConfig(BaseType):
+    max_entries: Annotated[
+        int,
+        Doc(
+            """
+            Maximum number of cached responses. The least recently used entries are evicted first.
+            """
+        ),
+    ] = 1024
+
+    ttl: Annotated[
+        float,
+        Doc(
+            """
+            Freshness lifetime, in seconds, of responses that don't specify one with `Cache-Control: max-age`
+            (or of all responses, if `respect_cache_control` is `False`).
+            """
+        ),
+    ] = 60.0
+
+    respect_cache_control: Annotated[
+        bool,
+        Doc(
+            """
+            Whether to follow the `Cache-Control`, `ETag` and `Last-Modified` headers of your app's responses.
+
+            If `False`, every successful GET response is cached for `ttl` seconds.
+            """
+        ),
+    ] = True
+
+    invalidate_on_mutation: Annotated[
+        bool,
+        Doc(
+            """
+            Whether successful non-GET tool calls invalidate the cached responses under the same path
+            (and its parent paths).
+            """
+        ),
+    ] = True
+
+
+class ConcurrencyConfig(BaseType):
+    max_concurrent_calls: Annotated[
+        Optional[int],
+        Doc(
+            """
+            Maximum number of tool calls executing at the same time, across all tools and sessions.
+            """
+        ),
+    ] = None
+
+    per_operation: Annotated[
+        Dict[str, int],
+        Doc(
+            """
+            Maximum number of concurrent calls per operation ID (tool name).
+
+            Example: `{"generate_report": 2}`
+            """
+        ),
+    ] = {}
+
+    per_tag: Annotated[
+        Dict[str, int],
+        Doc(
+            """
+            Maximum number of concurrent calls across all operations with a given tag.
+
+            Example: `{"reports": 4}`
+            """
+        ),
+    ] = {}
+
+    max_queue_size: Annotated[
+        int,
+        Doc(
+            """
+            Maximum number of calls waiting for a slot, per limit. Calls beyond that are rejected right away
+            with an MCP error, instead of piling up.
+            """
+        ),
+    ] = 100
+
+    queue_timeout: Annotated[
+        Optional[float],
+        Doc(
+            """
+            Maximum number of seconds a call waits in the queue before being rejected. `None` waits indefinitely.
+            """
+        ),
+    ] = None
+
+
+class UpstreamConfig(BaseType):
+    base_url: Annotated[
+        str,
+        Doc(
+            """
+            The base URL of the deployed API that tool calls are sent to, e.g. `https://api.example.com`.
+            """
+        ),
+    ]
+
+    timeout: Annotated[
+        float,
+        Doc(
+            """
+            Default timeout, in seconds, for connecting, reading, writing and acquiring a pooled connection.
+            """
+        ),
+    ] = 10.0
+
+    connect_timeout: Annotated[
+        Optional[float],
+        Doc("Timeout, in seconds, for establishing a connection. Defaults to `timeout`."),
+    ] = None
+
+    read_timeout: Annotated[
+        Optional[float],
+        Doc("Timeout, in seconds, for receiving a chunk of the response. Defaults to `timeout`."),
+    ] = None
+
+    write_timeout: Annotated[
+        Optional[float],
+        Doc("Timeout, in seconds, for sending a chunk of the request. Defaults to `timeout`."),
+    ] = None
+
+    pool_timeout: Annotated[
+        Optional[float],
+        Doc("Timeout, in seconds, for waiting for a free connection from the pool. Defaults to `timeout`."),
+    ] = None
+
+    max_connections: Annotated[
+        Optional[int],
+        Doc(
+            """
+            Maximum number of concurrent connections to the API. Requests beyond that wait for a free connection.
+            `None` means no limit.
+            """
+        ),
+    ] = 100
+
+    max_keepalive_connections: Annotated[
+        Optional[int],
+        Doc("Maximum number of idle connections kept open for reuse."),
+    ] = 20
+
+    keepalive_expiry: Annotated[
+        Optional[float],
+        Doc("Number of seconds an idle connection is kept open for reuse."),
+    ] = 5.0
+
+    http2: Annotated[
+        bool,
+        Doc(
+            """
+            Whether to use HTTP/2 when the API supports it. Requires the `h2` package (`pip install httpx[http2]`).
+            """
+        ),
+    ] = False
+
+    verify: Annotated[
+        bool,
+        Doc("Whether to verify the TLS certificate of the API."),
+    ] = True
+
+    warm_up_connections: Annotated[
+        int,
+        Doc(
+            """
+            Number of connections to open on startup, so the first tool calls don't pay for the connection
+            setup (and TLS handshake). `0` disables the warm-up.
+            """
+        ),
+    ] = 0
+
+    warm_up_path: Annotated[
+        str,
+        Doc(
+            """
+            Path of the `HEAD` requests used to open the connections on startup. Any response, even an error,
+            leaves a connection warm.
+            """
+        ),
+    ] = "/"
+
+
+class ToolVisibility(BaseType):
+    """
+    The tools a session may list and call, as returned by a `visibility_policy`. Every constraint that is set
+    applies: a tool is visible only if it passes all of them.
+    """
+
+    scopes: Annotated[
+        Optional[List[str]],
+        Doc(
+            """
+            The scopes granted to the session, e.g. from its access token. Tools whose operation requires any other
+            scope (in the `security` requirements of its OpenAPI operation) are hidden. `None` doesn't check scopes.
+            """
+        ),
+    ] = None
+
+    include_operations: Annotated[
+        Optional[List[str]],
+        Doc("Only the tools of these operation IDs are visible"),
+    ] = None
+
+    exclude_operations: Annotated[
+        Optional[List[str]],
+        Doc("The tools of these operation IDs are hidden"),
+    ] = None
+
+    include_tags: Annotated[
+        Optional[List[str]],
+        Doc("Only the tools of operations with at least one of these tags are visible"),
+    ] = None
+
+    exclude_tags: Annotated[
+        Optional[List[str]],
+        Doc("The tools of operations with any of these tags are hidden"),
+    ] = None
+
+
 class OAuthMetadata(BaseType):
     """OAuth 2.0 Server Metadata according to RFC 8414"""
 
@@ -0,0 +1,166 @@
+import inspect
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from fastapi_mcp.openapi.lazy import HTTP_METHODS
+from fastapi_mcp.types import HTTPRequestInfo, ToolVisibility
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+VisibilityPolicy = Callable[
+    [HTTPRequestInfo],
+    Union[Optional[ToolVisibility], Awaitable[Optional[ToolVisibility]]],
+]
+
+
+class VisibilityIndex:
+    """
+    Bitset indexes of the operations of a catalog: bit `i` stands for the `i`-th operation, and each tag, operation
+    ID and scope maps to the set of operations it applies to. Selecting the operations visible to a session is then
+    a handful of integer `&`, `|` and `~`, however many operations there are.
+
+    Following FastAPI, where all the security dependencies of an operation run, an operation requires every scope
+    of every one of its `security` requirements.
+    """
+
+    def __init__(self, operation_ids: Iterable[str], openapi_schema: Dict[str, Any]):
+        self.operation_ids: List[str] = list(dict.fromkeys(operation_ids))
+        self._operation_bits: Dict[str, int] = {
+            operation_id: 1 << position for position, operation_id in enumerate(self.operation_ids)
+        }
+        self.all = (1 << len(self.operation_ids)) - 1
+        self._tag_bits: Dict[str, int] = {}
+        self._scope_bits: Dict[str, int] = {}
+
+        for path_item in openapi_schema.get("paths", {}).values():
+            for method, operation in path_item.items():
+                if method not in HTTP_METHODS:
+                    continue
+
+                bit = self._operation_bits.get(operation.get("operationId"))
+                if bit is None:
+                    continue
+
+                for tag in operation.get("tags", []):
+                    self._tag_bits[tag] = self._tag_bits.get(tag, 0) | bit
+                for requirement in operation.get("security", []):
+                    for scopes in requirement.values():
+                        for scope in scopes:
+                            self._scope_bits[scope] = self._scope_bits.get(scope, 0) | bit
+
+    def operations(self, operation_ids: Iterable[str]) -> int:
+        """The set of the given operations. Unknown IDs are ignored."""
+        mask = 0
+        for operation_id in operation_ids:
+            mask |= self._operation_bits.get(operation_id, 0)
+        return mask
+
+    def tags(self, tags: Iterable[str]) -> int:
+        """The set of the operations with any of the given tags."""
+        mask = 0
+        for tag in tags:
+            mask |= self._tag_bits.get(tag, 0)
+        return mask
+
+    def requiring_other_scopes(self, scopes: Iterable[str]) -> int:
+        """The set of the operations that require a scope not in `scopes`."""
+        granted = set(scopes)
+        mask = 0
+        for scope, bits in self._scope_bits.items():
+            if scope not in granted:
+                mask |= bits
+        return mask
+
+    def select(
+        self,
+        include_operations: Optional[List[str]] = None,
+        exclude_operations: Optional[List[str]] = None,
+        include_tags: Optional[List[str]] = None,
+        exclude_tags: Optional[List[str]] = None,
+    ) -> Optional[int]:
+        """
+        The operations selected by the static filters of `FastApiMCP`, or `None` if there are no filters.
+        An operation is selected if either the operation filter or the tag filter selects it.
+        """
+        if include_operations is None and exclude_operations is None and include_tags is None and exclude_tags is None:
+            return None
+
+        mask = 0
+        if include_operations is not None:
+            mask |= self.operations(include_operations)
+        elif exclude_operations is not None:
+            mask |= self.all & ~self.operations(exclude_operations)
+
+        if include_tags is not None:
+            mask |= self.tags(include_tags)
+        elif exclude_tags is not None:
+            mask |= self.all & ~self.tags(exclude_tags)
+
+        return mask
+
+    def resolve(self, visibility: ToolVisibility) -> int:
+        """The operations visible to a session: those that pass every constraint of its `ToolVisibility`."""
+        mask = self.all
+        if visibility.include_operations is not None:
+            mask &= self.operations(visibility.include_operations)
+        if visibility.exclude_operations is not None:
+            mask &= ~self.operations(visibility.exclude_operations)
+        if visibility.include_tags is not None:
+            mask &= self.tags(visibility.include_tags)
+        if visibility.exclude_tags is not None:
+            mask &= ~self.tags(visibility.exclude_tags)
+        if visibility.scopes is not None:
+            mask &= ~self.requiring_other_scopes(visibility.scopes)
+        return mask
+
+    def contains(self, mask: int, operation_id: str) -> bool:
+        return bool(mask & self._operation_bits.get(operation_id, 0))
+
+    def names(self, mask: int) -> List[str]:
+        """The IDs of the operations in a set, in catalog order."""
+        return [operation_id for operation_id in self.operation_ids if mask & self._operation_bits[operation_id]]
+
+
+class SessionVisibility:
+    """
+    The visibility of an MCP session, resolved once when it connects. Its set of visible operations is computed
+    for the current `VisibilityIndex`, and again only after the index is rebuilt (e.g. by `FastApiMCP.refresh()`).
+    """
+
+    def __init__(self, visibility: ToolVisibility):
+        self.visibility = visibility
+        self._index: Optional[VisibilityIndex] = None
+        self._mask = 0
+
+    def mask(self, index: VisibilityIndex) -> int:
+        if index is not self._index:
+            self._mask = index.resolve(self.visibility)
+            self._index = index
+        return self._mask
+
+
+# The visibility of the session whose messages are being handled. It is set for the whole lifetime of the session,
+# so that the handlers of its requests (and the tasks they start) see it
+session_visibility: ContextVar[Optional[SessionVisibility]] = ContextVar("session_visibility", default=None)
+
+
+async def resolve_visibility(
+    policy: VisibilityPolicy,
+    http_request_info: HTTPRequestInfo,
+) -> Optional[SessionVisibility]:
+    """
+    Apply a visibility policy to the request that opened a session.
+
+    Returns:
+        The visibility of the session, or `None` if the policy doesn't restrict it
+    """
+    visibility = policy(http_request_info)
+    if inspect.isawaitable(visibility):
+        visibility = await visibility
+    if visibility is None:
+        return None
+    return SessionVisibility(ToolVisibility.model_validate(visibility))
@@ -0,0 +1,50 @@
+import threading
+import time
+from typing import Awaitable, Callable, Iterator, List
+
+import anyio
+import pytest
+import uvicorn
+from starlette.types import ASGIApp
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def _wait_for(condition: Callable[[], bool], timeout: float = 5) -> None:
+    with anyio.fail_after(timeout):
+        while not condition():
+            await anyio.sleep(0.001)
+
+
+@pytest.fixture
+def wait_for() -> Callable[..., Awaitable[None]]:
+    """Polls a condition until it holds, failing after a timeout: for tests waiting on tasks to reach a state."""
+    return _wait_for
+
+
+@pytest.fixture(scope="session")
+def serve() -> Iterator[Callable[[ASGIApp], str]]:
+    """Serves apps over the network until the tests end, and returns their URL: for tests needing real connections."""
+    servers: List[uvicorn.Server] = []
+    threads: List[threading.Thread] = []
+
+    def start(app: ASGIApp) -> str:
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        servers.append(server)
+        threads.append(thread)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+
+    for server in servers:
+        server.should_exit = True
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,168 @@
+from typing import Any, Dict, Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI, Header, Response
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import CacheConfig, FastApiMCP
+from fastapi_mcp.execution.cache import ResponseCache, call_key
+
+
+def create_app(calls: Dict[str, int]) -> FastAPI:
+    app = FastAPI()
+
+    def count(name: str) -> int:
+        calls[name] = calls.get(name, 0) + 1
+        return calls[name]
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: int, response: Response):
+        response.headers["Cache-Control"] = "max-age=60"
+        return {"id": item_id, "version": count("get_item")}
+
+    @app.put("/items/{item_id}", operation_id="update_item")
+    async def update_item(item_id: int):
+        count("update_item")
+        return {"id": item_id}
+
+    @app.get("/live", operation_id="get_live")
+    async def get_live(response: Response):
+        response.headers["Cache-Control"] = "no-store"
+        return count("get_live")
+
+    @app.get("/profile", operation_id="get_profile")
+    async def get_profile(response: Response):
+        response.headers["Cache-Control"] = "private, max-age=60"
+        return count("get_profile")
+
+    @app.get("/report", operation_id="get_report")
+    async def get_report(if_none_match: Optional[str] = Header(None)):
+        count("get_report")
+        headers = {"Cache-Control": "no-cache", "ETag": '"v1"'}
+        if if_none_match == '"v1"':
+            return Response(status_code=304, headers=headers)
+        return Response('{"report": "v1"}', media_type="application/json", headers=headers)
+
+    @app.get("/me", operation_id="get_me")
+    async def get_me(response: Response, authorization: Optional[str] = Header(None)):
+        response.headers["Cache-Control"] = "max-age=60"
+        count("get_me")
+        return {"authorization": authorization}
+
+    return app
+
+
+@pytest.fixture
+def calls() -> Dict[str, int]:
+    return {}
+
+
+@pytest.fixture
+def mcp(calls: Dict[str, int]) -> FastApiMCP:
+    return FastApiMCP(create_app(calls), cache_config=CacheConfig())
+
+
+async def call_twice(mcp: FastApiMCP, tool_name: str, arguments: Dict[str, Any]) -> None:
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        for _ in range(2):
+            assert not (await client.call_tool(tool_name, arguments)).isError
+
+
+@pytest.mark.anyio
+async def test_fresh_responses_are_served_from_the_cache(mcp: FastApiMCP, calls: Dict[str, int]):
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        first = await client.call_tool("get_item", {"item_id": 1})
+        second = await client.call_tool("get_item", {"item_id": 1})
+
+    assert second.content[0].text == first.content[0].text
+    assert calls["get_item"] == 1
+    assert mcp.response_cache is not None
+    assert mcp.response_cache.stats["hits"] == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("tool_name", ["get_live", "get_profile"])
+async def test_no_store_and_private_responses_are_not_cached(mcp: FastApiMCP, calls: Dict[str, int], tool_name):
+    await call_twice(mcp, tool_name, {})
+
+    assert calls[tool_name] == 2
+    assert mcp.response_cache is not None
+    assert len(mcp.response_cache) == 0
+
+
+@pytest.mark.anyio
+async def test_stale_responses_are_revalidated_with_their_etag(mcp: FastApiMCP, calls: Dict[str, int]):
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        first = await client.call_tool("get_report", {})
+        second = await client.call_tool("get_report", {})
+
+    # The app is asked every time, but only answers the first time
+    assert calls["get_report"] == 2
+    assert second.content[0].text == first.content[0].text
+    assert mcp.response_cache is not None
+    assert mcp.response_cache.stats["revalidations"] == 1
+
+
+@pytest.mark.anyio
+async def test_mutations_invalidate_the_cached_responses(mcp: FastApiMCP, calls: Dict[str, int]):
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        await client.call_tool("get_item", {"item_id": 1})
+        await client.call_tool("get_item", {"item_id": 2})
+        await client.call_tool("update_item", {"item_id": 1})
+        await client.call_tool("get_item", {"item_id": 1})
+        await client.call_tool("get_item", {"item_id": 2})
+
+    # Only the updated item is fetched again
+    assert calls["get_item"] == 3
+    assert mcp.response_cache is not None
+    assert mcp.response_cache.stats["invalidations"] == 1
+
+
+def test_cache_keys_are_isolated_per_credential():
+    cache = ResponseCache()
+    response = httpx.Response(200, headers={"Cache-Control": "max-age=60"}, content=b"alice")
+    cache.store(call_key("get_me", {}, "Bearer alice"), "/me", response)
+
+    assert cache.lookup(call_key("get_me", {}, "Bearer alice")) is not None
+    assert cache.lookup(call_key("get_me", {}, "Bearer bob")) is None
+    assert cache.lookup(call_key("get_me", {}, None)) is None
+
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+async def call_over_http(client: httpx.AsyncClient, credential: str, tool_name: str) -> str:
+    """Call a tool in a session of its own of the streamable HTTP transport, as the holder of `credential`."""
+    headers = dict(HEADERS, Authorization=credential)
+    initialize = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}},
+    }
+    response = await client.post("/mcp", headers=headers, json=initialize)
+    headers["Mcp-Session-Id"] = response.headers["mcp-session-id"]
+    await client.post("/mcp", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": tool_name, "arguments": {}}}
+    result = (await client.post("/mcp", headers=headers, json=message)).json()["result"]
+    return result["content"][0]["text"]
+
+
+@pytest.mark.anyio
+async def test_cached_responses_are_only_served_to_the_same_credential(calls: Dict[str, int]):
+    app = create_app(calls)
+    mcp = FastApiMCP(app, cache_config=CacheConfig())
+    mcp.mount(transport="http")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+        alice = await call_over_http(client, "Bearer alice", "get_me")
+        assert await call_over_http(client, "Bearer alice", "get_me") == alice
+        assert calls["get_me"] == 1
+
+        bob = await call_over_http(client, "Bearer bob", "get_me")
+        assert "Bearer bob" in bob
+        assert calls["get_me"] == 2
+
+    await mcp.aclose()
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.openapi.cache import CatalogCache
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items", operation_id="list_items")
+    async def list_items():
+        return []
+
+    return app
+
+
+def test_apps_sharing_a_namespace_keep_their_catalogs(tmp_path):
+    first = FastApiMCP(create_app(), catalog_cache_dir=tmp_path)
+    other_app = create_app()
+
+    @other_app.get("/users", operation_id="list_users")
+    async def list_users():
+        return []
+
+    other = FastApiMCP(other_app, catalog_cache_dir=tmp_path)
+    assert first.name == other.name
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+    # Both load their catalog on their next start
+    assert FastApiMCP(create_app(), catalog_cache_dir=tmp_path)._catalog_cache.hits == 1
+    assert FastApiMCP(other_app, catalog_cache_dir=tmp_path)._catalog_cache.hits == 1
+
+
+def test_unused_catalogs_are_removed(tmp_path):
+    cache = CatalogCache(tmp_path, max_age=60)
+    old = cache.store("0" * 64, [], {})
+    unused_since = time.time() - 120
+    os.utime(old, (unused_since, unused_since))
+
+    cache.store("1" * 64, [], {})
+    assert not old.exists()
+
+
+@pytest.mark.anyio
+async def test_refresh_stores_the_updated_catalog(tmp_path):
+    app = create_app()
+    mcp = FastApiMCP(app, catalog_cache_dir=tmp_path)
+
+    @app.get("/users", operation_id="list_users")
+    async def list_users():
+        return []
+
+    await mcp.refresh()
+
+    restarted = FastApiMCP(app, catalog_cache_dir=tmp_path)
+    assert restarted._catalog_cache.hits == 1
+    assert [tool.name for tool in restarted.tools] == ["list_items", "list_users"]
@@ -0,0 +1,95 @@
+from typing import List
+
+import anyio
+import pytest
+
+from fastapi_mcp.execution.coalesce import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_identical_calls_share_the_result_of_the_first(wait_for):
+    single_flight = SingleFlight()
+    release = anyio.Event()
+    runs: List[int] = []
+    results: List[str] = []
+
+    async def fn() -> str:
+        runs.append(1)
+        await release.wait()
+        return "result"
+
+    async def call() -> None:
+        results.append(await single_flight.do("key", fn))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(call)
+        await wait_for(lambda: len(runs) == 1)
+        await anyio.sleep(0.01)
+        release.set()
+
+    assert results == ["result"] * 3
+    assert single_flight.stats == {"leaders": 1, "collapsed": 2, "in_flight": 0}
+
+
+@pytest.mark.anyio
+async def test_errors_are_shared_with_the_followers(wait_for):
+    single_flight = SingleFlight()
+    release = anyio.Event()
+    errors: List[Exception] = []
+
+    async def fn() -> str:
+        await release.wait()
+        raise ValueError("upstream failed")
+
+    async def call() -> None:
+        try:
+            await single_flight.do("key", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(call)
+        await wait_for(lambda: single_flight.in_flight == 1)
+        tg.start_soon(call)
+        await anyio.sleep(0.01)
+        release.set()
+
+    assert len(errors) == 2
+    assert single_flight.stats["leaders"] == 1
+
+
+@pytest.mark.anyio
+async def test_followers_of_a_cancelled_leader_run_the_call_once(wait_for):
+    single_flight = SingleFlight()
+    runs: List[int] = []
+    results: List[str] = []
+
+    async def fn() -> str:
+        runs.append(1)
+        if len(runs) == 1:
+            # The leader hangs until it's cancelled
+            await anyio.sleep_forever()
+        await anyio.sleep(0.01)
+        return "result"
+
+    async def follow() -> None:
+        results.append(await single_flight.do("key", fn))
+
+    leader_scope = anyio.CancelScope()
+
+    async def lead() -> None:
+        with leader_scope:
+            await single_flight.do("key", fn)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(lead)
+        await wait_for(lambda: len(runs) == 1)
+        for _ in range(3):
+            tg.start_soon(follow)
+        await anyio.sleep(0.01)
+        leader_scope.cancel()
+
+    assert results == ["result"] * 3
+    assert len(runs) == 2
+    assert single_flight.stats == {"leaders": 2, "collapsed": 2, "in_flight": 0}
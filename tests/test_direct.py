@@ -0,0 +1,115 @@
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import pytest
+from fastapi import Body, Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import BaseModel
+
+from fastapi_mcp import FastApiMCP
+
+
+class Item(BaseModel):
+    name: str
+    price: float = 0
+
+
+class TeapotError(Exception):
+    pass
+
+
+def create_app(cleanups: List[str]) -> FastAPI:
+    app = FastAPI()
+
+    @app.exception_handler(TeapotError)
+    async def handle_teapot(request: Request, exc: TeapotError):
+        return JSONResponse({"detail": f"teapot: {exc}"}, status_code=418)
+
+    async def session() -> AsyncIterator[str]:
+        yield "session"
+        cleanups.append("session")
+
+    @app.get("/items/{item_id}", operation_id="get_item", response_model=Item)
+    async def get_item(item_id: int):
+        # Fields outside of the response model are dropped, and defaults filled in
+        return {"name": f"item {item_id}", "secret": "hidden"}
+
+    @app.get("/session", operation_id="get_session")
+    def get_session(value: str = Depends(session)):
+        return {"value": value}
+
+    @app.get("/missing", operation_id="get_missing")
+    async def get_missing():
+        raise HTTPException(status_code=404, detail="Item not found", headers={"X-Reason": "gone"})
+
+    @app.get("/teapot", operation_id="get_teapot")
+    async def get_teapot():
+        raise TeapotError("short and stout")
+
+    @app.post("/items", operation_id="create_item")
+    async def create_item(item: Item = Body(embed=True)):
+        return {"created": item.name, "price": item.price}
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for index in range(3):
+            yield f"chunk {index}\n".encode()
+
+    @app.get("/export", operation_id="export")
+    async def export():
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/broken", operation_id="get_broken")
+    async def get_broken():
+        raise RuntimeError("unexpected")
+
+    return app
+
+
+CALLS = {
+    "response_model": ("get_item", {"item_id": 1}),
+    "yield_dependency": ("get_session", {}),
+    "http_exception": ("get_missing", {}),
+    "exception_handler": ("get_teapot", {}),
+    "embedded_body": ("create_item", {"item": {"name": "pen", "price": 1.5}}),
+    "streaming_response": ("export", {}),
+    "unhandled_exception": ("get_broken", {}),
+}
+
+
+async def call_tool(dispatch: str, name: str, arguments: Dict[str, Any]) -> Tuple[bool, List[str], List[str]]:
+    """Whether the call failed, the text of its result, and the dependencies cleaned up after it."""
+    cleanups: List[str] = []
+    mcp = FastApiMCP(create_app(cleanups), dispatch=dispatch)
+    if dispatch == "direct":
+        # Not dispatched over HTTP after all
+        assert mcp._direct_dispatcher is not None and mcp._direct_dispatcher.can_dispatch(name)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        result = await client.call_tool(name, arguments)
+    return result.isError, [content.text for content in result.content], cleanups
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("case", CALLS)
+async def test_direct_dispatch_matches_http(case: str):
+    name, arguments = CALLS[case]
+
+    assert await call_tool("direct", name, arguments) == await call_tool("http", name, arguments)
+
+
+@pytest.mark.anyio
+async def test_direct_dispatch_results():
+    assert await call_tool("direct", *CALLS["response_model"]) == (
+        False,
+        ['{\n  "name": "item 1",\n  "price": 0.0\n}'],
+        [],
+    )
+    assert (await call_tool("direct", *CALLS["yield_dependency"]))[2] == ["session"]
+
+    is_error, texts, _ = await call_tool("direct", *CALLS["exception_handler"])
+    assert is_error
+    assert "Status code: 418" in texts[0] and "teapot: short and stout" in texts[0]
+
+    is_error, texts, _ = await call_tool("direct", *CALLS["unhandled_exception"])
+    assert is_error
+    assert "Status code: 500" in texts[0]
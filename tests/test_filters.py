@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from fastapi import FastAPI
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import FastApiMCP
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items", operation_id="list_items", tags=["items"])
+    async def list_items():
+        return [1, 2]
+
+    @app.get("/users", operation_id="list_users", tags=["users"])
+    async def list_users():
+        return ["alice"]
+
+    return app
+
+
+FILTERS = [
+    {},
+    {"include_operations": ["list_items"]},
+    {"exclude_tags": ["items"]},
+    {"include_tags": ["users"]},
+    # Matches nothing: no tool is listed, but the operations stay callable
+    {"include_tags": ["orders"]},
+]
+
+
+async def tool_set(lazy_tools: bool, filters: Dict[str, Any]) -> Tuple[List[str], List[bool]]:
+    """The tools listed under the filters, and whether calling each operation failed."""
+    mcp = FastApiMCP(create_app(), lazy_tools=lazy_tools, **filters)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        names = [tool.name for tool in (await client.list_tools()).tools]
+        errors = [(await client.call_tool(name, {})).isError for name in ["list_items", "list_users"]]
+    return names, errors
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("filters", FILTERS)
+async def test_lazy_tools_are_filtered_like_eager_ones(filters: Dict[str, Any]):
+    assert await tool_set(lazy_tools=True, filters=filters) == await tool_set(lazy_tools=False, filters=filters)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lazy_tools", [False, True])
+async def test_operations_stay_callable_when_the_filters_match_nothing(lazy_tools: bool):
+    names, errors = await tool_set(lazy_tools, {"include_tags": ["orders"]})
+
+    assert names == []
+    assert errors == [False, False]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lazy_tools", [False, True])
+async def test_filters_match_nothing_after_a_refresh(lazy_tools: bool):
+    mcp = FastApiMCP(create_app(), lazy_tools=lazy_tools, include_tags=["users"])
+    diff = await mcp.set_filters(include_tags=["orders"])
+
+    assert diff.removed == ["list_users"]
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        assert (await client.list_tools()).tools == []
+        assert not (await client.call_tool("list_items", {})).isError
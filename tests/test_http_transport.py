@@ -0,0 +1,192 @@
+from typing import Any, AsyncIterator, Dict, List
+
+import anyio
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from fastapi_mcp import FastApiMCP, InMemorySessionStore
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for _ in range(5):
+            yield b"x" * 1000
+
+    @app.get("/export", operation_id="export")
+    async def export():
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+def create_mcp(app: FastAPI, **mount_options: Any) -> FastApiMCP:
+    mcp = FastApiMCP(app, stream_results=True, result_chunk_size=1000)
+    mcp.mount(transport="http", **mount_options)
+    return mcp
+
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def call(request_id: int, name: str = "get_item", **params: Any) -> Dict[str, Any]:
+    arguments = {"item_id": request_id} if name == "get_item" else {}
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": dict(params, name=name, arguments=arguments),
+    }
+
+
+async def open_http_session(client: httpx.AsyncClient) -> Dict[str, str]:
+    """Initialize a session of the streamable HTTP transport, and return the headers of its requests."""
+    initialize = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}},
+    }
+    response = await client.post("/mcp", headers=HEADERS, json=initialize)
+    headers = dict(HEADERS, **{"Mcp-Session-Id": response.headers["mcp-session-id"]})
+    await client.post("/mcp", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return headers
+
+
+def result_text(response: httpx.Response) -> str:
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    return response.json()["result"]["content"][0]["text"]
+
+
+@pytest.mark.anyio
+async def test_responses_are_only_streamed_when_notifications_come_first():
+    app = create_app()
+    mcp = create_mcp(app)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+        headers = await open_http_session(client)
+        assert result_text(await client.post("/mcp", headers=headers, json=call(1))) == '{"id":1}'
+
+        # The progress notifications of the streamed result come before the response
+        streamed = call(2, "export", _meta={"progressToken": 2})
+        response = await client.post("/mcp", headers=headers, json=streamed)
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.count("event: message") > 1
+
+        # Unless the client doesn't accept SSE: then it only gets the response
+        json_only = dict(headers, Accept="application/json")
+        assert result_text(
+            await client.post("/mcp", headers=json_only, json=call(3, "export", _meta={"progressToken": 3}))
+        )
+
+    await mcp.aclose()
+
+
+@pytest.mark.anyio
+async def test_stateless_requests_need_no_session(wait_for):
+    app = create_app()
+    mcp = create_mcp(app, stateless=True)
+    transport = mcp._http_transports[0]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+        response = await client.post("/mcp", headers=HEADERS, json=call(3))
+        assert "mcp-session-id" not in response.headers
+        assert result_text(response) == '{"id":3}'
+
+        notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        assert (await client.post("/mcp", headers=HEADERS, json=notification)).status_code == 202
+        assert (await client.get("/mcp", headers=HEADERS)).status_code == 405
+        assert (await client.delete("/mcp", headers=HEADERS)).status_code == 405
+
+    # The transient session of each request, and its server, end with the request
+    await wait_for(lambda: not transport._tasks)
+    assert transport.session_count == 0
+    await mcp.aclose()
+
+
+@pytest.mark.anyio
+async def test_sessions_are_resumed_from_the_store():
+    store = InMemorySessionStore()
+    first_app, second_app = create_app(), create_app()
+    first, second = create_mcp(first_app, session_store=store), create_mcp(second_app, session_store=store)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(first_app), base_url="http://test") as client:
+        headers = await open_http_session(client)
+
+    responses: List[httpx.Response] = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(second_app), base_url="http://test") as client:
+
+        async def post(request_id: int) -> None:
+            responses.append(await client.post("/mcp", headers=headers, json=call(request_id)))
+
+        # Concurrent requests of the session resume it once
+        async with anyio.create_task_group() as tg:
+            for request_id in range(1, 4):
+                tg.start_soon(post, request_id)
+
+    assert sorted(result_text(response) for response in responses) == [f'{{"id":{i}}}' for i in range(1, 4)]
+    assert second._http_transports[0].session_count == 1
+    # The server of the resumed session is initialized as the client initialized the session
+    assert [session.client_params.clientInfo.name for session in second.server.sessions] == ["test"]
+
+    await first.aclose()
+    await second.aclose()
+
+
+@pytest.mark.anyio
+async def test_ended_sessions_are_not_found(wait_for):
+    app = create_app()
+    mcp = create_mcp(app)
+    transport = mcp._http_transports[0]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+        headers = await open_http_session(client)
+        streams: List[httpx.Response] = []
+
+        async def open_stream() -> None:
+            streams.append(await client.get("/mcp", headers=headers))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(open_stream)
+            await wait_for(lambda: any(session.streams for session in transport._sessions.values()))
+
+            assert (await client.delete("/mcp", headers=headers)).status_code == 200
+
+        # Ending the session ended its stream
+        assert streams[0].status_code == 200
+        assert (await client.post("/mcp", headers=headers, json=call(1))).status_code == 404
+        assert (await client.delete("/mcp", headers=headers)).status_code == 404
+
+    await wait_for(lambda: transport.session_count == 0)
+    await mcp.aclose()
+
+
+@pytest.mark.anyio
+async def test_sessions_ended_by_another_worker_are_ended_everywhere(wait_for):
+    store = InMemorySessionStore()
+    first_app, second_app = create_app(), create_app()
+    first, second = create_mcp(first_app, session_store=store), create_mcp(second_app, session_store=store)
+
+    async with (
+        httpx.AsyncClient(transport=httpx.ASGITransport(first_app), base_url="http://test") as first_client,
+        httpx.AsyncClient(transport=httpx.ASGITransport(second_app), base_url="http://test") as second_client,
+    ):
+        headers = await open_http_session(first_client)
+        assert result_text(await second_client.post("/mcp", headers=headers, json=call(1)))
+
+        assert (await second_client.delete("/mcp", headers=headers)).status_code == 200
+        assert (await first_client.post("/mcp", headers=headers, json=call(2))).status_code == 404
+
+    await wait_for(lambda: first._http_transports[0].session_count == 0)
+    assert second._http_transports[0].session_count == 0
+
+    await first.aclose()
+    await second.aclose()
@@ -0,0 +1,104 @@
+import anyio
+import pytest
+from fastapi import FastAPI
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import ConcurrencyConfig, FastApiMCP
+from fastapi_mcp.execution.limits import CONCURRENCY_LIMIT_EXCEEDED, ConcurrencyLimitExceeded, ConcurrencyLimiter
+
+
+@pytest.mark.anyio
+async def test_calls_beyond_the_queue_are_rejected(wait_for):
+    limiter = ConcurrencyLimiter(max_concurrent_calls=1, max_queue_size=1)
+    limit = limiter.limits_for("get_item")[0]
+    release = anyio.Event()
+
+    async def hold() -> None:
+        async with limiter.limit("get_item"):
+            await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hold)
+        tg.start_soon(hold)
+        await wait_for(lambda: limit.in_flight == 1 and limit.waiting == 1)
+
+        with pytest.raises(ConcurrencyLimitExceeded) as exc_info:
+            async with limiter.limit("get_item"):
+                pass
+        assert exc_info.value.error.code == CONCURRENCY_LIMIT_EXCEEDED
+        release.set()
+
+    assert limiter.stats["global"] == {"max_concurrent": 1, "in_flight": 0, "waiting": 0, "rejected": 1}
+
+
+@pytest.mark.anyio
+async def test_calls_waiting_too_long_are_rejected(wait_for):
+    limiter = ConcurrencyLimiter(per_operation={"get_item": 1}, queue_timeout=0.01)
+    release = anyio.Event()
+
+    async def hold() -> None:
+        async with limiter.limit("get_item"):
+            await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hold)
+        await wait_for(lambda: limiter.stats["operation:get_item"]["in_flight"] == 1)
+
+        with pytest.raises(ConcurrencyLimitExceeded, match="no slot freed up within 0.01s"):
+            async with limiter.limit("get_item"):
+                pass
+        release.set()
+
+    assert limiter.stats["operation:get_item"]["waiting"] == 0
+
+
+@pytest.mark.anyio
+async def test_rejected_tool_calls_are_answered_with_a_json_rpc_error(wait_for):
+    app = FastAPI()
+    release = anyio.Event()
+
+    @app.get("/report", operation_id="get_report")
+    async def get_report():
+        await release.wait()
+        return "done"
+
+    mcp = FastApiMCP(app, concurrency_config=ConcurrencyConfig(per_operation={"get_report": 1}, max_queue_size=0))
+    limiter = mcp.concurrency_limiter
+    assert limiter is not None
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(client.call_tool, "get_report", {})
+            await wait_for(lambda: limiter.stats["operation:get_report"]["in_flight"] == 1)
+
+            with pytest.raises(McpError) as exc_info:
+                await client.call_tool("get_report", {})
+            assert exc_info.value.error.code == CONCURRENCY_LIMIT_EXCEEDED
+            release.set()
+
+    assert limiter.stats["operation:get_report"] == {"max_concurrent": 1, "in_flight": 0, "waiting": 0, "rejected": 1}
+
+
+@pytest.mark.anyio
+async def test_a_saturated_operation_does_not_starve_the_others(wait_for):
+    limiter = ConcurrencyLimiter(max_concurrent_calls=4, per_operation={"get_report": 1}, queue_timeout=1)
+    release = anyio.Event()
+
+    async def report() -> None:
+        async with limiter.limit("get_report"):
+            await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(report)
+        await wait_for(lambda: limiter.stats["operation:get_report"]["waiting"] == 4)
+
+        # The calls waiting for a slot of their operation don't hold global slots
+        assert limiter.stats["global"]["in_flight"] == 1
+        with anyio.fail_after(0.5):
+            async with limiter.limit("get_item"):
+                pass
+        release.set()
+
+    assert limiter.stats["global"]["rejected"] == 0
@@ -0,0 +1,89 @@
+import json
+from typing import Callable, List, Optional
+
+import pytest
+from fastapi import FastAPI, Request
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.transport.messages import MessageContext, capture_request
+from fastapi_mcp.types import RequestCaptureConfig
+
+
+def create_request() -> Request:
+    headers = [
+        (b"authorization", b"Bearer token"),
+        (b"cookie", b"session=secret"),
+        (b"x-other", b"other"),
+    ]
+    return Request({"type": "http", "method": "POST", "path": "/mcp", "query_string": b"debug=1", "headers": headers})
+
+
+def test_only_the_authorization_header_is_captured_by_default():
+    request_info = capture_request(create_request(), b'{"password": "secret"}', RequestCaptureConfig())
+
+    assert request_info.headers == {"authorization": "Bearer token"}
+    assert request_info.cookies == {}
+    assert request_info.query_params == {}
+    assert request_info.body is None
+
+
+def test_more_of_the_request_is_captured_on_demand():
+    config = RequestCaptureConfig(headers=None, cookies=True, query_params=True, body=True)
+
+    request_info = capture_request(create_request(), b'{"password": "secret"}', config)
+
+    assert request_info.headers["x-other"] == "other"
+    assert request_info.cookies == {"session": "secret"}
+    assert request_info.query_params == {"debug": "1"}
+    assert request_info.body == '{"password": "secret"}'
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/whoami", operation_id="whoami")
+    async def whoami(request: Request):
+        return {"authorization": request.headers.get("authorization")}
+
+    return app
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("transport", ["sse", "http"])
+async def test_the_message_context_reaches_the_handler(transport: str, serve: Callable[[FastAPI], str]):
+    app = create_app()
+    mcp = FastApiMCP(app)
+    mcp.mount(transport=transport)
+
+    # Records the context of each message, as the handlers get it from the metadata of the message
+    contexts: List[Optional[MessageContext]] = []
+    message_context = mcp.server.message_context
+
+    def record_message_context() -> Optional[MessageContext]:
+        context = message_context()
+        contexts.append(context)
+        return context
+
+    mcp.server.message_context = record_message_context  # type: ignore[method-assign]
+
+    # Served in a loop of its own, that closes the sessions when the tests end
+    url = serve(app)
+    headers = {"Authorization": "Bearer token"}
+    client = sse_client if transport == "sse" else streamablehttp_client
+    async with client(f"{url}/mcp", headers=headers) as (read_stream, write_stream, *_):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            result = await session.call_tool("whoami", {})
+
+    # The credential of the MCP request was forwarded to the API
+    assert json.loads(result.content[0].text) == {"authorization": "Bearer token"}
+    assert contexts
+    for context in contexts:
+        assert context is not None
+        assert context.request_info is not None
+        assert context.request_info.headers == {"authorization": "Bearer token"}
+        assert context.request_info.cookies == {}
+        assert context.request_info.body is None
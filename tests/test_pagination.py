@@ -0,0 +1,53 @@
+import pytest
+from fastapi import FastAPI
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import FastApiMCP
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    for index in range(5):
+
+        @app.get(f"/items/{index}", operation_id=f"get_item_{index}")
+        async def get_item():
+            return {}
+
+    return app
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lazy_tools", [False, True])
+async def test_cursors_are_valid_in_every_worker(lazy_tools: bool):
+    app = create_app()
+    first = FastApiMCP(app, tools_page_size=2, lazy_tools=lazy_tools)
+    second = FastApiMCP(app, tools_page_size=2, lazy_tools=lazy_tools)
+
+    async with create_connected_server_and_client_session(first.server) as client:
+        page = await client.list_tools()
+    assert page.nextCursor is not None
+
+    async with create_connected_server_and_client_session(second.server) as client:
+        next_page = await client.list_tools(page.nextCursor)
+    assert [tool.name for tool in next_page.tools] == ["get_item_2", "get_item_3"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lazy_tools", [False, True])
+async def test_cursors_expire_when_the_catalog_changes(lazy_tools: bool):
+    app = create_app()
+    mcp = FastApiMCP(app, tools_page_size=2, lazy_tools=lazy_tools)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        cursor = (await client.list_tools()).nextCursor
+        assert cursor is not None
+
+        @app.get("/users", operation_id="list_users")
+        async def list_users():
+            return []
+
+        await mcp.refresh()
+        with pytest.raises(McpError, match="Expired cursor"):
+            await client.list_tools(cursor)
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.execution.plan import compile_request_plan, index_path_convertors
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/files/{file_path:path}", operation_id="get_file")
+    async def get_file(file_path: str):
+        return {"file_path": file_path}
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: str):
+        return {"item_id": item_id}
+
+    return app
+
+
+def test_slashes_are_only_kept_in_path_convertor_parameters():
+    convertors = index_path_convertors(create_app().routes)
+
+    file_plan = compile_request_plan("get_file", {"path": "/files/{file_path}", "method": "get"}, None, convertors)
+    item_plan = compile_request_plan("get_item", {"path": "/items/{item_id}", "method": "get"}, None, convertors)
+
+    assert file_plan.render_path({"file_path": "a/b c.txt"}) == "/files/a/b%20c.txt"
+    assert item_plan.render_path({"item_id": "a/b"}) == "/items/a%2Fb"
+
+
+def test_slashes_are_kept_when_the_route_is_unknown():
+    plan = compile_request_plan("get_item", {"path": "/items/{item_id}", "method": "get"})
+
+    assert plan.render_path({"item_id": "a/b"}) == "/items/a/b"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lazy_tools", [False, True])
+async def test_path_convertor_parameters_reach_the_app_whole(lazy_tools):
+    mcp = FastApiMCP(create_app(), lazy_tools=lazy_tools)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        result = await client.call_tool("get_file", {"file_path": "docs/guide/intro.md"})
+
+    assert not result.isError, result.content[0].text
+    assert json.loads(result.content[0].text) == {"file_path": "docs/guide/intro.md"}
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from fastapi_mcp import InMemorySessionStore
+from fastapi_mcp.transport.relay import MessageRelay
+
+
+class Worker:
+    """A relay, and the messages delivered to the sessions it holds."""
+
+    def __init__(self, store: InMemorySessionStore, directory: Path) -> None:
+        self.sessions: List[str] = []
+        self.delivered: List[Tuple[str, bytes]] = []
+        self.relay = MessageRelay(store, self.deliver, str(directory))
+
+    def deliver(self, session_id: str, data: bytes) -> bool:
+        if session_id not in self.sessions:
+            return False
+        self.delivered.append((session_id, data))
+        return True
+
+    async def hold(self, session_id: str) -> None:
+        self.sessions.append(session_id)
+        await self.relay.register(session_id)
+
+
+@pytest.mark.anyio
+async def test_frames_round_trip(tmp_path: Path):
+    store = InMemorySessionStore()
+    owner, other = Worker(store, tmp_path), Worker(store, tmp_path)
+    await owner.hold("session")
+
+    # Messages hold any bytes, newlines included, and follow each other on the same connection
+    messages = [b'{"jsonrpc": "2.0"}', b"line\nbreaks\n", b"\x00\x01\xff", b"", b"x" * (1024 * 1024)]
+    for data in messages:
+        assert await other.relay.forward("session", data)
+
+    assert owner.delivered == [("session", data) for data in messages]
+
+    await owner.relay.aclose()
+    await other.relay.aclose()
+
+
+@pytest.mark.anyio
+async def test_messages_are_delivered_to_the_owner(tmp_path: Path):
+    store = InMemorySessionStore()
+    first, second = Worker(store, tmp_path), Worker(store, tmp_path)
+    await first.hold("first")
+    await second.hold("second")
+
+    assert await second.relay.forward("first", b"to first")
+    assert await first.relay.forward("second", b"to second")
+    assert first.delivered == [("first", b"to first")]
+    assert second.delivered == [("second", b"to second")]
+
+    # Sessions held by the worker itself, or by none, aren't forwarded
+    assert not await first.relay.forward("first", b"")
+    assert not await first.relay.forward("unknown", b"")
+
+    # Nor to a worker that no longer holds the session
+    first.sessions.remove("first")
+    assert not await second.relay.forward("first", b"")
+
+    await first.relay.aclose()
+    await second.relay.aclose()
+    assert await store.get("first") is None
+    assert await store.get("second") is None
+
+
+@pytest.mark.anyio
+async def test_sessions_of_a_worker_that_is_gone_are_forgotten(tmp_path: Path):
+    store = InMemorySessionStore()
+    owner, other = Worker(store, tmp_path), Worker(store, tmp_path)
+    await owner.hold("session")
+
+    # The owner died without unregistering its sessions: its socket is gone
+    os.unlink(owner.relay.address)
+
+    assert not await other.relay.forward("session", b"lost")
+    assert owner.delivered == []
+    assert await store.get("session") is None
+
+    await owner.relay.aclose()
+    await other.relay.aclose()
@@ -0,0 +1,118 @@
+import base64
+from typing import Any, Dict
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.execution.resources import ResultStore
+
+
+PDF = b"%PDF-1.4" + b"\x00\xff" * 2000
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/report", operation_id="get_report")
+    async def get_report():
+        return Response(PDF, media_type="application/pdf")
+
+    @app.get("/thumbnail", operation_id="get_thumbnail")
+    async def get_thumbnail():
+        return Response(b"%PDF-1.4", media_type="application/pdf")
+
+    return app
+
+
+def test_result_store_scopes_results_to_their_owner():
+    store = ResultStore(1024)
+    uri = store.put("get_report", b"data", "application/pdf", owner="alice")
+
+    assert store.get(uri, "alice") is not None
+    assert store.get(uri, "bob") is None
+    assert [result.uri for result in store.list("alice")] == [uri]
+    assert store.list("bob") == []
+
+
+@pytest.mark.anyio
+async def test_stored_results_are_only_visible_to_their_session():
+    mcp = FastApiMCP(create_app(), max_inline_binary_size=1000)
+
+    async with create_connected_server_and_client_session(mcp.server) as alice:
+        result = await alice.call_tool("get_report", {})
+        assert not result.isError
+        assert "fastapi-mcp://results/" in result.content[0].text
+
+        resources = (await alice.list_resources()).resources
+        assert len(resources) == 1
+        contents = (await alice.read_resource(resources[0].uri)).contents
+        assert base64.b64decode(contents[0].blob) == PDF
+
+        async with create_connected_server_and_client_session(mcp.server) as bob:
+            assert (await bob.list_resources()).resources == []
+            with pytest.raises(McpError, match="Unknown resource"):
+                await bob.read_resource(resources[0].uri)
+
+
+@pytest.mark.anyio
+async def test_inline_blobs_do_not_claim_to_be_readable():
+    mcp = FastApiMCP(create_app(), max_inline_binary_size=1000)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        result = await client.call_tool("get_thumbnail", {})
+        resource = result.content[0].resource
+        assert base64.b64decode(resource.blob) == b"%PDF-1.4"
+        assert str(resource.uri).startswith("urn:fastapi-mcp:inline:get_thumbnail:")
+        assert (await client.list_resources()).resources == []
+
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+async def open_http_session(client: httpx.AsyncClient, credential: str) -> Dict[str, str]:
+    """Initialize a session of the streamable HTTP transport, and return the headers of its requests."""
+    headers = dict(HEADERS, Authorization=credential)
+    initialize = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}},
+    }
+    response = await client.post("/mcp", headers=headers, json=initialize)
+    headers["Mcp-Session-Id"] = response.headers["mcp-session-id"]
+    await client.post("/mcp", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return headers
+
+
+async def request(client: httpx.AsyncClient, headers: Dict[str, str], method: str, params: Dict[str, Any]) -> Any:
+    message = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    return (await client.post("/mcp", headers=headers, json=message)).json()
+
+
+@pytest.mark.anyio
+async def test_stored_results_are_scoped_to_the_forwarded_credential():
+    app = create_app()
+    mcp = FastApiMCP(app, max_inline_binary_size=1000)
+    mcp.mount(transport="http")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+        alice = await open_http_session(client, "Bearer alice")
+        await request(client, alice, "tools/call", {"name": "get_report", "arguments": {}})
+
+        # Another session with the same credential reads the results
+        alice_again = await open_http_session(client, "Bearer alice")
+        resources = (await request(client, alice_again, "resources/list", {}))["result"]["resources"]
+        assert len(resources) == 1
+        uri = resources[0]["uri"]
+        contents = (await request(client, alice_again, "resources/read", {"uri": uri}))["result"]["contents"]
+        assert base64.b64decode(contents[0]["blob"]) == PDF
+
+        bob = await open_http_session(client, "Bearer bob")
+        assert (await request(client, bob, "resources/list", {}))["result"]["resources"] == []
+        assert "Unknown resource" in (await request(client, bob, "resources/read", {"uri": uri}))["error"]["message"]
+
+    await mcp.aclose()
@@ -0,0 +1,52 @@
+from typing import AsyncIterator, List, Optional, Tuple
+
+import httpx
+import pytest
+
+from fastapi_mcp.execution.response import collect_streamed_response
+
+
+def streamed_response(chunks: List[bytes]) -> httpx.Response:
+    async def stream() -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    return httpx.Response(200, headers={"Content-Type": "text/plain; charset=utf-8"}, content=stream())
+
+
+@pytest.mark.anyio
+async def test_parts_are_split_by_characters():
+    response = streamed_response(["é".encode() * 5, "é".encode() * 5])
+
+    parts = await collect_streamed_response(response, chunk_size=4, max_size=None)
+
+    assert [part.text for part in parts] == ["éééé", "éééé", "éé"]
+
+
+@pytest.mark.anyio
+async def test_truncation_does_not_cut_a_character():
+    # Two-byte characters, cut by the limit in the middle of the third one
+    response = streamed_response(["é".encode() * 10])
+
+    parts = await collect_streamed_response(response, chunk_size=100, max_size=5)
+
+    assert parts[0].text == "éé"
+    assert "�" not in parts[0].text
+    assert parts[1].text == "[Response truncated: showing the first 4 of 20 bytes]"
+
+
+@pytest.mark.anyio
+async def test_progress_is_reported_in_bytes():
+    progress: List[Tuple[int, Optional[int]]] = []
+
+    async def on_progress(received: int, total: Optional[int]) -> None:
+        progress.append((received, total))
+
+    # 10 bytes, but 5 characters, per chunk
+    response = streamed_response(["é".encode() * 5] * 10)
+
+    await collect_streamed_response(
+        response, chunk_size=100, max_size=None, on_progress=on_progress, progress_interval=30
+    )
+
+    assert [received for received, _ in progress] == [30, 60, 90, 100]
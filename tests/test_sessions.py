@@ -0,0 +1,45 @@
+import os
+import time
+
+import pytest
+
+from fastapi_mcp import FileSessionStore, InMemorySessionStore
+from fastapi_mcp.sessions import SessionRecord
+
+
+@pytest.fixture(params=["memory", "file"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemorySessionStore(ttl=60)
+    return FileSessionStore(str(tmp_path), ttl=60)
+
+
+@pytest.mark.anyio
+async def test_touch_postpones_expiry(store):
+    await store.create(SessionRecord("session", {}, last_active_at=time.time() - 50))
+    await store.touch("session")
+
+    record = await store.get("session")
+    assert record is not None
+    assert time.time() - record.last_active_at < 5
+
+
+@pytest.mark.anyio
+async def test_touch_does_not_bring_back_a_deleted_session(store):
+    await store.create(SessionRecord("session", {}))
+    await store.delete("session")
+    await store.touch("session")
+
+    assert await store.get("session") is None
+
+
+@pytest.mark.anyio
+async def test_expired_sessions_are_purged(tmp_path):
+    store = FileSessionStore(str(tmp_path), ttl=60)
+    await store.create(SessionRecord("session", {}))
+    expired = time.time() - 120
+    os.utime(tmp_path / "session.json", (expired, expired))
+
+    await store.touch("session")
+    assert await store.get("session") is None
+    assert not (tmp_path / "session.json").exists()
@@ -0,0 +1,114 @@
+from typing import Callable, List
+
+import anyio
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from fastapi_mcp import FastApiMCP, UpstreamConfig
+from fastapi_mcp.execution.upstream import PooledTransport, create_upstream_client, warm_up_client
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: int):
+        await anyio.sleep(0.2)
+        return {"id": item_id}
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def api_url(serve: Callable[[FastAPI], str]) -> str:
+    """The URL of the app served over the network, for the connections of the pool to go somewhere."""
+    return serve(create_app())
+
+
+async def get_items(client: httpx.AsyncClient, count: int) -> None:
+    async with anyio.create_task_group() as tg:
+        for item_id in range(count):
+            tg.start_soon(client.get, f"/items/{item_id}")
+
+
+@pytest.mark.anyio
+async def test_pool_stats_follow_the_requests(api_url: str, wait_for):
+    client, transport = create_upstream_client(
+        UpstreamConfig(base_url=api_url, max_connections=2, max_keepalive_connections=2)
+    )
+
+    async with client, anyio.create_task_group() as tg:
+        tg.start_soon(get_items, client, 4)
+        await wait_for(lambda: transport.in_flight == 4)
+
+        stats = transport.pool_stats()
+        assert {key: stats[key] for key in ("connections", "in_use", "idle", "waiting", "waits")} == {
+            "connections": 2,
+            "in_use": 2,
+            "idle": 0,
+            "waiting": 2,
+            "waits": 2,
+        }
+
+    stats = transport.pool_stats()
+    assert {key: stats[key] for key in ("connections", "in_use", "idle", "in_flight", "waiting")} == {
+        "connections": 2,
+        "in_use": 0,
+        "idle": 2,
+        "in_flight": 0,
+        "waiting": 0,
+    }
+
+
+@pytest.mark.anyio
+async def test_idle_connections_beyond_the_keepalive_limit_or_expiry_are_closed(api_url: str):
+    now: List[float] = [0]
+    limits = httpx.Limits(max_connections=4, max_keepalive_connections=1, keepalive_expiry=5)
+    transport = PooledTransport(limits=limits, clock=lambda: now[0])
+
+    async with httpx.AsyncClient(base_url=api_url, transport=transport) as client:
+        await get_items(client, 3)
+        assert transport.pool_stats()["idle"] == 1
+
+        now[0] += 10
+        assert transport.pool_stats()["connections"] == 0
+
+
+@pytest.mark.anyio
+async def test_requests_multiplexed_over_http2_do_not_wait(api_url: str, wait_for):
+    client, transport = create_upstream_client(UpstreamConfig(base_url=api_url, max_connections=1))
+    # As if the API had answered over HTTP/2
+    transport.multiplexed = True
+
+    async with client, anyio.create_task_group() as tg:
+        tg.start_soon(get_items, client, 3)
+        await wait_for(lambda: transport.in_flight == 3)
+
+        stats = transport.pool_stats()
+        assert (stats["in_use"], stats["waiting"]) == (1, 0)
+
+    assert transport.waits == 0
+
+
+@pytest.mark.anyio
+async def test_warm_up_opens_connections_up_to_the_keepalive_limit(api_url: str):
+    config = UpstreamConfig(base_url=api_url, warm_up_connections=3, max_keepalive_connections=2)
+    client, transport = create_upstream_client(config)
+
+    async with client:
+        assert await warm_up_client(client, config) == 2
+    assert transport.pool_stats()["idle"] == 2
+
+
+@pytest.mark.anyio
+async def test_the_pool_is_warmed_up_on_start(api_url: str):
+    mcp = FastApiMCP(create_app(), upstream=UpstreamConfig(base_url=api_url, warm_up_connections=2))
+    await mcp.start()
+
+    stats = mcp.pool_stats()
+    assert stats is not None
+    assert (stats["connections"], stats["idle"]) == (2, 2)
+
+    await mcp.aclose()
+    assert FastApiMCP(create_app()).pool_stats() is None
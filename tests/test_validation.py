@@ -0,0 +1,94 @@
+import json
+from typing import List, Optional
+
+import pytest
+from fastapi import FastAPI, Header, Query
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import BaseModel
+
+from fastapi_mcp import FastApiMCP
+
+
+class Note(BaseModel):
+    title: str
+    tags: List[str] = []
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/files/{file_path}", operation_id="get_file")
+    async def get_file(
+        file_path: str,
+        version: Optional[str] = None,
+        labels: List[str] = Query([]),
+        x_revision: Optional[str] = Header(None),
+    ):
+        return {"file_path": file_path, "version": version, "labels": labels, "revision": x_revision}
+
+    @app.get("/items", operation_id="list_items")
+    async def list_items(ids: List[int] = Query([])):
+        return {"ids": ids}
+
+    @app.post("/notes", operation_id="create_note")
+    async def create_note(note: Note):
+        return note
+
+    return app
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        {"file_path": 123},
+        {"file_path": "a", "version": 2.5},
+        {"file_path": "a", "version": True},
+        {"file_path": "a", "labels": [1, "b"]},
+        {"file_path": "a", "x_revision": 7},
+    ],
+)
+async def test_scalars_are_valid_for_string_parameters(arguments):
+    # Path, query and header values reach the app as strings, so it accepts any scalar for them
+    mcp = FastApiMCP(create_app(), validate_arguments=True)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        result = await client.call_tool("get_file", arguments)
+
+    assert not result.isError, result.content[0].text
+    assert json.loads(result.content[0].text)["file_path"] == str(arguments["file_path"])
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "arguments, field",
+    [
+        ({"file_path": {"name": "a"}}, "file_path"),
+        ({"file_path": "a", "labels": [["b"]]}, "labels[0]"),
+        ({"title": 1}, "title"),
+        ({"title": "a", "tags": [1]}, "tags[0]"),
+    ],
+)
+async def test_invalid_arguments_are_rejected(arguments, field):
+    mcp = FastApiMCP(create_app(), validate_arguments=True)
+    tool_name = "create_note" if "title" in arguments else "get_file"
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        result = await client.call_tool(tool_name, arguments)
+
+    assert result.isError
+    assert [error["field"] for error in json.loads(result.content[0].text)["fields"]] == [field]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("validate_arguments", [False, True])
+@pytest.mark.parametrize("ids", ["3", 3, ["3"], [3]])
+async def test_a_single_value_is_valid_for_list_parameters(validate_arguments, ids):
+    # Like FastAPI, which reads a query parameter given once as a list of one
+    mcp = FastApiMCP(create_app(), validate_arguments=validate_arguments)
+
+    async with create_connected_server_and_client_session(mcp.server) as client:
+        result = await client.call_tool("list_items", {"ids": ids})
+
+    assert not result.isError, result.content[0].text
+    assert json.loads(result.content[0].text) == {"ids": [3]}
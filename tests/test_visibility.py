@@ -0,0 +1,142 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI, Security
+from fastapi.security import OAuth2PasswordBearer, SecurityScopes
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fastapi_mcp import FastApiMCP, InMemorySessionStore, ToolVisibility
+from fastapi_mcp.types import HTTPRequestInfo
+from fastapi_mcp.visibility import SessionVisibility, session_visibility
+
+
+oauth = OAuth2PasswordBearer(tokenUrl="token", scopes={"items:read": "", "admin": ""}, auto_error=False)
+
+
+def user(scopes: SecurityScopes, token: Optional[str] = Security(oauth)):
+    return token
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items", operation_id="list_items")
+    async def list_items(token: Optional[str] = Security(user, scopes=["items:read"])):
+        return [1, 2]
+
+    @app.delete("/items", operation_id="wipe_items")
+    async def wipe_items(token: Optional[str] = Security(user, scopes=["admin"])):
+        return "wiped"
+
+    return app
+
+
+def policy(request_info: HTTPRequestInfo) -> Optional[ToolVisibility]:
+    if request_info.headers.get("authorization") == "Bearer reader":
+        return ToolVisibility(scopes=["items:read"])
+    return None
+
+
+BATCH = {"calls": [{"tool": "wipe_items"}, {"tool": "list_items"}]}
+
+
+def batch_errors(text: str) -> List[bool]:
+    return [result["isError"] for result in json.loads(text)]
+
+
+@pytest.mark.anyio
+async def test_hidden_tools_are_not_listed_nor_callable():
+    mcp = FastApiMCP(create_app(), batch_tool=True, visibility_policy=policy)
+
+    # The in-memory transport has no request to resolve the visibility from: the session inherits this one
+    token = session_visibility.set(SessionVisibility(ToolVisibility(scopes=["items:read"])))
+    try:
+        async with create_connected_server_and_client_session(mcp.server) as client:
+            names = [tool.name for tool in (await client.list_tools()).tools]
+            assert "list_items" in names
+            assert "wipe_items" not in names
+
+            result = await client.call_tool("wipe_items", {})
+            assert result.isError
+            assert "Unknown tool: wipe_items" in result.content[0].text
+
+            result = await client.call_tool("batch_call", BATCH)
+            assert batch_errors(result.content[0].text) == [True, False]
+    finally:
+        session_visibility.reset(token)
+
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+async def open_http_session(client: httpx.AsyncClient, credential: str) -> Dict[str, str]:
+    """Initialize a session of the streamable HTTP transport, and return the headers of its requests."""
+    headers = dict(HEADERS, Authorization=credential)
+    initialize = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}},
+    }
+    response = await client.post("/mcp", headers=headers, json=initialize)
+    headers["Mcp-Session-Id"] = response.headers["mcp-session-id"]
+    await client.post("/mcp", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return headers
+
+
+async def request(client: httpx.AsyncClient, headers: Dict[str, str], method: str, params: Dict[str, Any]) -> Any:
+    message = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    return (await client.post("/mcp", headers=headers, json=message)).json()["result"]
+
+
+async def assert_hidden(client: httpx.AsyncClient, headers: Dict[str, str]) -> None:
+    names = [tool["name"] for tool in (await request(client, headers, "tools/list", {}))["tools"]]
+    assert "list_items" in names
+    assert "wipe_items" not in names
+
+    result = await request(client, headers, "tools/call", {"name": "wipe_items", "arguments": {}})
+    assert result["isError"]
+    assert "Unknown tool: wipe_items" in result["content"][0]["text"]
+
+    result = await request(client, headers, "tools/call", {"name": "batch_call", "arguments": BATCH})
+    assert batch_errors(result["content"][0]["text"]) == [True, False]
+
+
+@pytest.mark.anyio
+async def test_hidden_tools_over_http():
+    app = create_app()
+    mcp = FastApiMCP(app, batch_tool=True, visibility_policy=policy)
+    mcp.mount(transport="http")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+        await assert_hidden(client, await open_http_session(client, "Bearer reader"))
+
+        # Other sessions aren't restricted
+        admin = await open_http_session(client, "Bearer admin")
+        names = [tool["name"] for tool in (await request(client, admin, "tools/list", {}))["tools"]]
+        assert "wipe_items" in names
+
+    await mcp.aclose()
+
+
+@pytest.mark.anyio
+async def test_hidden_tools_in_a_session_resumed_by_another_worker():
+    store = InMemorySessionStore()
+    workers = []
+    for _ in range(2):
+        app = create_app()
+        mcp = FastApiMCP(app, batch_tool=True, visibility_policy=policy)
+        mcp.mount(transport="http", session_store=store)
+        workers.append((app, mcp))
+
+    (first_app, _), (second_app, _) = workers
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(first_app), base_url="http://test") as first:
+        headers = await open_http_session(first, "Bearer reader")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(second_app), base_url="http://test") as second:
+        await assert_hidden(second, headers)
+
+    for _, mcp in workers:
+        await mcp.aclose()